@@ -35,6 +35,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'generator.metrics.MetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -117,6 +118,72 @@ MEDIA_URL  = "/media/"
 STATIC_ROOT = "/vol/web/static"
 MEDIA_ROOT  = "/vol/web/media"
 
+# Precomputed color lookup tables (see `manage.py build_color_tables`)
+COLOR_TABLE_DIR = os.environ.get('COLOR_TABLE_DIR', '/vol/web/color_tables')
+
+# Per-process LRU cache size for generated palettes
+PALETTE_CACHE_SIZE = int(os.environ.get('PALETTE_CACHE_SIZE', 1024))
+
+# Per-process cache size for PNG label metrics and glyph masks
+PNG_TEXT_CACHE_SIZE = int(os.environ.get('PNG_TEXT_CACHE_SIZE', 4096))
+
+# Encoding profile for palette images: default, fast, small or webp
+PALETTE_PNG_PROFILE = os.environ.get('PALETTE_PNG_PROFILE', 'default')
+
+# XLSX writer: openpyxl, or direct to fill the OOXML parts from templates
+PALETTE_XLSX_ENGINE = os.environ.get('PALETTE_XLSX_ENGINE', 'openpyxl')
+
+# Comma-separated formats rendered when a palette is saved; the others are
+# rendered on first download, e.g. 'png,css'
+PALETTE_EAGER_FORMATS = [ext for ext in os.environ.get('PALETTE_EAGER_FORMATS', '').split(',') if ext]
+
+# Generate palette files on the job queue, run by `manage.py
+# run_generator_workers`, instead of in the request
+PALETTE_GENERATION_QUEUE = os.environ.get('PALETTE_GENERATION_QUEUE', 'True') == 'True'
+
+# Generator workers: processes per run_generator_workers command, seconds
+# between polls of an empty queue, tries per job before it fails, base
+# retry delay in seconds (doubled after each failure) and seconds before a
+# running job whose worker went away is claimed again
+PALETTE_WORKER_PROCESSES = int(os.environ.get('PALETTE_WORKER_PROCESSES', 1))
+PALETTE_WORKER_POLL_INTERVAL = float(os.environ.get('PALETTE_WORKER_POLL_INTERVAL', 1.0))
+PALETTE_JOB_MAX_ATTEMPTS = int(os.environ.get('PALETTE_JOB_MAX_ATTEMPTS', 3))
+PALETTE_JOB_RETRY_DELAY = int(os.environ.get('PALETTE_JOB_RETRY_DELAY', 5))
+PALETTE_JOB_TIMEOUT = int(os.environ.get('PALETTE_JOB_TIMEOUT', 300))
+
+# Live palette status (the status long poll and event streams): seconds a
+# request stays open at most, seconds between keepalives on an idle stream,
+# and seconds between checks for changes on databases without LISTEN/NOTIFY.
+# Each open request holds a server thread; run gunicorn with threads
+# (--worker-class gthread) so they don't hold whole workers
+PALETTE_EVENTS_TIMEOUT = int(os.environ.get('PALETTE_EVENTS_TIMEOUT', 300))
+PALETTE_EVENTS_HEARTBEAT = int(os.environ.get('PALETTE_EVENTS_HEARTBEAT', 15))
+PALETTE_EVENTS_POLL_INTERVAL = float(os.environ.get('PALETTE_EVENTS_POLL_INTERVAL', 1.0))
+
+# Bearer token Prometheus must send to scrape /metrics; empty leaves the
+# endpoint open (e.g. when only the internal network can reach it). Set
+# PROMETHEUS_MULTIPROC_DIR in the environment to add up the metrics of all
+# gunicorn and generator worker processes
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+# How formats are rendered: serial, or in parallel on a thread or process
+# pool of PALETTE_RENDER_WORKERS workers (0 for the executor's default)
+PALETTE_RENDER_POOL = os.environ.get('PALETTE_RENDER_POOL', 'serial')
+PALETTE_RENDER_WORKERS = int(os.environ.get('PALETTE_RENDER_WORKERS', 0))
+
+# zlib level (1-9) for text files in zip bundles; images and spreadsheets
+# are already compressed and are stored as they are
+PALETTE_BUNDLE_COMPRESSLEVEL = int(os.environ.get('PALETTE_BUNDLE_COMPRESSLEVEL', 6))
+
+# Cache lifetime in seconds for palette thumbnails; their URLs change
+# whenever their content would
+PALETTE_THUMBNAIL_MAX_AGE = int(os.environ.get('PALETTE_THUMBNAIL_MAX_AGE', 31536000))
+
+# Batch preview: maximum color sets per request, and how many are computed
+# together before their lines are streamed
+PALETTE_BATCH_PREVIEW_LIMIT = int(os.environ.get('PALETTE_BATCH_PREVIEW_LIMIT', 1000))
+PALETTE_BATCH_PREVIEW_CHUNK = int(os.environ.get('PALETTE_BATCH_PREVIEW_CHUNK', 32))
+
 # Only point STATICFILES_DIRS at the dev-only folder when DEBUG is true
 if DEBUG:
     STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
@@ -197,6 +264,9 @@ CORS_ALLOW_HEADERS = [
     "x-requested-with",  # For AJAX requests
 ]
 
+# Let browsers read the formats left out of a palette's zip download
+CORS_EXPOSE_HEADERS = ["x-missing-formats"]
+
 TRUSTED_REFERER = os.environ.get("TRUSTED_REFERER", "")
 
 # Email settings
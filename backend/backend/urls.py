@@ -15,10 +15,14 @@ from django.urls import re_path
 from django.conf import settings
 from django.conf.urls.static import static
 
+from generator.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/core/', include('core.urls')),
     path('api/generator/', include('generator.urls')),
+    # Prometheus metrics
+    path('metrics', metrics_view, name='metrics'),
 
     # drf-spectacular schema and documentation URLs
     path('api/schema/', SpectacularAPIView.as_view(), name='api-schema'),
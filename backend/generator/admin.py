@@ -4,3 +4,4 @@ from generator import models
 admin.site.register(models.Palette)
 admin.site.register(models.PaletteFile)
 admin.site.register(models.PaletteFileType)
+admin.site.register(models.PaletteArtifact)
@@ -0,0 +1,244 @@
+"""
+Content-addressed storage for generated palette files.
+
+A generated file depends only on the generator version, the palette spec,
+the normalized colors and the format (plus the palette name for formats that
+embed it and the encoding profile of the PNG sheet), so it is stored once
+under a digest of those inputs and shared by every PaletteFile with the same
+key. Artifacts are reference counted and the
+file is removed when the last PaletteFile using it is deleted.
+"""
+import hashlib
+import os
+import threading
+
+from django.conf import settings
+from django.db import transaction
+
+from .formats import FORMATS
+from .generator import (
+    GENERATOR_VERSION,
+    FormatRenderError,
+    PaletteGenerator,
+    normalize_hex,
+)
+from .metrics import ARTIFACT_BYTES
+from .renderer import resolve_image_profile
+from .specs import DEFAULT_SPEC
+
+
+ARTIFACT_DIR = 'artifacts'
+
+
+def artifact_digest(extension, primary, secondary=None, tertiary=None,
+                    name=None, spec=DEFAULT_SPEC, png_profile='default'):
+    """Hex sha256 content key for one generated file."""
+    parts = [GENERATOR_VERSION, repr(spec), extension]
+    parts += [normalize_hex(c) or '' for c in (primary, secondary, tertiary)]
+    if FORMATS[extension].embeds_name:
+        parts.append(name or '')
+    if extension == 'png' and png_profile != 'default':
+        parts.append(png_profile)
+    return hashlib.sha256('\0'.join(parts).encode()).hexdigest()
+
+
+def artifact_path(digest, extension):
+    """Storage path, relative to MEDIA_ROOT, of an artifact."""
+    return os.path.join(ARTIFACT_DIR, digest[:2], f'{digest}.{extension}')
+
+
+def artifact_digests(name, primary, secondary=None, tertiary=None,
+                     extensions=None, spec=DEFAULT_SPEC, png_profile=None):
+    """``{extension: digest}`` of the requested known formats."""
+    if extensions is None:
+        extensions = FORMATS
+    png_profile, _ = resolve_image_profile(png_profile)
+    return {
+        ext: artifact_digest(
+            ext, primary, secondary, tertiary, name=name, spec=spec,
+            png_profile=png_profile
+        )
+        for ext in extensions if ext in FORMATS
+    }
+
+
+def render_artifacts(name, primary, secondary=None, tertiary=None,
+                     extensions=None, spec=DEFAULT_SPEC, png_profile=None,
+                     errors=None):
+    """
+    Render the requested formats that are not stored yet; returns
+    ``{extension: bytes}`` to pass to ``store_artifacts`` as ``contents``.
+    Rendering can take seconds, so call this before opening the transaction
+    that stores the artifacts, which then holds its locks only briefly.
+
+    A format that fails to render raises FormatRenderError, unless an
+    ``errors`` dict is given: failures are then recorded there and left out
+    of the result while the other formats are rendered.
+    """
+    from .models import PaletteArtifact
+
+    png_profile, _ = resolve_image_profile(png_profile)
+    colors = (primary, secondary, tertiary)
+    digests = artifact_digests(
+        name, *colors, extensions=extensions, spec=spec,
+        png_profile=png_profile
+    )
+    stored = PaletteArtifact.objects.in_bulk(
+        digests.values(), field_name='digest'
+    )
+    missing = [
+        ext for ext, digest in digests.items()
+        if digest not in stored
+        or not os.path.exists(stored[digest].full_path)
+    ]
+    try:
+        return render(
+            name, colors, missing, spec=spec, png_profile=png_profile
+        )
+    except FormatRenderError as e:
+        if errors is None:
+            raise
+        errors.update(e.errors)
+        return e.contents
+
+
+def store_artifacts(name, primary, secondary=None, tertiary=None,
+                    extensions=None, spec=DEFAULT_SPEC, png_profile=None,
+                    errors=None, contents=None):
+    """
+    Return ``{extension: PaletteArtifact}`` for the requested formats,
+    storing those that are not stored yet. Each returned artifact carries
+    one new reference, so call this inside the transaction that records
+    the referencing PaletteFile rows.
+
+    ``contents`` are the formats rendered beforehand by
+    ``render_artifacts``, with its ``errors``; without them, missing formats
+    are rendered here, with ``errors`` handled as ``render_artifacts`` does.
+    Formats listed in ``errors`` are left out of the result.
+    """
+    png_profile, image_profile = resolve_image_profile(png_profile)
+    colors = (primary, secondary, tertiary)
+    digests = artifact_digests(
+        name, *colors, extensions=extensions, spec=spec,
+        png_profile=png_profile
+    )
+    if contents is None:
+        contents = render_artifacts(
+            name, *colors, extensions=extensions, spec=spec,
+            png_profile=png_profile, errors=errors
+        )
+    contents = dict(contents)
+
+    def source(ext):
+        # Rendered here only if the artifact vanished since the check
+        if ext not in contents:
+            contents.update(render(
+                name, colors, [ext], spec=spec, png_profile=png_profile
+            ))
+        return contents[ext]
+
+    artifacts = {}
+    for ext, digest in digests.items():
+        if errors and ext in errors:
+            continue
+        file_extension = image_profile.extension if ext == 'png' else ext
+        artifacts[ext] = acquire_artifact(
+            digest, file_extension, lambda ext=ext: source(ext)
+        )
+    return artifacts
+
+
+def render(name, colors, extensions, **options):
+    """
+    Render the given formats in memory, on the configured render pool;
+    returns their contents or raises FormatRenderError.
+    """
+    if not extensions:
+        return {}
+    generator = PaletteGenerator(name, *colors, generate=False, **options)
+    contents, errors = generator.render_many(extensions)
+    if errors:
+        raise FormatRenderError(errors, contents)
+    return contents
+
+
+def acquire_artifact(digest, extension, source):
+    """
+    Add a reference to the artifact for ``digest``, storing the bytes from
+    ``source()`` when the artifact or its file does not exist yet.
+    """
+    from .models import PaletteArtifact
+
+    with transaction.atomic():
+        artifact = PaletteArtifact.objects.select_for_update().filter(
+            digest=digest
+        ).first()
+        if artifact is None or not os.path.exists(artifact.full_path):
+            relative_path = artifact_path(digest, extension)
+            size = _write_file(source(), relative_path)
+            ARTIFACT_BYTES.labels(format=extension).observe(size)
+            if artifact is None:
+                artifact, _ = PaletteArtifact.objects.get_or_create(
+                    digest=digest,
+                    defaults={
+                        'file_extension': extension,
+                        'file_path': relative_path,
+                        'size': size,
+                    }
+                )
+                # get_or_create may have returned a concurrent insert
+                artifact = PaletteArtifact.objects.select_for_update().get(
+                    pk=artifact.pk
+                )
+        artifact.ref_count += 1
+        artifact.save(update_fields=['ref_count', 'updated_at'])
+    return artifact
+
+
+def release_artifact(artifact_id):
+    """
+    Drop one reference to an artifact, deleting it and its file once no
+    PaletteFile uses it.
+    """
+    from .models import PaletteArtifact
+
+    with transaction.atomic():
+        artifact = PaletteArtifact.objects.select_for_update().filter(
+            pk=artifact_id
+        ).first()
+        if artifact is None:
+            return
+        remaining = artifact.palette_files.count()
+        if remaining:
+            # Trust the rows over the counter if the two ever disagree
+            artifact.ref_count = remaining
+            artifact.save(update_fields=['ref_count', 'updated_at'])
+            return
+        digest, full_path = artifact.digest, artifact.full_path
+        artifact.delete()
+        transaction.on_commit(lambda: _remove_file(digest, full_path))
+
+
+def _write_file(content, relative_path):
+    """Atomically write ``content`` into storage; returns its size."""
+    full_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    tmp_path = f'{full_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(content)
+    os.replace(tmp_path, full_path)
+    return len(content)
+
+
+def _remove_file(digest, full_path):
+    from .models import PaletteArtifact
+
+    # A concurrent request may have stored the same output again
+    if PaletteArtifact.objects.filter(digest=digest).exists():
+        return
+    try:
+        os.remove(full_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error deleting artifact {full_path}: {e}")
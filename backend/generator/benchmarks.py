@@ -0,0 +1,524 @@
+"""
+Benchmarks for the palette generator.
+
+Run them with ``manage.py benchmark_generator``. Each benchmark returns a list
+of result rows: ``{'case': ..., 'time_us': ...}`` plus any extra columns.
+
+Benchmarks registered with ``database=True`` call the API through the Django
+test client; they run against a throwaway test database (see
+``benchmark_database``) and temporary media, so they need neither network
+nor real data. Results can be saved as JSON and compared with a saved
+baseline by ``compare_results``.
+"""
+import io
+import os
+import platform
+import random
+import shutil
+import tempfile
+import timeit
+import zipfile
+from contextlib import contextmanager
+
+import numpy as np
+from django.conf import settings
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import engine, lookup
+from .bundles import entry_compression, stream_zip
+from .formats import FORMATS
+from .generator import (
+    GENERATOR_VERSION,
+    PaletteGenerator,
+    compute_hex_to_hsb,
+    compute_palette,
+    compute_rgb_to_cmyk,
+    generate_palette,
+    hex_to_hsb,
+    hex_to_rgb,
+)
+from .pools import RENDER_POOLS, get_render_pool
+from .renderer import IMAGE_PROFILES, PaletteSheetRenderer, encode_image
+from .specs import DEFAULT_SCALE
+from .xlsx import write_direct_xlsx, write_openpyxl_xlsx
+
+
+BENCHMARKS = {}
+
+
+# Relative slowdown beyond which compare_results reports a regression
+DEFAULT_THRESHOLD = 0.1
+
+
+def benchmark(name, database=False):
+    """
+    Register a benchmark function under ``name``; ``database`` marks those
+    that need the test database.
+    """
+    def decorator(func):
+        func.database = database
+        BENCHMARKS[name] = func
+        return func
+    return decorator
+
+
+def measure(func, number=100, repeat=5):
+    """Best time per call of ``func``, in microseconds."""
+    timings = timeit.repeat(func, number=number, repeat=repeat)
+    return min(timings) / number * 1e6
+
+
+def sample_colors(count, seed=0):
+    """A reproducible list of random ``#rrggbb`` colors."""
+    rng = random.Random(seed)
+    return ['#%06x' % rng.randrange(1 << 24) for _ in range(count)]
+
+
+@benchmark('color_math')
+def color_math(number=100):
+    """Color conversion and palette shading, cached and uncached."""
+    colors = sample_colors(1000, seed=3)
+    new_palettes = iter(
+        [colors[i:i + 3] for i in range(0, len(colors), 3)] * (number + 1)
+    )
+    warm = colors[:3]
+    generate_palette(*warm)
+
+    def convert():
+        for color in colors:
+            hex_to_hsb(color)
+
+    return [
+        {'case': 'hex_to_hsb',
+         'time_us': measure(convert, number=number) / len(colors),
+         'per': 'color'},
+        {'case': 'generate_palette/cached',
+         'time_us': measure(lambda: generate_palette(*warm), number=number)},
+        {'case': 'generate_palette/uncached',
+         'time_us': measure(lambda: compute_palette(*next(new_palettes)),
+                            number=max(1, number // 10), repeat=3)},
+    ]
+
+
+@benchmark('formats')
+def formats(number=100):
+    """Each registered file format rendered for one palette."""
+    generator = PaletteGenerator(
+        'Benchmark', '#3366cc', '#ff9900', '#33aa66', generate=False
+    )
+    # Images and workbooks are slow; scale the call count down
+    number = max(1, number // 20)
+
+    rows = []
+    for ext in FORMATS:
+        rows.append({
+            'case': f'render/{ext}',
+            'time_us': measure(lambda ext=ext: generator.render(ext),
+                               number=number, repeat=3),
+            'bytes': len(generator.render(ext)),
+        })
+    return rows
+
+
+@benchmark('color_tables')
+def color_tables(number=100):
+    """Computed conversions versus the memory-mapped lookup tables."""
+    tables = lookup.get_color_tables()
+    if tables is None:
+        return [{'case': 'color_tables', 'skipped': 'lookup tables not built'}]
+
+    colors = sample_colors(1000)
+    rgbs = [hex_to_rgb(color) for color in colors]
+    packed_rgb = [lookup.pack_rgb(rgb) for rgb in rgbs]
+    rgb_array = np.array(rgbs)
+    packed_array = np.array(packed_rgb)
+
+    def computed_hsb():
+        for color in colors:
+            compute_hex_to_hsb(color)
+
+    def table_hsb():
+        for color in colors:
+            tables.hex_to_hsb(lookup.pack_hex(color))
+
+    def computed_cmyk():
+        for rgb in rgbs:
+            compute_rgb_to_cmyk(rgb)
+
+    def table_cmyk():
+        for rgb in rgbs:
+            tables.rgb_to_cmyk(lookup.pack_rgb(rgb))
+
+    batch = len(colors)
+    rows = [
+        ('hex_to_hsb/computed', computed_hsb),
+        ('hex_to_hsb/table', table_hsb),
+        ('rgb_to_cmyk/computed', computed_cmyk),
+        ('rgb_to_cmyk/table', table_cmyk),
+        ('hex_to_hsb_array/computed',
+         lambda: np.round(engine.rgb_to_hsb_array(rgb_array))),
+        ('hex_to_hsb_array/table', lambda: tables.hsb_array(packed_array)),
+        ('rgb_to_cmyk_array/computed',
+         lambda: engine.compute_cmyk_array(rgb_array)),
+        ('rgb_to_cmyk_array/table', lambda: tables.cmyk_array(packed_array)),
+    ]
+    return [
+        {'case': case, 'time_us': measure(func, number=number) / batch,
+         'per': 'color'}
+        for case, func in rows
+    ]
+
+
+@benchmark('png')
+def png(number=100):
+    """PNG sheet rendering with a fresh versus a warmed-up renderer."""
+    colors = sample_colors(3 * 20, seed=1)
+    palettes = [
+        engine.palette_swatches(generate_palette(*colors[i:i + 3]))
+        for i in range(0, len(colors), 3)
+    ]
+    shades = len(DEFAULT_SCALE.steps)
+    # Rendering is slow; scale the call count down from the default
+    number = max(1, number // 50)
+
+    def cold():
+        PaletteSheetRenderer().render(palettes[0], shades)
+
+    warm = PaletteSheetRenderer()
+    warm.render(palettes[0], shades)
+    new_colors = iter(palettes[1:] * (number * 5 + 1))
+
+    rows = [
+        {'case': 'render/cold_renderer',
+         'time_us': measure(cold, number=number, repeat=3)},
+        {'case': 'render/same_palette',
+         'time_us': measure(lambda: warm.render(palettes[0], shades),
+                            number=number, repeat=3)},
+        {'case': 'render/new_palette',
+         'time_us': measure(lambda: warm.render(next(new_colors), shades),
+                            number=number, repeat=3)},
+    ]
+
+    img = warm.render(palettes[0], shades)
+    fills = [
+        swatch.rgb for family in palettes[0].values()
+        for swatch in family.values()
+    ]
+    for name, profile in IMAGE_PROFILES.items():
+        def encode(profile=profile):
+            buffer = io.BytesIO()
+            encode_image(img, buffer, profile, exact_colors=fills)
+            return buffer
+
+        rows.append({
+            'case': f'encode/{name}',
+            'time_us': measure(encode, number=number, repeat=3),
+            'bytes': len(encode().getvalue()),
+        })
+    return rows
+
+
+@benchmark('xlsx')
+def xlsx(number=100):
+    """XLSX sheet writing with openpyxl versus the direct template writer."""
+    swatches = engine.palette_swatches(generate_palette('#3366cc', '#ff9900'))
+    labels = DEFAULT_SCALE.labels
+    # Writing a workbook is slow; scale the call count down from the default
+    number = max(1, number // 10)
+
+    rows = []
+    for name, writer in (('openpyxl', write_openpyxl_xlsx),
+                         ('direct', write_direct_xlsx)):
+        def write(writer=writer):
+            buffer = io.BytesIO()
+            writer(buffer, swatches, labels)
+            return buffer
+
+        rows.append({
+            'case': f'engine/{name}',
+            'time_us': measure(write, number=number, repeat=3),
+            'bytes': len(write().getvalue()),
+        })
+    return rows
+
+
+@benchmark('bundle')
+def bundle(number=100):
+    """Zip bundle building: deflate everything versus the per-format policy."""
+    generator = PaletteGenerator(
+        'Benchmark', '#3366cc', '#ff9900', '#33aa66', generate=False
+    )
+    files = list(generator.render_files())
+    size = sum(len(content) for _, content in files)
+    # Bundles include the PNG and XLSX; scale the call count down
+    number = max(1, number // 10)
+
+    cases = [('deflate_all', lambda name: (zipfile.ZIP_DEFLATED, None))]
+    cases += [
+        (f'policy/level_{level}',
+         lambda name, level=level: entry_compression(name, level))
+        for level in (1, 6, 9)
+    ]
+    rows = []
+    for case, compression in cases:
+        def build(compression=compression):
+            return b''.join(stream_zip(
+                ((name, [content]) for name, content in files), compression
+            ))
+
+        compressed = len(build())
+        rows.append({
+            'case': case,
+            'time_us': measure(build, number=number, repeat=3),
+            'bytes': compressed,
+            'ratio': round(compressed / size, 3),
+        })
+    return rows
+
+
+@benchmark('render_pool')
+def render_pool(number=100):
+    """All formats of one palette rendered serially versus on each pool."""
+    colors = sample_colors(3 * 50, seed=2)
+    palettes = iter([colors[i:i + 3] for i in range(0, len(colors), 3)] * 20)
+    # Every format is rendered per call; scale the call count down
+    number = max(1, number // 20)
+
+    rows = []
+    for kind in RENDER_POOLS:
+        # Start the pool's workers outside the timing
+        pool = get_render_pool(kind)
+        if pool is not None:
+            list(pool.map(abs, range(64)))
+
+        def render_all(kind=kind):
+            generator = PaletteGenerator(
+                'Benchmark', *next(palettes), generate=False
+            )
+            contents, errors = generator.render_many(pool=kind)
+            if errors:
+                raise next(iter(errors.values()))
+            return contents
+
+        render_all()
+        rows.append({
+            'case': f'pool/{kind}',
+            'time_us': measure(render_all, number=number, repeat=3),
+        })
+    return rows
+
+
+def consume(response):
+    """Read a test client response to the end; raises if it failed."""
+    if response.status_code >= 400:
+        raise RuntimeError(
+            f'{response.request["PATH_INFO"]} returned '
+            f'{response.status_code}'
+        )
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+def ensure_file_types():
+    """
+    Create a file type for each format. Deployments add the base file types
+    as data; this gives saved palettes one file per format, as they would
+    have.
+    """
+    from .models import PaletteFileType
+
+    for ext in FORMATS:
+        PaletteFileType.objects.get_or_create(
+            file_extension=ext,
+            defaults={'name': ext.upper(), 'description': ext}
+        )
+
+
+@benchmark('endpoints', database=True)
+def endpoints(number=100):
+    """The preview, create and download endpoints through the test client."""
+    from django.contrib.auth import get_user_model
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import AccessToken
+
+    from .models import Palette
+
+    ensure_file_types()
+    media_root = tempfile.mkdtemp(prefix='palette_benchmark_')
+    user = get_user_model().objects.create_user(
+        email='benchmark@example.com', first_name='Bench',
+        last_name='Mark', password='benchmark-only'
+    )
+    client = APIClient()
+    client.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+    )
+    colors = iter(sample_colors(100000, seed=4))
+    # Requests render files; scale the call count down
+    number = max(1, number // 20)
+    repeat = 3
+
+    def post(url_name, data):
+        return consume(client.post(reverse(url_name), data, format='json'))
+
+    def create(name='Benchmark'):
+        post('palette-list', {'name': name, 'primary': next(colors),
+                              'secondary': next(colors)})
+        return Palette.objects.filter(user=user).latest('id')
+
+    def time(func):
+        return measure(func, number=number, repeat=repeat)
+
+    rows = []
+    try:
+        with override_settings(MEDIA_ROOT=media_root,
+                               PALETTE_GENERATION_QUEUE=False,
+                               PALETTE_EAGER_FORMATS=[]):
+            preview = {'primary': '#3366cc', 'secondary': '#ff9900'}
+            rows += [
+                {'case': 'preview/json', 'time_us': time(
+                    lambda: post('palette-preview', preview))},
+                {'case': 'preview/json_new_colors', 'time_us': time(
+                    lambda: post('palette-preview', {
+                        'primary': next(colors), 'secondary': next(colors)
+                    }))},
+                {'case': 'preview/png', 'time_us': time(
+                    lambda: post('palette-preview', {
+                        'primary': next(colors), 'file_format': 'png'
+                    }))},
+                {'case': 'preview/batch_8', 'time_us': time(
+                    lambda: post('palette-preview-batch', {'palettes': [
+                        {'primary': next(colors)} for _ in range(8)
+                    ]}))},
+                {'case': 'create/lazy', 'time_us': time(create)},
+            ]
+            with override_settings(PALETTE_EAGER_FORMATS=list(FORMATS)):
+                rows.append({'case': 'create/eager', 'time_us': time(create)})
+            with override_settings(PALETTE_GENERATION_QUEUE=True):
+                rows.append({'case': 'create/queued', 'time_us': time(create)})
+
+            # The first download of a lazy palette renders and zips its
+            # files; later ones serve the stored bundle
+            fresh = iter([create() for _ in range(number * repeat + 1)])
+            rows.append({'case': 'download/bundle_first', 'time_us': time(
+                lambda: consume(client.get(
+                    reverse('palette-download', args=[next(fresh).id])
+                )))})
+            palette = next(fresh)
+            download = reverse('palette-download', args=[palette.id])
+            consume(client.get(download))
+            css = palette.files.get(file_type__file_extension='css')
+            rows += [
+                {'case': 'download/bundle', 'time_us': time(
+                    lambda: consume(client.get(download)))},
+                {'case': 'download/file', 'time_us': time(
+                    lambda: consume(client.get(
+                        reverse('palette-files-download', args=[css.id])
+                    )))},
+                {'case': 'download/anonymous', 'time_us': time(
+                    lambda: post('palette-download-anonymous', {
+                        'name': 'Benchmark', 'primary': next(colors),
+                        'secondary': next(colors)
+                    }))},
+            ]
+    finally:
+        shutil.rmtree(media_root, ignore_errors=True)
+    return rows
+
+
+@contextmanager
+def benchmark_database(threaded=False):
+    """
+    Run the enclosed benchmarks against a new test database, created like
+    the test runner's (in memory for SQLite) and destroyed afterwards.
+
+    With ``threaded``, an SQLite test database is a temporary file instead,
+    since threads writing to a shared in-memory database lock each other
+    out rather than wait. It is opened in WAL mode, with transactions that
+    take the write lock up front, so that writers queue for the lock.
+    """
+    from django.db import connection
+    from django.test.utils import (
+        setup_test_environment,
+        teardown_test_environment,
+    )
+
+    test_settings = connection.settings_dict['TEST']
+    old_test_name = test_settings.get('NAME')
+    old_options = connection.settings_dict['OPTIONS']
+    if threaded and connection.vendor == 'sqlite':
+        fd, test_settings['NAME'] = tempfile.mkstemp(
+            prefix='palette_benchmark_', suffix='.sqlite3'
+        )
+        os.close(fd)
+        connection.settings_dict['OPTIONS'] = {
+            **old_options, 'timeout': 60, 'transaction_mode': 'IMMEDIATE',
+            'init_command': 'PRAGMA journal_mode=WAL',
+        }
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        test_settings['NAME'] = old_test_name
+        connection.settings_dict['OPTIONS'] = old_options
+
+
+def results_document(results, number):
+    """The JSON document saved for ``{benchmark: rows}`` results."""
+    from django.db import connection
+
+    return {
+        'meta': {
+            'created_at': timezone.now().isoformat(),
+            'generator_version': GENERATOR_VERSION,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'database': connection.vendor,
+            'render_pool': getattr(settings, 'PALETTE_RENDER_POOL', 'serial'),
+            'number': number,
+        },
+        'results': results,
+    }
+
+
+def compare_results(baseline, results, threshold=DEFAULT_THRESHOLD):
+    """
+    Compare ``{benchmark: rows}`` results with a baseline of the same shape;
+    returns a row per case timed in both: ``benchmark``, ``case``, the two
+    times, their ``change`` as a fraction of the baseline and a ``status``
+    of regression, improvement or ok, by ``threshold``.
+    """
+    rows = []
+    for name, cases in results.items():
+        before = {
+            row['case']: row['time_us']
+            for row in baseline.get(name, []) if 'time_us' in row
+        }
+        for row in cases:
+            if 'time_us' not in row or not before.get(row['case']):
+                continue
+            change = row['time_us'] / before[row['case']] - 1
+            if change > threshold:
+                status = 'regression'
+            elif change < -threshold:
+                status = 'improvement'
+            else:
+                status = 'ok'
+            rows.append({
+                'benchmark': name,
+                'case': row['case'],
+                'baseline_us': before[row['case']],
+                'time_us': row['time_us'],
+                'change': change,
+                'status': status,
+            })
+    return rows
@@ -0,0 +1,148 @@
+"""
+Streaming zip bundles of palette files.
+
+The archive is written by ``zipfile`` into a sink that cannot seek, so every
+member gets a data descriptor instead of a rewritten local header, and the
+bytes are handed on as soon as they are produced. A response built from
+``stream_zip`` therefore holds at most one read chunk (or one rendered
+member) and its compressed output in memory, however large the bundle.
+
+Members whose format is already compressed (PNG, WebP, XLSX) are stored as
+they are; deflating them again costs CPU for next to no saving. Text formats
+are deflated at PALETTE_BUNDLE_COMPRESSLEVEL.
+
+Saved palettes get their bundle written once by ``write_bundle`` when their
+files are generated, so downloads serve a finished file.
+"""
+import os
+import threading
+import time
+import zipfile
+
+from django.conf import settings
+
+from .formats import is_compressed
+from .metrics import BUNDLE_BYTES, BUNDLE_SECONDS
+
+
+# Bytes read from storage per chunk
+CHUNK_SIZE = 64 * 1024
+
+# zlib level used when the deployment does not configure one
+DEFAULT_COMPRESSLEVEL = 6
+
+
+def entry_compression(name, compresslevel=None):
+    """
+    ``(compress_type, compresslevel)`` for a bundle member named ``name``:
+    stored if its format is already compressed, deflated otherwise.
+    """
+    extension = os.path.splitext(name)[1][1:].lower()
+    if is_compressed(extension):
+        return zipfile.ZIP_STORED, None
+    if compresslevel is None:
+        compresslevel = getattr(
+            settings, 'PALETTE_BUNDLE_COMPRESSLEVEL', DEFAULT_COMPRESSLEVEL
+        )
+    return zipfile.ZIP_DEFLATED, compresslevel
+
+
+class _ChunkSink:
+    """Write-only file object collecting output until it is drained."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_zip(entries, compression=entry_compression):
+    """
+    Yield a zip archive of ``(name, chunks)`` entries piece by piece, where
+    ``chunks`` is an iterable of bytes consumed only when the entry is
+    written. ``compression(name)`` picks each member's compress type and
+    level.
+    """
+    sink = _ChunkSink()
+    archive = zipfile.ZipFile(sink, 'w')
+    for name, chunks in entries:
+        info = zipfile.ZipInfo(name, time.localtime()[:6])
+        info.compress_type, level = compression(name)
+        # ZipInfo only takes a per-member level through this attribute
+        info._compresslevel = level
+        info.external_attr = 0o600 << 16
+        with archive.open(info, 'w') as member:
+            for chunk in chunks:
+                member.write(chunk)
+                data = sink.drain()
+                if data:
+                    yield data
+        data = sink.drain()
+        if data:
+            yield data
+    archive.close()
+    yield sink.drain()
+
+
+def file_chunks(open_file, chunk_size=CHUNK_SIZE):
+    """
+    Yield the contents of the file returned by ``open_file()`` in chunks,
+    opening it only when iteration starts.
+    """
+    with open_file() as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+@BUNDLE_SECONDS.time()
+def write_bundle(entries, relative_path):
+    """
+    Stream a zip of ``entries`` into storage at ``relative_path``, replacing
+    any previous bundle there atomically; returns its size in bytes.
+    """
+    full_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    tmp_path = f'{full_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    try:
+        with open(tmp_path, 'wb') as f:
+            for data in stream_zip(entries):
+                f.write(data)
+        os.replace(tmp_path, full_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    size = os.path.getsize(full_path)
+    BUNDLE_BYTES.observe(size)
+    return size
+
+
+def remove_bundle(relative_path):
+    """
+    Delete a stored bundle, ignoring one that is already gone, and its
+    directory once nothing else is left in it.
+    """
+    full_path = os.path.join(settings.MEDIA_ROOT, relative_path)
+    try:
+        os.remove(full_path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Error deleting bundle {relative_path}: {e}")
+    try:
+        os.rmdir(os.path.dirname(full_path))
+    except OSError:
+        pass
@@ -0,0 +1,88 @@
+"""
+Bounded in-process memoization for palette generation.
+
+Palettes are pure functions of their normalized input colors, and designers
+tend to revisit the same colors while dragging a picker, so results are kept
+in small LRU caches. Cached values are frozen so callers cannot mutate a
+result shared with other requests.
+"""
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+from .metrics import CACHE_LOOKUPS
+
+
+class LRUCache:
+    """
+    Size-bounded, thread-safe LRU cache with hit/miss/eviction counters.
+    """
+
+    def __init__(self, name, maxsize):
+        self.name = name
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._hit_counter = CACHE_LOOKUPS.labels(cache=name, result='hit')
+        self._miss_counter = CACHE_LOOKUPS.labels(cache=name, result='miss')
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for ``key``, calling ``compute()`` on a miss.
+        The computation runs outside the lock so slow misses do not block
+        other threads.
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                self._hit_counter.inc()
+                return self._data[key]
+            self.misses += 1
+        self._miss_counter.inc()
+
+        value = compute()
+        if self.maxsize <= 0:
+            return value
+
+        with self._lock:
+            if key in self._data:
+                # Another thread computed it meanwhile; keep the first result
+                self._data.move_to_end(key)
+                return self._data[key]
+            self._data[key] = value
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        """Drop all entries and reset the counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self):
+        """Counters for admin and metrics views."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'size': len(self._data),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+
+def freeze(mapping):
+    """Return a read-only view of a (possibly nested) dict."""
+    return MappingProxyType({
+        key: freeze(value) if isinstance(value, dict) else value
+        for key, value in mapping.items()
+    })
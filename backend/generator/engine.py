@@ -0,0 +1,301 @@
+"""
+Vectorized color conversions for palette generation.
+
+These functions mirror the scalar helpers in ``generator.generator`` but work
+on whole ``(N, 3)`` HSB arrays at once, so a full palette (or a batch of
+palettes) is converted in a single NumPy pass.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .lookup import get_color_tables
+from .specs import DEFAULT_SCALE, DEFAULT_SPEC, compile_scale, to_python_number
+
+
+# Component order for each hue sector, indexing into the stacked
+# (v, t, p, q) array exactly like colorsys.hsv_to_rgb.
+_SECTOR_R = np.array([0, 3, 2, 2, 1, 0])
+_SECTOR_G = np.array([1, 0, 0, 3, 2, 2])
+_SECTOR_B = np.array([2, 2, 1, 0, 0, 3])
+
+ColorTable = namedtuple("ColorTable", ["rgb", "hex", "cmyk", "contrast"])
+Swatch = namedtuple("Swatch", ["hsb", "rgb", "hex", "cmyk", "contrast"])
+
+
+def _as_float_array(values, width):
+    array = np.asarray(values, dtype=np.float64)
+    return array.reshape(-1, width)
+
+
+def hsb_to_rgb_array(hsb, rounded=False):
+    """
+    Convert an (N, 3) HSB array to an (N, 3) int RGB array.
+
+    By default channels are truncated like ``hsb_to_rgb``; pass
+    ``rounded=True`` for the rounding used by the preview endpoint.
+    """
+    hsb = _as_float_array(hsb, 3)
+    h = hsb[:, 0] / 360
+    s = hsb[:, 1] / 100
+    v = hsb[:, 2] / 100
+
+    sector = np.trunc(h * 6.0)
+    f = (h * 6.0) - sector
+    p = v * (1.0 - s)
+    q = v * (1.0 - s * f)
+    t = v * (1.0 - s * (1.0 - f))
+    sector = sector.astype(np.int64) % 6
+
+    components = np.stack([v, t, p, q], axis=1)
+    rows = np.arange(len(hsb))
+    rgb = np.stack([
+        components[rows, _SECTOR_R[sector]],
+        components[rows, _SECTOR_G[sector]],
+        components[rows, _SECTOR_B[sector]],
+    ], axis=1) * 255
+
+    rgb = np.round(rgb) if rounded else np.trunc(rgb)
+    return rgb.astype(np.int64)
+
+
+def rgb_to_hsb_array(rgb):
+    """
+    Convert an (N, 3) RGB array (0-255) to an (N, 3) float HSB array.
+    """
+    rgb = _as_float_array(rgb, 3) / 255
+    r, g, b = rgb[:, 0], rgb[:, 1], rgb[:, 2]
+    maxc = rgb.max(axis=1)
+    minc = rgb.min(axis=1)
+    rangec = maxc - minc
+    grey = rangec == 0
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        s = np.where(grey, 0.0, rangec / maxc)
+        rc = (maxc - r) / rangec
+        gc = (maxc - g) / rangec
+        bc = (maxc - b) / rangec
+        h = np.select(
+            [r == maxc, g == maxc],
+            [bc - gc, 2.0 + rc - bc],
+            default=4.0 + gc - rc,
+        )
+        h = np.where(grey, 0.0, (h / 6.0) % 1.0)
+
+    return np.stack([h * 360, s * 100, maxc * 100], axis=1)
+
+
+def hex_to_rgb_array(hex_colors):
+    """
+    Parse a sequence of ``#rrggbb`` strings into an (N, 3) int RGB array.
+    """
+    digits = [color.strip('#') for color in hex_colors]
+    for value in digits:
+        if len(value) != 6:
+            raise ValueError(f"Invalid hex color: #{value}")
+    packed = np.array([int(value, 16) for value in digits], dtype=np.int64)
+    return np.stack(
+        [(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF],
+        axis=1,
+    )
+
+
+def _pack_rgb_array(rgb):
+    return (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+
+def hex_to_hsb_array(hex_colors):
+    """
+    Vectorized ``hex_to_hsb``: returns an (N, 3) array of rounded HSB values.
+    """
+    rgb = hex_to_rgb_array(hex_colors)
+    tables = get_color_tables()
+    if tables is not None:
+        return tables.hsb_array(_pack_rgb_array(rgb))
+    return np.round(rgb_to_hsb_array(rgb)).astype(np.int64)
+
+
+_OKLAB_LMS = np.array([
+    [0.4122214708, 0.5363325363, 0.0514459929],
+    [0.2119034982, 0.6806995451, 0.1073969566],
+    [0.0883024619, 0.2817188376, 0.6299787005],
+])
+_OKLAB_LAB = np.array([
+    [0.2104542553, 0.7936177850, -0.0040720468],
+    [1.9779984951, -2.4285922050, 0.4505937099],
+    [0.0259040371, 0.7827717662, -0.8086757660],
+])
+
+
+def rgb_to_oklab_array(rgb):
+    """
+    Convert an (N, 3) sRGB array (0-255) to the perceptual OKLab space.
+    Euclidean distances in OKLab track perceived color differences.
+    """
+    srgb = _as_float_array(rgb, 3) / 255
+    linear = np.where(
+        srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4
+    )
+    lms = np.cbrt(linear @ _OKLAB_LMS.T)
+    return lms @ _OKLAB_LAB.T
+
+
+def rgb_to_hex_array(rgb):
+    """
+    Format an (N, 3) int RGB array as ``#rrggbb`` strings.
+    """
+    rgb = np.asarray(rgb, dtype=np.int64).reshape(-1, 3)
+    if rgb.size and (rgb.min() < 0 or rgb.max() > 255):
+        # Out-of-gamut values keep the exact '%02x' output of hsb_to_hex
+        return np.array(['#%02x%02x%02x' % tuple(row) for row in rgb.tolist()])
+    return np.char.mod('#%06x', _pack_rgb_array(rgb))
+
+
+def rgb_to_cmyk_array(rgb):
+    """
+    Convert an (N, 3) RGB array (0-255) to an (N, 4) int CMYK array (0-100),
+    reading the precomputed table when it is available.
+    """
+    rgb = np.asarray(rgb, dtype=np.int64).reshape(-1, 3)
+    tables = get_color_tables()
+    if tables is not None and rgb.size and rgb.min() >= 0 and rgb.max() <= 255:
+        return tables.cmyk_array(_pack_rgb_array(rgb))
+    return compute_cmyk_array(rgb)
+
+
+def compute_cmyk_array(rgb):
+    """
+    Compute CMYK values for an (N, 3) RGB array without the lookup table.
+    """
+    rgb = _as_float_array(rgb, 3) / 255.0
+    k = 1 - rgb.max(axis=1)
+    black = k == 1
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cmy = (1 - rgb - k[:, None]) / (1 - k[:, None])
+
+    cmyk = np.round(np.column_stack([cmy, k]) * 100)
+    cmyk[black] = (0, 0, 0, 100)
+    return cmyk.astype(np.int64)
+
+
+def contrast_color_array(rgb):
+    """
+    Return black or white text colors, as an (N, 3) array, for each RGB row.
+    """
+    rgb = np.asarray(rgb, dtype=np.int64).reshape(-1, 3)
+    brightness = (rgb[:, 0] * 299 + rgb[:, 1] * 587 + rgb[:, 2] * 2.2) / 1000
+    return np.where((brightness > 128)[:, None], 0, 255).repeat(3, axis=1)
+
+
+def convert_hsb_array(hsb, rounded=False):
+    """
+    Convert an (N, 3) HSB array to RGB, HEX, CMYK and contrast arrays in one
+    vectorized pass.
+    """
+    rgb = hsb_to_rgb_array(hsb, rounded=rounded)
+    return ColorTable(
+        rgb=rgb,
+        hex=rgb_to_hex_array(rgb),
+        cmyk=rgb_to_cmyk_array(rgb),
+        contrast=contrast_color_array(rgb),
+    )
+
+
+def palette_swatches(palette, rounded=False):
+    """
+    Convert every shade of a palette at once.
+
+    Returns a dict of ``{family: {shade: Swatch}}`` with plain Python values,
+    ready for the file writers and API responses.
+    """
+    keys = [
+        (name, shade) for name, shades in palette.items() for shade in shades
+    ]
+    if not keys:
+        return {}
+    hsb = [palette[name][shade] for name, shade in keys]
+    table = convert_hsb_array(hsb, rounded=rounded)
+
+    rgb = table.rgb.tolist()
+    cmyk = table.cmyk.tolist()
+    contrast = table.contrast.tolist()
+    swatches = {}
+    for idx, (name, shade) in enumerate(keys):
+        swatches.setdefault(name, {})[shade] = Swatch(
+            hsb=hsb[idx],
+            rgb=tuple(rgb[idx]),
+            hex=str(table.hex[idx]),
+            cmyk=tuple(cmyk[idx]),
+            contrast=tuple(contrast[idx]),
+        )
+    return swatches
+
+
+def shade_array(bases, scale=DEFAULT_SCALE):
+    """
+    Expand an (M, 3) array of base HSB colors into an (M, steps, 3) array
+    of shades ordered by the scale's weights.
+    """
+    compiled = compile_scale(scale)
+    bases = _as_float_array(bases, 3)
+    steps = len(compiled.labels)
+    h = np.repeat(bases[:, :1], steps, axis=1)
+    s = bases[:, 1:2] + compiled.saturation
+    b = bases[:, 2:3] + compiled.brightness
+
+    lighter, darker = compiled.lighter, compiled.darker
+    s[:, lighter] = np.maximum(s[:, lighter], 0)
+    b[:, lighter] = np.minimum(b[:, lighter], 100)
+    s[:, darker] = np.minimum(s[:, darker], 100)
+    b[:, darker] = np.maximum(b[:, darker], 0)
+
+    return np.stack([h, s, b], axis=2)
+
+
+def build_palettes(family_bases, scale=DEFAULT_SCALE):
+    """
+    Shade the families of one or more palettes in a single pass.
+
+    ``family_bases`` holds one list of ``(name, base HSB)`` pairs per palette.
+    Returns a palette dict (``{family: {weight: hsb}}``) for each of them.
+    """
+    bases = [base for families in family_bases for _, base in families]
+    if not bases:
+        return [{} for _ in family_bases]
+    labels = compile_scale(scale).labels
+    shades = shade_array(bases, scale).tolist()
+
+    palettes = []
+    position = 0
+    for families in family_bases:
+        palette = {}
+        for name, _ in families:
+            palette[name] = {
+                label: tuple(to_python_number(x) for x in hsb)
+                for label, hsb in zip(labels, shades[position])
+            }
+            position += 1
+        palettes.append(palette)
+    return palettes
+
+
+def generate_palette_batch(colors, spec=DEFAULT_SPEC):
+    """
+    Compute many palettes at once.
+
+    ``colors`` is a sequence of ``(primary, secondary, tertiary)`` hex tuples
+    (secondary and tertiary may be ``None``). Returns a list of palettes with
+    the same structure and values as ``generate_palette``.
+    """
+    colors = [tuple(color) + (None,) * (3 - len(color)) for color in colors]
+    unique_hex = sorted({c for color in colors for c in color if c})
+    if not unique_hex:
+        return []
+    hsb_by_hex = dict(zip(unique_hex, hex_to_hsb_array(unique_hex).tolist()))
+
+    family_bases = [
+        spec.family_bases(*(hsb_by_hex[c] if c else None for c in color))
+        for color in colors
+    ]
+    return build_palettes(family_bases, spec.scale)
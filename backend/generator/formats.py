@@ -0,0 +1,336 @@
+"""
+Registry of palette output formats.
+
+Each format declares its file extension, the content type it is served with
+and a writer that renders a PaletteGenerator into a binary file object.
+Text formats are assembled from module-level string templates into one
+string and written in a single call. New formats are added with
+``register_format`` or ``text_format`` and need no change to the generator.
+"""
+import json
+import re
+from collections import namedtuple
+
+from django.conf import settings
+
+from .renderer import IMAGE_PROFILES, encode_image, get_png_renderer
+from .svg import render_svg
+from .xlsx import write_xlsx
+
+
+OutputFormat = namedtuple(
+    'OutputFormat',
+    ['extension', 'content_type', 'write', 'embeds_name', 'compressed']
+)
+
+# Registered formats by extension, in generation order
+FORMATS = {}
+
+# Formats of an anonymous download unless others are asked for; formats
+# registered later are opt-in there, so they add no per-request work
+DOWNLOAD_FORMATS = ('png', 'xlsx', 'css', 'ts', 'dart')
+
+
+def register_format(extension, content_type, embeds_name=False,
+                    compressed=False):
+    """
+    Register ``write(generator, fp)`` as the writer for ``extension``.
+    ``embeds_name`` marks formats whose contents include the palette name
+    and ``compressed`` those whose output is already compressed.
+    """
+    def decorator(write):
+        FORMATS[extension] = OutputFormat(
+            extension, content_type, write, embeds_name, compressed
+        )
+        return write
+    return decorator
+
+
+def text_format(extension, content_type, embeds_name=False):
+    """Register ``render(generator) -> str`` as a UTF-8 text format."""
+    def decorator(render):
+        def write(generator, fp):
+            fp.write(render(generator).encode('utf-8'))
+        register_format(extension, content_type, embeds_name)(write)
+        return render
+    return decorator
+
+
+def content_type_for(extension):
+    """Content type for a generated file's extension, or None if unknown."""
+    output_format = FORMATS.get(extension)
+    if output_format is not None:
+        return output_format.content_type
+    # The palette image may be stored under its encoding profile's extension
+    for profile in IMAGE_PROFILES.values():
+        if profile.extension == extension:
+            return profile.content_type
+    return None
+
+
+def is_compressed(extension):
+    """Whether a generated file's contents are already compressed."""
+    output_format = FORMATS.get(extension)
+    if output_format is not None:
+        return output_format.compressed
+    # Every image profile encodes to a compressed format
+    return any(
+        profile.extension == extension for profile in IMAGE_PROFILES.values()
+    )
+
+
+def identifier(name, separator='_'):
+    """A family name as a lowercase identifier, e.g. ``light_blue``."""
+    return re.sub(r'[^0-9a-z]+', separator, name.lower()).strip(separator)
+
+
+def camel_case(*parts):
+    words = identifier('_'.join(str(part) for part in parts)).split('_')
+    return words[0] + ''.join(word.capitalize() for word in words[1:])
+
+
+@register_format('png', 'image/png', compressed=True)
+def write_png(generator, fp):
+    img = get_png_renderer().render(
+        generator.swatches, len(generator.spec.scale.labels)
+    )
+    fills = [
+        swatch.rgb
+        for swatches in generator.swatches.values()
+        for swatch in swatches.values()
+    ]
+    encode_image(img, fp, generator.image_profile, exact_colors=fills)
+
+
+@text_format('svg', 'image/svg+xml')
+def render_svg_sheet(generator):
+    return render_svg(generator.swatches, len(generator.spec.scale.labels))
+
+
+@register_format(
+    'xlsx',
+    'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    compressed=True
+)
+def write_excel(generator, fp):
+    write_xlsx(
+        fp, generator.swatches, generator.spec.scale.labels,
+        engine=getattr(settings, 'PALETTE_XLSX_ENGINE', 'openpyxl')
+    )
+
+
+CSS_DOCUMENT = (
+    '/* EXAMPLE USAGE */\n'
+    '/* .header {{ */\n'
+    '/* background-color: var(--primary-500); */\n'
+    '/* color: var(--neutral-900); */\n'
+    '/* }} */\n\n'
+    '/* Button Styles */\n'
+    '/* .button {{ */\n'
+    '/*   background-color: var(--secondary-500); */\n'
+    '/*   color: var(--neutral-100); */\n'
+    '/* }} */\n\n'
+    '/* Color Variables */\n'
+    ':root {{\n'
+    '{variables}'
+    '}}\n'
+)
+CSS_VARIABLE = '  --{family}-{shade}: {hex};\n'
+
+
+@text_format('css', 'text/css')
+def render_css(generator):
+    return CSS_DOCUMENT.format(variables=''.join(
+        CSS_VARIABLE.format(family=name.lower(), shade=shade, hex=swatch.hex)
+        for name, swatches in generator.swatches.items()
+        for shade, swatch in swatches.items()
+    ))
+
+
+TS_DOCUMENT = (
+    '// Centralized shared components for theme configuration\n'
+    'const paletteComponents = {{\n'
+    '{families}'
+    '}};\n\n'
+    'export default paletteComponents;\n'
+)
+TS_FAMILY = '  {family}: {{\n{shades}  }},\n'
+TS_SHADE = "    {shade}: '{hex}',\n"
+
+
+@text_format('ts', 'application/typescript')
+def render_typescript(generator):
+    return TS_DOCUMENT.format(families=''.join(
+        TS_FAMILY.format(family=name.lower(), shades=''.join(
+            TS_SHADE.format(shade=shade, hex=swatch.hex)
+            for shade, swatch in swatches.items()
+        ))
+        for name, swatches in generator.swatches.items()
+    ))
+
+
+DART_DOCUMENT = (
+    "import 'package:flutter/material.dart';\n\n"
+    '// Centralized shared components for theme configuration\n'
+    'class PaletteComponents {{\n'
+    '{families}'
+    '  // Material Color Swatches\n'
+    '{material}'
+    '}}\n'
+)
+DART_FAMILY = '  static const Map<int, Color> {family} = {{\n{shades}  }};\n\n'
+DART_SHADE = '    {shade}: Color(0xFF{hex}),\n'
+DART_MATERIAL = (
+    '  static const MaterialColor {family}Swatch = MaterialColor(\n'
+    '    0xFF{hex},\n'
+    '    {family},\n'
+    '  );\n\n'
+)
+
+
+@text_format('dart', 'application/dart')
+def render_dart(generator):
+    swatches = generator.swatches
+    anchor = generator.spec.scale.anchor_label
+    return DART_DOCUMENT.format(
+        families=''.join(
+            DART_FAMILY.format(family=name.lower(), shades=''.join(
+                DART_SHADE.format(shade=shade, hex=swatch.hex[1:].upper())
+                for shade, swatch in shades.items()
+            ))
+            for name, shades in swatches.items()
+        ),
+        material=''.join(
+            DART_MATERIAL.format(
+                family=name,
+                hex=swatches[name.capitalize()][anchor].hex[1:].upper()
+            )
+            for name in ('primary', 'secondary', 'tertiary')
+            if name.capitalize() in swatches
+        ),
+    )
+
+
+SCSS_DOCUMENT = (
+    '// Color Variables\n'
+    '{variables}\n'
+    '// Color Maps\n'
+    '$palette: (\n'
+    '{maps}'
+    ');\n'
+)
+SCSS_VARIABLE = '${family}-{shade}: {hex};\n'
+SCSS_MAP = "  '{family}': (\n{shades}  ),\n"
+SCSS_MAP_SHADE = '    {shade}: ${family}-{shade},\n'
+
+
+@text_format('scss', 'text/x-scss')
+def render_scss(generator):
+    families = [
+        (identifier(name, '-'), swatches)
+        for name, swatches in generator.swatches.items()
+    ]
+    return SCSS_DOCUMENT.format(
+        variables=''.join(
+            SCSS_VARIABLE.format(family=family, shade=shade, hex=swatch.hex)
+            for family, swatches in families
+            for shade, swatch in swatches.items()
+        ),
+        maps=''.join(
+            SCSS_MAP.format(family=family, shades=''.join(
+                SCSS_MAP_SHADE.format(family=family, shade=shade)
+                for shade in swatches
+            ))
+            for family, swatches in families
+        ),
+    )
+
+
+TAILWIND_DOCUMENT = (
+    "/** @type {{import('tailwindcss').Config}} */\n"
+    'module.exports = {{\n'
+    '  theme: {{\n'
+    '    extend: {{\n'
+    '      colors: {{\n'
+    '{families}'
+    '      }},\n'
+    '    }},\n'
+    '  }},\n'
+    '}};\n'
+)
+TAILWIND_FAMILY = "        '{family}': {{\n{shades}        }},\n"
+TAILWIND_SHADE = "          {shade}: '{hex}',\n"
+
+
+@text_format('js', 'text/javascript')
+def render_tailwind(generator):
+    return TAILWIND_DOCUMENT.format(families=''.join(
+        TAILWIND_FAMILY.format(family=identifier(name, '-'), shades=''.join(
+            TAILWIND_SHADE.format(shade=shade, hex=swatch.hex)
+            for shade, swatch in swatches.items()
+        ))
+        for name, swatches in generator.swatches.items()
+    ))
+
+
+@text_format('json', 'application/json')
+def render_design_tokens(generator):
+    # Design Tokens Community Group format
+    tokens = {
+        'color': {
+            identifier(name, '-'): {
+                str(shade): {'$type': 'color', '$value': swatch.hex}
+                for shade, swatch in swatches.items()
+            }
+            for name, swatches in generator.swatches.items()
+        }
+    }
+    return json.dumps(tokens, indent=2) + '\n'
+
+
+ANDROID_DOCUMENT = (
+    '<?xml version="1.0" encoding="utf-8"?>\n'
+    '<resources>\n'
+    '{colors}'
+    '</resources>\n'
+)
+ANDROID_COLOR = '    <color name="{family}_{shade}">#FF{hex}</color>\n'
+
+
+@text_format('xml', 'application/xml')
+def render_android(generator):
+    return ANDROID_DOCUMENT.format(colors=''.join(
+        ANDROID_COLOR.format(
+            family=identifier(name), shade=shade, hex=swatch.hex[1:].upper()
+        )
+        for name, swatches in generator.swatches.items()
+        for shade, swatch in swatches.items()
+    ))
+
+
+SWIFT_DOCUMENT = (
+    'import SwiftUI\n\n'
+    '// Centralized shared components for theme configuration\n'
+    'enum PaletteComponents {{\n'
+    '{colors}'
+    '}}\n'
+)
+SWIFT_FAMILY = '    // {name}\n{shades}'
+SWIFT_COLOR = (
+    '    static let {constant} = '
+    'Color(red: {red} / 255, green: {green} / 255, blue: {blue} / 255)\n'
+)
+
+
+@text_format('swift', 'text/x-swift')
+def render_swift(generator):
+    return SWIFT_DOCUMENT.format(colors='\n'.join(
+        SWIFT_FAMILY.format(name=name, shades=''.join(
+            SWIFT_COLOR.format(
+                constant=camel_case(name, shade),
+                red=swatch.rgb[0], green=swatch.rgb[1], blue=swatch.rgb[2]
+            )
+            for shade, swatch in swatches.items()
+        ))
+        for name, swatches in generator.swatches.items()
+    ))
@@ -2,20 +2,33 @@
 UI Palette based on HSB brand color
 """
 from django.conf import settings
+import io
 import os
 import shutil
 from pathlib import Path
-from PIL import Image, ImageDraw, ImageFont
 import colorsys
-import openpyxl
-from openpyxl.styles import (
-    PatternFill,
-    Font,
-    Alignment,
-    Color
-    )
-from openpyxl.utils import get_column_letter
-import json
+from concurrent.futures import BrokenExecutor, ProcessPoolExecutor
+from .cache import LRUCache, freeze
+from .engine import build_palettes, palette_swatches
+from .lookup import get_color_tables, pack_hex, pack_rgb
+from .metrics import PALETTE_SECONDS, RENDER_SECONDS
+from .formats import FORMATS
+from .pools import discard_render_pool, get_render_pool
+from .renderer import get_png_renderer, resolve_image_profile
+from .specs import DEFAULT_SPEC
+
+
+# Bump whenever the output of any file writer changes, so stored artifacts
+# from an older generator are never reused
+GENERATOR_VERSION = '1'
+
+# Generated palettes are pure functions of their inputs
+palette_cache = LRUCache('palette', getattr(settings, 'PALETTE_CACHE_SIZE', 1024))
+
+
+def cache_stats():
+    """Hit/miss/eviction counters for the generator caches"""
+    return [palette_cache.stats()] + get_png_renderer().cache_stats()
 
 
 def get_all_palettes():
@@ -52,26 +65,26 @@ def hex_to_rgb(hex):
 
 
 def hex_to_hsb(hex):
+    tables = get_color_tables()
+    if tables is not None:
+        packed = pack_hex(hex)
+        if packed is not None:
+            return tables.hex_to_hsb(packed)
+    return compute_hex_to_hsb(hex)
+
+
+def compute_hex_to_hsb(hex):
     rgb = hex_to_rgb(hex)
     hsb = rgb_to_hsb(rgb)
     hsb = tuple(int(round(x)) for x in hsb)
     return hsb
 
 
-def generate_shades(base_color):
-    h, s, b = base_color
-    shades = {}
-    shades["500"] = base_color
-    shades["100"] = (h, max(0, s - 40), min(b + 50, 100))
-    shades["900"] = (h, min(s + 40, 100), max(b - 70, 0))
-    shades["300"] = (h, max(0, s - 20), min(b + 25, 100))
-    shades["700"] = (h, min(s + 20, 100), max(b - 35, 0))
-    shades["200"] = (h, max(0, s - 30), min(b + 37.5, 100))
-    shades["400"] = (h, max(0, s - 10), min(b + 12.5, 100))
-    shades["600"] = (h, min(s + 10, 100), max(b - 17.5, 0))
-    shades["800"] = (h, min(s + 30, 100), max(b - 52.5, 0))
-    shades = dict(sorted(shades.items(), key=lambda item: int(item[0])))
-    return shades
+def normalize_hex(color):
+    """Normalize a hex color to lowercase '#rrggbb' form, or None if empty"""
+    if not color:
+        return None
+    return '#' + color.strip().strip('#').lower()
 
 
 def brightness(rgb):
@@ -86,6 +99,18 @@ def rgb_to_cmyk(rgb):
     """
     Convert RGB values (0-255) to CMYK values (0-100)
     """
+    tables = get_color_tables()
+    if tables is not None:
+        packed = pack_rgb(rgb)
+        if packed is not None:
+            return tables.rgb_to_cmyk(packed)
+    return compute_rgb_to_cmyk(rgb)
+
+
+def compute_rgb_to_cmyk(rgb):
+    """
+    Compute CMYK values directly, without the lookup table
+    """
     r, g, b = [x / 255.0 for x in rgb]
     
     # Calculate K (black)
@@ -109,56 +134,83 @@ def rgb_to_cmyk(rgb):
     )
 
 
-def generate_palette(primary, secondary=None, tertiary=None):
+def generate_palette(primary, secondary=None, tertiary=None, spec=DEFAULT_SPEC):
+    """
+    Generate a palette, memoized on the normalized input colors and spec.
+    The returned mapping (and each family in it) is read-only.
+    """
+    key = (normalize_hex(primary), normalize_hex(secondary), normalize_hex(tertiary))  # noqa: E501
+    return palette_cache.get_or_compute(
+        key + (spec,), lambda: freeze(compute_palette(*key, spec=spec))
+    )
+
+
+@PALETTE_SECONDS.time()
+def compute_palette(primary, secondary=None, tertiary=None, spec=DEFAULT_SPEC):
+    """
+    Shade every family of the palette described by ``spec`` in one pass
+    """
     primary_hsb = hex_to_hsb(primary)
     secondary_hsb = hex_to_hsb(secondary) if secondary else None
     tertiary_hsb = hex_to_hsb(tertiary) if tertiary else None
-    palette = {}
-    palette["Primary"] = generate_shades(primary_hsb)
-    if secondary_hsb:
-        palette["Secondary"] = generate_shades(secondary_hsb)
-    if tertiary_hsb:
-        palette["Tertiary"] = generate_shades(tertiary_hsb)
-    palette["Neutral"] = generate_shades((primary_hsb[0], 15, 70))
-
-    supporting_colors = {
-        "Green": (134, (primary_hsb[1] - 10), (primary_hsb[2] - 2)),
-        "Orange": (23, (primary_hsb[1] - 10), (primary_hsb[2] - 2)),
-        "Red": (0, (primary_hsb[1] - 10), (primary_hsb[2] - 2)),
-        "Blue": (204, (primary_hsb[1] - 10), (primary_hsb[2] - 2))
-    }
-
-    for color in supporting_colors:
-        palette[color] = generate_shades(supporting_colors[color])
+    families = spec.family_bases(primary_hsb, secondary_hsb, tertiary_hsb)
+    return build_palettes([families], spec.scale)[0]
 
-    # Convert lists to tuples
-    for name, values in palette.items():
-        for shade, hsb in values.items():
-            palette[name][shade] = tuple(hsb)
 
-    return palette
+class FormatRenderError(Exception):
+    """
+    One or more formats failed to render. ``errors`` maps each failed
+    extension to its exception and ``contents`` holds the formats that did
+    render.
+    """
+    def __init__(self, errors, contents=None):
+        self.errors = errors
+        self.contents = contents or {}
+        super().__init__('; '.join(
+            f'{ext}: {error}' for ext, error in errors.items()
+        ))
+
+
+def render_format(name, colors, extension, spec, png_profile):
+    """Render one format of a palette; the task run by process pools"""
+    generator = PaletteGenerator(
+        name, *colors, spec=spec, png_profile=png_profile, generate=False
+    )
+    return generator.render(extension)
 
 
 class PaletteGenerator:
-    def __init__(self, name, primary, secondary=None, tertiary=None, base_dir=None):
+    def __init__(self, name, primary, secondary=None, tertiary=None, base_dir=None, spec=None, formats=None, png_profile=None, generate=True):  # noqa: E501
         self.name = name
         self.primary = primary
         self.secondary = secondary
         self.tertiary = tertiary
+        self.spec = spec or DEFAULT_SPEC
+        self.formats = list(formats) if formats is not None else list(FORMATS)
+        self.png_profile, self.image_profile = resolve_image_profile(png_profile)  # noqa: E501
         self.base_dir = base_dir or os.path.join(settings.MEDIA_ROOT, 'palettes')
         self.output_dir = self.base_dir  # Use the provided base_dir directly
         self.user_data = {}
-
-        # Ensure output directory exists
-        os.makedirs(self.output_dir, exist_ok=True)
+        self.errors = {}
 
         # Generate the color palette
         self.palette = generate_palette(
             self.primary,
             self.secondary,
-            self.tertiary
+            self.tertiary,
+            spec=self.spec
         )
 
+        # Convert every shade to RGB/HEX/CMYK once for all writers
+        self.swatches = palette_swatches(self.palette)
+
+        # With generate=False nothing is written; use render() instead
+        if not generate:
+            return
+
+        # Ensure output directory exists
+        os.makedirs(self.output_dir, exist_ok=True)
+
         # Generate all files
         self.generate_files()
 
@@ -172,17 +224,21 @@ class PaletteGenerator:
             'files': self.get_generated_files()
         }
 
+    def get_file_name(self, extension):
+        """Get the file name for a format; the image profile may change its extension"""  # noqa: E501
+        if extension == 'png':
+            extension = self.image_profile.extension
+        return f'{self.name}-color-palette.{extension}'
+
     def get_output_path(self, extension):
         """Get the full output path for a file with the given extension"""
-        filename = f'{self.name}-color-palette.{extension}'
-        return os.path.join(self.output_dir, filename)
+        return os.path.join(self.output_dir, self.get_file_name(extension))
 
     def get_generated_files(self):
         """Return a list of all generated files with their relative paths"""
-        file_extensions = ['png', 'xlsx', 'css', 'ts', 'dart']
         files = []
 
-        for ext in file_extensions:
+        for ext in FORMATS:
             file_path = self.get_output_path(ext)
             if os.path.exists(file_path):
                 rel_path = os.path.relpath(file_path, settings.MEDIA_ROOT)
@@ -195,206 +251,95 @@ class PaletteGenerator:
         return files
 
     def generate_files(self):
-        self.generate_png_image()
-        self.generate_excel_file()
-        self.generate_css_file()
-        self.generate_typescript_file()
-        self.generate_dart_file()
-
-    def generate_png_image(self):
-        img_width = int(11.69 * 150)
-        img_height = int(8.27 * 150)
-        img = Image.new('RGB', (img_width, img_height), color='white')
-        d = ImageDraw.Draw(img)
-
-        # Use the arial.ttf from the generator directory
-        font_path = os.path.join(os.path.dirname(__file__), 'arial.ttf')
-        font = ImageFont.truetype(font_path, 15)
-        font_bold = ImageFont.truetype(font_path, 16)  # Slightly larger for bold effect
-        total_colors = len(self.palette)
-
-        def draw_rectangle(draw, rgb, cmyk, text_lines, cmyk_text, name, i, j):
-            x1 = j * (img_width // total_colors) + 2
-            y1 = i * (img_height // len(self.palette[name])) + 2
-            x2 = (j + 1) * (img_width // total_colors) - 2
-            y2 = (i + 1) * (img_height // len(self.palette[name])) - 2
-            draw.rectangle([(x1, y1), (x2, y2)], fill=rgb)
-
-            text_color = contrast_color(rgb)
-            
-            # Calculate line height
-            line_height = 18
-            total_height = len(text_lines) * line_height + line_height  # +1 for bold CMYK line
-            start_y = y1 + ((y2 - y1) - total_height) / 2
-            
-            # Draw regular text lines
-            for idx, line in enumerate(text_lines):
-                line_bbox = draw.textbbox((0, 0), line, font=font)
-                line_width = line_bbox[2] - line_bbox[0]
-                text_x = x1 + ((img_width // total_colors) - line_width) / 2
-                text_y = start_y + (idx * line_height)
-                draw.text((text_x, text_y), line, fill=text_color, font=font)
-            
-            # Draw bold CMYK line
-            cmyk_bbox = draw.textbbox((0, 0), cmyk_text, font=font_bold)
-            cmyk_width = cmyk_bbox[2] - cmyk_bbox[0]
-            cmyk_x = x1 + ((img_width // total_colors) - cmyk_width) / 2
-            cmyk_y = start_y + (len(text_lines) * line_height)
-            # Draw text twice with slight offset for bold effect
-            draw.text((cmyk_x, cmyk_y), cmyk_text, fill=text_color, font=font_bold)
-            draw.text((cmyk_x + 0.5, cmyk_y), cmyk_text, fill=text_color, font=font_bold)
-
-            if i == len(self.palette[name]) - 1:
-                name_width, name_height = draw.textbbox(
-                    (0, 0),
-                    name,
-                    font=font
-                    )[2:]
-                name_x = x1 + ((img_width // total_colors) - name_width) / 2
-                name_y = y2 + 5
-                draw.text((name_x, name_y), name, fill=(0, 0, 0), font=font)
-
-        for j, (name, palette) in enumerate(self.palette.items()):
-            for i, shade in enumerate(palette):
-                rgb = hsb_to_rgb(palette[shade])
-                hex_rgb = hsb_to_hex(palette[shade])
-                cmyk = rgb_to_cmyk(rgb)
-                
-                # Prepare text lines (non-bold)
-                text_lines = [
-                    f"Weight - {shade}",
-                    f"HSB - {palette[shade]}",
-                    f"RGB - {rgb}",
-                    f"HEX - {hex_rgb}"
-                ]
-                
-                # CMYK line (will be bold)
-                cmyk_text = f"CMYK - {cmyk}"
-                
-                draw_rectangle(d, rgb, cmyk, text_lines, cmyk_text, name, i, j)
-
-        output_path = self.get_output_path('png')
-        img.save(output_path)
-
-    def generate_excel_file(self):
-        wb = openpyxl.Workbook()
-        ws = wb.active
-
-        shade_row_mapping = {shade: i + 2 for i, shade in enumerate([
-            "100",
-            "200",
-            "300",
-            "400",
-            "500",
-            "600",
-            "700",
-            "800",
-            "900"
-            ])}
-
-        for j, (name, palette) in enumerate(self.palette.items()):
-            ws.column_dimensions[get_column_letter(j + 2)].width = 30
-            ws.cell(row=1, column=j + 2, value=name)
-
-            for shade, hsb in palette.items():
-                ws.row_dimensions[shade_row_mapping[shade]].height = 100
-                rgb = hsb_to_rgb(hsb)
-                hex_rgb = hsb_to_hex(hsb)
-                cmyk = rgb_to_cmyk(rgb)
-                fill = PatternFill(start_color=hex_rgb[1:], end_color=hex_rgb[1:], fill_type="solid")  # noqa: E501
-                cell = ws.cell(row=shade_row_mapping[shade], column=j + 2)
-                cell.fill = fill
-                font_color_rgb = contrast_color(rgb)
-                font_color_rgb_str = f'{font_color_rgb[0]:02X}{font_color_rgb[1]:02X}{font_color_rgb[2]:02X}'  # noqa: E501
-                font_color = Font(color=Color(rgb=font_color_rgb_str))
-                cell.font = font_color
-                alignment = Alignment(horizontal='center', vertical='center', wrap_text=True)  # noqa: E501
-                cell.alignment = alignment
-                cell.value = f"Weight - {shade}\nHSB - {hsb}\nRGB - {rgb}\nHEX - {hex_rgb}\nCMYK - {cmyk}"  # noqa: E501
-
-        output_path = self.get_output_path('xlsx')
-        wb.save(output_path)
-
-    def generate_css_file(self):
-        output_path = self.get_output_path('css')
-        with open(output_path, 'w') as f:
-            f.write('/* EXAMPLE USAGE */\n')
-            f.write('/* .header { */\n')
-            f.write('/* background-color: var(--primary-500); */\n')
-            f.write('/* color: var(--neutral-900); */\n')
-            f.write('/* } */\n\n')
-
-            f.write('/* Button Styles */\n')
-            f.write('/* .button { */\n')
-            f.write('/*   background-color: var(--secondary-500); */\n')
-            f.write('/*   color: var(--neutral-100); */\n')
-            f.write('/* } */\n\n')
-
-            f.write('/* Color Variables */\n')
-            f.write(':root {\n')
-            for name, palette in self.palette.items():
-                for shade, hsb in palette.items():
-                    hex_rgb = hsb_to_hex(hsb)
-                    f.write(f'  --{name.lower()}-{shade}: {hex_rgb};\n')
-            f.write('}\n')
-
-    def generate_dart_file(self):
         """
-        Generate a Dart file compatible with Flutter Material theming
-        Similar structure to TypeScript paletteComponents
+        Write every format, rendered on the configured pool. A format that
+        fails does not stop the others; the failures are kept in ``errors``
+        and the first one is raised once the rest are written
+        """
+        if get_render_pool() is None:
+            errors = {}
+            for ext in self.formats:
+                path = self.get_output_path(ext)
+                try:
+                    with open(path, 'wb') as f:
+                        self.render(ext, stream=f)
+                except Exception as e:
+                    errors[ext] = e
+                    # Don't leave a partial file to be listed as generated
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+        else:
+            contents, errors = self.render_many()
+            for ext, content in contents.items():
+                with open(self.get_output_path(ext), 'wb') as f:
+                    f.write(content)
+        self.errors = errors
+        if errors:
+            raise next(iter(errors.values()))
+
+    def render(self, extension, stream=None):
+        """
+        Render one format without touching the filesystem: written to the
+        binary ``stream`` if given, otherwise returned as bytes
         """
-        output_path = self.get_output_path('dart')
-        with open(output_path, 'w') as f:
-            f.write("import 'package:flutter/material.dart';\n\n")
-            f.write("// Centralized shared components for theme configuration\n")
-            f.write("class PaletteComponents {\n")
-            
-            # Generate color maps for each palette
-            for name, palette in self.palette.items():
-                f.write(f"  static const Map<int, Color> {name.lower()} = {{\n")
-                
-                for shade, hsb in palette.items():
-                    hex_rgb = hsb_to_hex(hsb)
-                    # Flutter Color format requires 0xFF prefix for full opacity
-                    f.write(f"    {shade}: Color(0xFF{hex_rgb[1:].upper()}),\n")
-                
-                f.write("  };\n\n")
-            
-            # Generate MaterialColor swatches for primary colors
-            f.write("  // Material Color Swatches\n")
-            for name in ['primary', 'secondary', 'tertiary']:
-                if name.capitalize() in self.palette:
-                    f.write(f"  static const MaterialColor {name}Swatch = MaterialColor(\n")
-                    f.write(f"    0xFF{hsb_to_hex(self.palette[name.capitalize()]['500'])[1:].upper()},\n")
-                    f.write(f"    {name},\n")
-                    f.write("  );\n\n")
-            
-            f.write("}\n")
-
-    def generate_typescript_file(self):
+        if extension not in FORMATS:
+            raise ValueError(f"Unknown format: {extension}")
+        with RENDER_SECONDS.labels(format=extension).time():
+            if stream is not None:
+                FORMATS[extension].write(self, stream)
+                return stream
+            buffer = io.BytesIO()
+            FORMATS[extension].write(self, buffer)
+            return buffer.getvalue()
+
+    def render_many(self, extensions=None, pool=None):
         """
-        Generate a TypeScript file compatible with MUI theming
-        Similar to frontend/src/themes/paletteComponents.ts
+        Render several formats (the generator's own by default), in parallel
+        on the ``pool`` kind or PALETTE_RENDER_POOL; returns
+        ``({extension: bytes}, {extension: exception})`` so that one failed
+        format does not lose the others
         """
-        output_path = self.get_output_path('ts')
-        with open(output_path, 'w') as f:
-            f.write('// Centralized shared components for theme configuration\n')
-            f.write('const paletteComponents = {\n')
-            
-            # Generate each color palette
-            for idx, (name, palette) in enumerate(self.palette.items()):
-                f.write(f'  {name.lower()}: {{\n')
-                
-                # Write each shade
-                for shade, hsb in palette.items():
-                    hex_rgb = hsb_to_hex(hsb)
-                    f.write(f"    {shade}: '{hex_rgb}',\n")
-                
-                # Close the color object
-                if idx < len(self.palette) - 1:
-                    f.write('  },\n')
-                else:
-                    f.write('  },\n')
-            
-            f.write('};\n\n')
-            f.write('export default paletteComponents;\n')
+        extensions = list(self.formats if extensions is None else extensions)
+        for ext in extensions:
+            if ext not in FORMATS:
+                raise ValueError(f"Unknown format: {ext}")
+        executor = get_render_pool(pool)
+        contents, errors = {}, {}
+
+        if executor is None or len(extensions) < 2:
+            for ext in extensions:
+                try:
+                    contents[ext] = self.render(ext)
+                except Exception as e:
+                    errors[ext] = e
+            return contents, errors
+
+        if isinstance(executor, ProcessPoolExecutor):
+            colors = (self.primary, self.secondary, self.tertiary)
+            futures = {
+                ext: executor.submit(
+                    render_format, self.name, colors, ext, self.spec,
+                    self.png_profile
+                )
+                for ext in extensions
+            }
+        else:
+            futures = {
+                ext: executor.submit(self.render, ext) for ext in extensions
+            }
+        for ext, future in futures.items():
+            try:
+                contents[ext] = future.result()
+            except BrokenExecutor as e:
+                discard_render_pool(executor)
+                errors[ext] = e
+            except Exception as e:
+                errors[ext] = e
+        return contents, errors
+
+    def render_files(self):
+        """Yield ``(file name, bytes)`` for each of the generator's formats"""
+        for ext in self.formats:
+            yield self.get_file_name(ext), self.render(ext)
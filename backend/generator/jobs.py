@@ -0,0 +1,271 @@
+"""
+Database-backed job queue for palette generation.
+
+Saving a palette queues a GenerationJob instead of generating its files in
+the request, and generator workers (``manage.py run_generator_workers``)
+run the jobs, so generation scales apart from the web tier and needs no
+broker. Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any
+number of them can poll the table without waiting on each other, and
+confirm each claim with a conditional update, which keeps it safe on
+databases without row locks too. Only one job of a palette runs at a time;
+one queued by an edit waits for the running one to finish.
+
+A failed job is queued again after an exponential backoff until it has
+been tried PALETTE_JOB_MAX_ATTEMPTS times; then the job fails and the
+palette reports the error. A running job renews its lock at each stage; one
+whose lock is PALETTE_JOB_TIMEOUT seconds old is assumed lost with its
+worker and claimed again, or failed if its attempts are used up, so that a
+palette that kills its worker every time is not retried forever.
+
+Each change of a job is published (see ``progress``), and a running job
+records the stage it has reached, for clients following the palette.
+"""
+import os
+import socket
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .metrics import JOBS
+from .palette_files import generate_palette_files, invalidate_bundle
+from .progress import publish
+
+
+# Upper bound on the retry backoff, in seconds
+MAX_RETRY_DELAY = 600
+
+
+def worker_name():
+    """Identifies this worker process in claimed jobs."""
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    """Seconds to wait before retrying a job that failed ``attempts`` times."""
+    base = getattr(settings, 'PALETTE_JOB_RETRY_DELAY', 5)
+    return min(base * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def enqueue_generation(palette):
+    """
+    Mark a palette as processing and queue generation of its files;
+    returns the job. A job that is still queued is reused, since it will
+    generate whatever the palette holds when it runs.
+    """
+    from .models import GenerationJob, Palette
+
+    # Downloads must not serve files of the palette's previous colors
+    invalidate_bundle(palette)
+
+    with transaction.atomic():
+        # Locking the palette orders this with a running job finishing it,
+        # which then sees the queued job and leaves the palette processing
+        Palette.objects.select_for_update().get(pk=palette.pk)
+        palette.is_processing = True
+        palette.error_message = None
+        palette.save(
+            update_fields=['is_processing', 'error_message', 'updated_at']
+        )
+        # A job being claimed is skipped rather than waited for; it may
+        # have read the palette already, so a new job is queued instead
+        job = palette.generation_jobs.select_for_update(
+            skip_locked=True
+        ).filter(status=GenerationJob.QUEUED).first()
+        if job is None:
+            job = GenerationJob.objects.create(
+                palette=palette, run_after=timezone.now()
+            )
+        publish(palette.pk)
+    return job
+
+
+def fail_job(job, error, message):
+    """
+    Give up on a job whose attempts are used up: record ``error`` on the
+    job and report ``message`` on its palette. Does nothing, returning
+    False, if the job was claimed again since ``job`` was read.
+    """
+    from .models import GenerationJob, Palette
+
+    failed = GenerationJob.objects.filter(
+        pk=job.pk, status=job.status, attempts=job.attempts
+    ).update(
+        status=GenerationJob.FAILED,
+        last_error=error,
+        updated_at=timezone.now()
+    )
+    if not failed:
+        return False
+    JOBS.labels(result='failed').inc()
+    # A palette edited since has a newer job queued, which reports instead
+    Palette.objects.filter(pk=job.palette_id).exclude(
+        generation_jobs__status=GenerationJob.QUEUED
+    ).update(
+        is_processing=False,
+        error_message=message,
+        updated_at=timezone.now()
+    )
+    publish(job.palette_id)
+    return True
+
+
+def claim_job(worker=None):
+    """
+    Claim the next runnable job for ``worker``; None if there is none.
+    A job waits while another job of its palette is running, so that two
+    workers never replace the same palette's files at once.
+    """
+    from .models import GenerationJob, Palette
+
+    worker = worker or worker_name()
+    # Jobs found to be blocked by another job of their palette
+    blocked = set()
+    while True:
+        now = timezone.now()
+        timeout = getattr(settings, 'PALETTE_JOB_TIMEOUT', 300)
+        max_attempts = getattr(settings, 'PALETTE_JOB_MAX_ATTEMPTS', 3)
+        running = GenerationJob.objects.filter(
+            palette_id=OuterRef('palette_id'), status=GenerationJob.RUNNING
+        ).exclude(pk=OuterRef('pk'))
+        runnable = (
+            Q(status=GenerationJob.QUEUED, run_after__lte=now)
+            | Q(status=GenerationJob.RUNNING,
+                locked_at__lt=now - timedelta(seconds=timeout))
+        ) & ~Exists(running)
+        with transaction.atomic():
+            job = GenerationJob.objects.select_for_update(
+                skip_locked=True
+            ).filter(runnable).exclude(pk__in=blocked).order_by(
+                'run_after', 'id'
+            ).first()
+            if job is None:
+                return None
+            # Another worker may be claiming a job of the same palette;
+            # with its row locked, look again once that claim is committed
+            Palette.objects.select_for_update().filter(
+                pk=job.palette_id
+            ).first()
+            if GenerationJob.objects.filter(
+                palette_id=job.palette_id, status=GenerationJob.RUNNING
+            ).exclude(pk=job.pk).exists():
+                blocked.add(job.pk)
+                continue
+            if (job.status == GenerationJob.RUNNING
+                    and job.attempts >= max_attempts):
+                # Its worker was lost on every attempt; don't try again
+                message = (f'Generation did not finish within {timeout} '
+                           f'seconds')
+                if fail_job(job, message, message):
+                    print(f"Generation job {job.pk} failed (attempt "
+                          f"{job.attempts}): {message}")
+                continue
+            claimed = GenerationJob.objects.filter(
+                pk=job.pk, status=job.status, attempts=job.attempts
+            ).update(
+                status=GenerationJob.RUNNING,
+                attempts=F('attempts') + 1,
+                locked_at=now,
+                locked_by=worker,
+                stage='',
+                updated_at=now
+            )
+            if claimed:
+                publish(job.palette_id)
+        # Otherwise another worker got there first; try the next job
+        if claimed:
+            job.refresh_from_db()
+            return job
+
+
+def run_job(job):
+    """
+    Generate the files of a claimed job's palette, then finish the job or
+    schedule its retry; returns True if generation succeeded.
+    """
+    from .models import GenerationJob, Palette
+
+    try:
+        # Waits for an edit being saved, so the files render what it saved
+        with transaction.atomic():
+            palette = Palette.objects.select_for_update().get(
+                pk=job.palette_id
+            )
+    except Palette.DoesNotExist:
+        # Deleted while queued; its jobs went with it
+        return False
+
+    def progress(stage):
+        # Renewing the lock keeps long jobs from being claimed again
+        now = timezone.now()
+        GenerationJob.objects.filter(pk=job.pk).update(
+            stage=stage, locked_at=now, updated_at=now
+        )
+        publish(palette.pk)
+
+    try:
+        generate_palette_files(palette, progress=progress, bundle=True)
+    except Exception as e:
+        error = f'{type(e).__name__}: {e}'
+        max_attempts = getattr(settings, 'PALETTE_JOB_MAX_ATTEMPTS', 3)
+        if job.attempts < max_attempts:
+            JOBS.labels(result='retry').inc()
+            GenerationJob.objects.filter(pk=job.pk).update(
+                status=GenerationJob.QUEUED,
+                run_after=timezone.now() + timedelta(
+                    seconds=retry_delay(job.attempts)
+                ),
+                locked_at=None,
+                locked_by='',
+                stage='',
+                last_error=error,
+                updated_at=timezone.now()
+            )
+            publish(palette.pk)
+        else:
+            fail_job(job, error, str(e))
+        print(f"Generation job {job.pk} failed (attempt {job.attempts}): "
+              f"{error}")
+        return False
+
+    JOBS.labels(result='done').inc()
+    GenerationJob.objects.filter(pk=job.pk).update(
+        status=GenerationJob.DONE,
+        last_error=None,
+        updated_at=timezone.now()
+    )
+    return True
+
+
+def work(poll_interval=None, once=False, stop=None):
+    """
+    Claim and run jobs until ``stop`` (a threading.Event) is set, waiting
+    ``poll_interval`` seconds whenever the queue is empty; with ``once``,
+    return as soon as it is. Returns the number of jobs run.
+    """
+    if poll_interval is None:
+        poll_interval = getattr(settings, 'PALETTE_WORKER_POLL_INTERVAL', 1.0)
+    stop = stop or threading.Event()
+    worker = worker_name()
+    count = 0
+    while not stop.is_set():
+        # Drop connections the database closed while we were idle
+        close_old_connections()
+        try:
+            job = claim_job(worker)
+        except DatabaseError as e:
+            # Keep the worker alive through database restarts and the like
+            print(f"Error claiming generation job: {e}")
+            stop.wait(poll_interval)
+            continue
+        if job is None:
+            if once:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job)
+        count += 1
+    return count
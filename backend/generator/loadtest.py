@@ -0,0 +1,301 @@
+"""
+Load generation for the palette API.
+
+``manage.py loadtest_generator`` runs a number of virtual designers, each a
+thread replaying the traffic scenarios below in a loop, against a running
+server (``--url``) or the WSGI application in this process. Each request is
+timed under an endpoint label, and the run reports throughput, latency
+percentiles and error rates per endpoint.
+
+Threads in one process share the interpreter, so in-process runs show how
+the application behaves under concurrent requests (database locks, cache
+contention, queue latency) rather than what a server can serve. To size
+gunicorn's workers and threads, run the server and point ``--url`` at it.
+"""
+import json
+import math
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.db import connections
+from django.urls import reverse
+
+from .generator import hsb_to_hex
+
+# Seconds between previews while a designer drags a color picker; the
+# frontend debounces its preview requests by about this much
+DEBOUNCE_SECONDS = 0.15
+# Seconds a designer takes between other steps, e.g. before downloading
+THINK_SECONDS = 1.0
+# Seconds to wait for a saved palette's files before giving up on it
+READY_TIMEOUT = 120
+# Seconds each status request waits for a change (long polling)
+STATUS_WAIT = 10
+
+
+class ClientTransport:
+    """Requests to the WSGI application in this process."""
+
+    def __init__(self, token=None):
+        from django.test import Client
+
+        self.client = Client(raise_request_exception=False)
+        self.headers = {}
+        if token:
+            self.headers['HTTP_AUTHORIZATION'] = f'Bearer {token}'
+
+    def request(self, method, path, data=None):
+        """Send a request; returns its status code and body."""
+        response = self.client.generic(
+            method, path, json.dumps(data) if data is not None else '',
+            content_type='application/json', **self.headers
+        )
+        if response.streaming:
+            return response.status_code, b''.join(response.streaming_content)
+        return response.status_code, response.content
+
+
+class HTTPTransport:
+    """Requests to a server at ``base_url``."""
+
+    def __init__(self, base_url, token=None, timeout=60):
+        import requests
+
+        self.base_url = base_url.rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        if token:
+            self.session.headers['Authorization'] = f'Bearer {token}'
+
+    def request(self, method, path, data=None):
+        """Send a request; returns its status code and body."""
+        response = self.session.request(
+            method, self.base_url + path, json=data, timeout=self.timeout
+        )
+        return response.status_code, response.content
+
+
+def percentile(times, percent):
+    """Nearest-rank percentile of sorted ``times``."""
+    rank = math.ceil(percent / 100 * len(times))
+    return times[max(0, rank - 1)]
+
+
+class Recorder:
+    """Request times and errors by endpoint, shared by the virtual users."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.times = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        # Scenarios that raised, by exception type
+        self.failures = Counter()
+
+    def record(self, endpoint, seconds, error=None):
+        """Record a request; ``error`` is its status code or exception."""
+        with self._lock:
+            self.times[endpoint].append(seconds)
+            if error is not None:
+                self.errors[endpoint][str(error)] += 1
+
+    def fail(self, exception):
+        with self._lock:
+            self.failures[type(exception).__name__] += 1
+
+    def summary(self, elapsed):
+        """A row per endpoint over a run of ``elapsed`` seconds."""
+        rows = []
+        with self._lock:
+            for endpoint in sorted(self.times):
+                times = sorted(self.times[endpoint])
+                errors = sum(self.errors[endpoint].values())
+                rows.append({
+                    'endpoint': endpoint,
+                    'requests': len(times),
+                    'errors': errors,
+                    'error_rate': errors / len(times),
+                    'error_kinds': dict(self.errors[endpoint]),
+                    'throughput': len(times) / elapsed if elapsed else 0.0,
+                    'p50_ms': percentile(times, 50) * 1000,
+                    'p95_ms': percentile(times, 95) * 1000,
+                    'p99_ms': percentile(times, 99) * 1000,
+                    'max_ms': times[-1] * 1000,
+                })
+        return rows
+
+
+class VirtualUser:
+    """One simulated designer: a transport, a random source and a clock."""
+
+    def __init__(self, transport, recorder, rng, think_time=1.0, stop=None):
+        self.transport = transport
+        self.recorder = recorder
+        self.rng = rng
+        self.think_time = think_time
+        self.stop = stop or threading.Event()
+
+    def call(self, endpoint, method, path, data=None):
+        """
+        Time a request under ``endpoint``; returns its status code and
+        body, or ``(None, None)`` if it could not be sent.
+        """
+        start = time.perf_counter()
+        try:
+            status, body = self.transport.request(method, path, data)
+        except Exception as e:
+            self.recorder.record(
+                endpoint, time.perf_counter() - start, type(e).__name__
+            )
+            return None, None
+        self.recorder.record(
+            endpoint, time.perf_counter() - start,
+            status if status >= 400 else None
+        )
+        return status, body
+
+    def pause(self, seconds):
+        """Think for ``seconds`` scaled by think_time; returns on stop."""
+        if self.think_time > 0:
+            self.stop.wait(seconds * self.think_time)
+
+    def color(self):
+        return hsb_to_hex((
+            self.rng.uniform(0, 360), self.rng.uniform(30, 90),
+            self.rng.uniform(40, 90)
+        ))
+
+
+def debounced_previews(user):
+    """
+    A designer dragging a color picker: previews a debounce apart as the
+    hue drifts, sometimes ending with the PNG sheet.
+    """
+    hue = user.rng.uniform(0, 360)
+    saturation = user.rng.uniform(30, 90)
+    brightness = user.rng.uniform(40, 90)
+    data = {'secondary': user.color()}
+    for _ in range(user.rng.randint(4, 12)):
+        hue = (hue + user.rng.uniform(-8, 8)) % 360
+        data['primary'] = hsb_to_hex((hue, saturation, brightness))
+        user.call('preview', 'POST', reverse('palette-preview'), data)
+        user.pause(DEBOUNCE_SECONDS)
+        if user.stop.is_set():
+            return
+    if user.rng.random() < 0.25:
+        user.call('preview_png', 'POST', reverse('palette-preview'),
+                  {**data, 'file_format': 'png'})
+    user.pause(THINK_SECONDS)
+
+
+def create_then_download(user):
+    """
+    A designer saving a palette, waiting for its files on the status long
+    poll, then downloading the bundle and one of the files. The wait is
+    recorded as ``time_to_ready``.
+    """
+    status, body = user.call('create', 'POST', reverse('palette-list'), {
+        'name': 'Load test', 'primary': user.color(),
+        'secondary': user.color()
+    })
+    if status != 201:
+        return
+    palette_id = json.loads(body)['id']
+
+    started = time.perf_counter()
+    state = {'status': 'processing', 'cursor': ''}
+    while (state['status'] == 'processing'
+           and time.perf_counter() - started < READY_TIMEOUT):
+        status, body = user.call(
+            'status', 'GET',
+            f"{reverse('palette-status', args=[palette_id])}"
+            f"?wait={STATUS_WAIT}&since={state['cursor']}"
+        )
+        if status != 200:
+            return
+        state = json.loads(body)
+    user.recorder.record(
+        'time_to_ready', time.perf_counter() - started,
+        None if state['status'] == 'completed' else state['status']
+    )
+    if state['status'] != 'completed':
+        return
+
+    user.pause(THINK_SECONDS)
+    user.call('download_bundle', 'GET',
+              reverse('palette-download', args=[palette_id]))
+    status, body = user.call('detail', 'GET',
+                             reverse('palette-detail', args=[palette_id]))
+    if status != 200:
+        return
+    files = json.loads(body)['files']
+    if files:
+        file = user.rng.choice(files)
+        user.call('download_file', 'GET',
+                  reverse('palette-files-download', args=[file['id']]))
+    user.pause(THINK_SECONDS)
+
+
+def anonymous_download(user):
+    """A visitor downloading a palette without saving it."""
+    user.call('download_anonymous', 'POST',
+              reverse('palette-download-anonymous'), {
+                  'name': 'Load test', 'primary': user.color(),
+                  'secondary': user.color()
+              })
+    user.pause(THINK_SECONDS)
+
+
+# Scenarios and their weights by traffic mix. Designers mostly tweak colors;
+# fewer save palettes, and some visitors download without an account
+MIXES = {
+    'mixed': [(debounced_previews, 7), (create_then_download, 1),
+              (anonymous_download, 2)],
+    'preview': [(debounced_previews, 1)],
+    'create_download': [(create_then_download, 1)],
+    'anonymous': [(anonymous_download, 1)],
+}
+
+
+def run_load(make_transport, scenarios, users=20, duration=30.0,
+             think_time=1.0, ramp_up=0.0, seed=0):
+    """
+    Run ``users`` virtual users, each picking weighted ``scenarios`` in a
+    loop with its own transport from ``make_transport()``, for ``duration``
+    seconds. Users start spread over ``ramp_up`` seconds, and finish the
+    scenario they are in when time is up. Returns the ``Recorder`` and the
+    seconds the run took.
+    """
+    recorder = Recorder()
+    stop = threading.Event()
+    functions = [function for function, _ in scenarios]
+    weights = [weight for _, weight in scenarios]
+
+    def run_user(index):
+        try:
+            if stop.wait(ramp_up * index / users):
+                return
+            user = VirtualUser(make_transport(), recorder,
+                               random.Random(seed + index), think_time, stop)
+            while not stop.is_set():
+                scenario = user.rng.choices(functions, weights)[0]
+                try:
+                    scenario(user)
+                except Exception as e:
+                    recorder.fail(e)
+        finally:
+            connections.close_all()
+
+    threads = [
+        threading.Thread(target=run_user, args=(index,), daemon=True)
+        for index in range(users)
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    stop.wait(duration)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return recorder, time.perf_counter() - start
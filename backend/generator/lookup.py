@@ -0,0 +1,173 @@
+"""
+Precomputed color lookup tables shared across worker processes.
+
+The tables cover the whole 24-bit RGB space and are built once with
+``manage.py build_color_tables``. Each worker maps the files with ``mmap`` so
+every process on a host reads the same page-cache copy. When the tables are
+missing the generator falls back to computing conversions directly.
+"""
+import mmap
+import os
+import struct
+import threading
+
+import numpy as np
+from django.conf import settings
+
+
+TABLE_VERSION = 1
+COLOR_COUNT = 1 << 24
+
+HSB_TABLE = f'hex_hsb.v{TABLE_VERSION}.bin'
+CMYK_TABLE = f'rgb_cmyk.v{TABLE_VERSION}.bin'
+
+# hex -> rounded HSB: hue 0-360 needs 16 bits, saturation and brightness 8
+HSB_DTYPE = np.dtype([('h', '<u2'), ('s', 'u1'), ('b', 'u1')])
+# rgb -> CMYK: four 0-100 percentages
+CMYK_DTYPE = np.dtype([('c', 'u1'), ('m', 'u1'), ('y', 'u1'), ('k', 'u1')])
+
+_HSB_STRUCT = struct.Struct('<HBB')
+_CMYK_STRUCT = struct.Struct('BBBB')
+
+_lock = threading.Lock()
+_tables = None
+_loaded = False
+
+
+def table_dir():
+    """Directory holding the lookup table files."""
+    return getattr(settings, 'COLOR_TABLE_DIR', None)
+
+
+class ColorTables:
+    """
+    Read-only, memory-mapped views of the hex->HSB and RGB->CMYK tables.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._hsb_map = self._map(HSB_TABLE, HSB_DTYPE)
+        self._cmyk_map = self._map(CMYK_TABLE, CMYK_DTYPE)
+        self.hsb = np.frombuffer(self._hsb_map, dtype=HSB_DTYPE)
+        self.cmyk = np.frombuffer(self._cmyk_map, dtype=CMYK_DTYPE)
+
+    def _map(self, filename, dtype):
+        path = os.path.join(self.directory, filename)
+        expected = COLOR_COUNT * dtype.itemsize
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size != expected:
+                raise ValueError(f"{path} is not a complete color table")
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def hex_to_hsb(self, packed):
+        """Rounded HSB tuple for a packed 0xRRGGBB integer."""
+        return _HSB_STRUCT.unpack_from(self._hsb_map, packed * 4)
+
+    def rgb_to_cmyk(self, packed):
+        """CMYK tuple for a packed 0xRRGGBB integer."""
+        return _CMYK_STRUCT.unpack_from(self._cmyk_map, packed * 4)
+
+    def hsb_array(self, packed):
+        """(N, 3) rounded HSB array for an array of packed colors."""
+        rows = self.hsb[packed]
+        return np.stack(
+            [rows['h'], rows['s'], rows['b']], axis=1
+        ).astype(np.int64)
+
+    def cmyk_array(self, packed):
+        """(N, 4) CMYK array for an array of packed colors."""
+        rows = self.cmyk[packed]
+        return np.stack(
+            [rows['c'], rows['m'], rows['y'], rows['k']], axis=1
+        ).astype(np.int64)
+
+
+def get_color_tables():
+    """
+    Return the process-wide ColorTables, or None when no tables are built.
+    The files are mapped on first use.
+    """
+    global _tables, _loaded
+    if _loaded:
+        return _tables
+    with _lock:
+        if not _loaded:
+            directory = table_dir()
+            try:
+                _tables = ColorTables(directory) if directory else None
+            except (OSError, ValueError):
+                _tables = None
+            _loaded = True
+    return _tables
+
+
+def reset_color_tables():
+    """Forget the mapped tables so the next lookup reloads them."""
+    global _tables, _loaded
+    with _lock:
+        _tables = None
+        _loaded = False
+
+
+def pack_hex(hex):
+    """Packed 0xRRGGBB integer for a ``#rrggbb`` string, or None."""
+    digits = hex.strip('#')
+    if len(digits) != 6:
+        return None
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+
+def pack_rgb(rgb):
+    """Packed 0xRRGGBB integer for an in-gamut int RGB triple, or None."""
+    r, g, b = rgb
+    if not all(type(c) is int and 0 <= c <= 255 for c in (r, g, b)):
+        return None
+    return (r << 16) | (g << 8) | b
+
+
+def build_tables(directory, chunk_size=1 << 20):
+    """
+    Compute both tables for all 16.7M colors and write them to ``directory``.
+    Files are written to a temporary name and swapped in atomically, so
+    running workers keep their existing mapping.
+    """
+    os.makedirs(directory, exist_ok=True)
+    targets = (
+        (HSB_TABLE, HSB_DTYPE, _hsb_chunk),
+        (CMYK_TABLE, CMYK_DTYPE, _cmyk_chunk),
+    )
+    for filename, dtype, chunk in targets:
+        path = os.path.join(directory, filename)
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'wb') as f:
+            for start in range(0, COLOR_COUNT, chunk_size):
+                stop = min(start + chunk_size, COLOR_COUNT)
+                packed = np.arange(start, stop, dtype=np.int64)
+                rgb = np.stack(
+                    [packed >> 16, (packed >> 8) & 0xFF, packed & 0xFF],
+                    axis=1,
+                )
+                f.write(chunk(rgb, dtype))
+        os.replace(tmp_path, path)
+    reset_color_tables()
+
+
+def _hsb_chunk(rgb, dtype):
+    from .engine import rgb_to_hsb_array
+
+    hsb = np.round(rgb_to_hsb_array(rgb)).astype(np.int64)
+    rows = np.empty(len(rgb), dtype=dtype)
+    rows['h'], rows['s'], rows['b'] = hsb[:, 0], hsb[:, 1], hsb[:, 2]
+    return rows.tobytes()
+
+
+def _cmyk_chunk(rgb, dtype):
+    from .engine import compute_cmyk_array
+
+    cmyk = compute_cmyk_array(rgb)
+    rows = np.empty(len(rgb), dtype=dtype)
+    rows['c'], rows['m'], rows['y'], rows['k'] = cmyk.T
+    return rows.tobytes()
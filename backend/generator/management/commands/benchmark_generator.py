@@ -0,0 +1,121 @@
+"""
+Django command to run the palette generator benchmarks
+"""
+import json
+from contextlib import ExitStack
+
+from django.core.management.base import BaseCommand, CommandError
+
+from generator.benchmarks import (
+    BENCHMARKS,
+    DEFAULT_THRESHOLD,
+    benchmark_database,
+    compare_results,
+    results_document,
+)
+
+
+class Command(BaseCommand):
+    """Time the generator's hot paths and print the results."""
+
+    help = 'Run palette generator benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'benchmarks',
+            nargs='*',
+            help=f'Benchmarks to run (default: {", ".join(BENCHMARKS)})',
+        )
+        parser.add_argument(
+            '--number',
+            type=int,
+            default=100,
+            help='Calls per timing repeat',
+        )
+        parser.add_argument(
+            '--json',
+            metavar='PATH',
+            help='Write the results to PATH as JSON',
+        )
+        parser.add_argument(
+            '--compare',
+            metavar='PATH',
+            help='Compare the results with a baseline saved by --json and '
+                 'fail on regressions',
+        )
+        parser.add_argument(
+            '--threshold',
+            type=float,
+            default=DEFAULT_THRESHOLD,
+            help='Slowdown, as a fraction of the baseline time, reported '
+                 f'as a regression (default: {DEFAULT_THRESHOLD})',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        names = options['benchmarks'] or list(BENCHMARKS)
+        unknown = [name for name in names if name not in BENCHMARKS]
+        if unknown:
+            raise CommandError(f'Unknown benchmark(s): {", ".join(unknown)}')
+
+        baseline = None
+        if options['compare']:
+            try:
+                with open(options['compare']) as f:
+                    baseline = json.load(f)['results']
+            except (OSError, ValueError, KeyError) as e:
+                raise CommandError(f'Cannot read baseline: {e}')
+
+        results = {}
+        with ExitStack() as stack:
+            if any(BENCHMARKS[name].database for name in names):
+                stack.enter_context(benchmark_database())
+            for name in names:
+                self.stdout.write(self.style.MIGRATE_HEADING(name))
+                results[name] = BENCHMARKS[name](number=options['number'])
+                for row in results[name]:
+                    self.stdout.write(self.format_row(row))
+
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump(
+                    results_document(results, options['number']), f,
+                    indent=2
+                )
+            self.stdout.write(f'Results written to {options["json"]}')
+
+        if baseline is not None:
+            self.compare(baseline, results, options['threshold'])
+
+    def format_row(self, row):
+        if 'skipped' in row:
+            return f'  {row["case"]:<40} skipped: {row["skipped"]}'
+        extra = ', '.join(
+            f'{key}={value}' for key, value in row.items()
+            if key not in ('case', 'time_us')
+        )
+        line = f'  {row["case"]:<40} {row["time_us"]:>12.3f} us'
+        return f'{line}  ({extra})' if extra else line
+
+    def compare(self, baseline, results, threshold):
+        rows = compare_results(baseline, results, threshold)
+        self.stdout.write(self.style.MIGRATE_HEADING('Compared to baseline'))
+        styles = {
+            'regression': self.style.ERROR,
+            'improvement': self.style.SUCCESS,
+            'ok': str,
+        }
+        for row in rows:
+            case = f'{row["benchmark"]}/{row["case"]}'
+            self.stdout.write(styles[row['status']](
+                f'  {case:<50} {row["baseline_us"]:>12.3f} -> '
+                f'{row["time_us"]:>12.3f} us {row["change"]:>+8.1%}  '
+                f'{row["status"]}'
+            ))
+
+        regressions = [row for row in rows if row['status'] == 'regression']
+        if regressions:
+            raise CommandError(
+                f'{len(regressions)} case(s) slower than the baseline by '
+                f'more than {threshold:.0%}'
+            )
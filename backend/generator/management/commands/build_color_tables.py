@@ -0,0 +1,55 @@
+"""
+Django command to build the precomputed color lookup tables
+"""
+import os
+import time
+
+from django.core.management.base import BaseCommand
+
+from generator import lookup
+
+
+class Command(BaseCommand):
+    """Build the hex->HSB and RGB->CMYK tables used by the generator."""
+
+    help = 'Build the memory-mapped color lookup tables.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output',
+            help='Directory to write the tables to (default: COLOR_TABLE_DIR)',
+        )
+        parser.add_argument(
+            '--skip-existing',
+            action='store_true',
+            help='Do nothing if complete tables already exist',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        directory = options['output'] or lookup.table_dir()
+        if not directory:
+            self.stderr.write('COLOR_TABLE_DIR is not configured.')
+            return
+
+        if options['skip_existing']:
+            try:
+                lookup.ColorTables(directory)
+            except (OSError, ValueError):
+                pass
+            else:
+                self.stdout.write(f'Color tables already in {directory}')
+                return
+
+        self.stdout.write(f'Building color tables in {directory}...')
+        started = time.perf_counter()
+        lookup.build_tables(directory)
+        elapsed = time.perf_counter() - started
+
+        size = sum(
+            os.path.getsize(os.path.join(directory, name))
+            for name in (lookup.HSB_TABLE, lookup.CMYK_TABLE)
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Color tables built ({size / 2**20:.0f} MiB) in {elapsed:.1f}s'
+        ))
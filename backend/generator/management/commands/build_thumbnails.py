@@ -0,0 +1,55 @@
+"""
+Django command to render missing palette thumbnails
+"""
+from django.core.management.base import BaseCommand
+
+from generator.models import Palette
+from generator.thumbnails import (
+    ensure_thumbnail,
+    prune_thumbnails,
+    thumbnail_exists,
+    thumbnail_key,
+)
+
+
+class Command(BaseCommand):
+    """Render the thumbnails of stored palettes that have none."""
+
+    help = ('Render thumbnails for stored palettes saved before they '
+            'existed, and optionally delete unused ones.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--prune',
+            action='store_true',
+            help='Also delete thumbnails no stored palette uses, including '
+                 'those of older generator versions',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        keys = set()
+        rendered = 0
+        colors = Palette.objects.values_list(
+            'primary', 'secondary', 'tertiary'
+        ).iterator(chunk_size=2000)
+        for primary, secondary, tertiary in colors:
+            key = thumbnail_key(primary, secondary, tertiary)
+            if key is None or key in keys:
+                continue
+            keys.add(key)
+            if thumbnail_exists(key):
+                continue
+            try:
+                ensure_thumbnail(primary, secondary, tertiary)
+            except (OSError, ValueError) as e:
+                self.stderr.write(f'Error rendering thumbnail {key}: {e}')
+                continue
+            rendered += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {rendered} of {len(keys)} palette thumbnail(s)'
+        ))
+
+        if options['prune']:
+            removed = prune_thumbnails(keys)
+            self.stdout.write(f'Deleted {removed} unused thumbnail(s)')
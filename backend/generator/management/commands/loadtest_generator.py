@@ -0,0 +1,217 @@
+"""
+Django command to load test the palette API
+"""
+import json
+import shutil
+import tempfile
+import threading
+from contextlib import ExitStack
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import override_settings
+from django.utils import timezone
+
+from generator import jobs
+from generator.benchmarks import benchmark_database, ensure_file_types
+from generator.loadtest import (
+    MIXES,
+    ClientTransport,
+    HTTPTransport,
+    run_load,
+)
+
+
+def run_worker(stop):
+    """Work the queue on this thread until ``stop`` is set."""
+    try:
+        jobs.work(poll_interval=0.1, stop=stop)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    """Replay designer traffic and report latency by endpoint."""
+
+    help = ('Load test the palette API with concurrent virtual users, '
+            'in this process or against a running server.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--url',
+            help='Base URL of a running server, e.g. http://localhost:8000 '
+                 '(default: the application in this process, on a '
+                 'throwaway test database)',
+        )
+        parser.add_argument(
+            '--token',
+            help='Access token of the user saving palettes on --url',
+        )
+        parser.add_argument(
+            '--mix',
+            choices=list(MIXES),
+            default='mixed',
+            help='Traffic mix to replay (default: mixed)',
+        )
+        parser.add_argument(
+            '--users',
+            type=int,
+            default=20,
+            help='Concurrent virtual users',
+        )
+        parser.add_argument(
+            '--duration',
+            type=float,
+            default=30.0,
+            help='Seconds to run for',
+        )
+        parser.add_argument(
+            '--ramp-up',
+            type=float,
+            default=0.0,
+            help='Seconds over which to start the users',
+        )
+        parser.add_argument(
+            '--think-time',
+            type=float,
+            default=1.0,
+            help='Scale of the pauses between a user\'s requests; 0 sends '
+                 'them back to back',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Generator worker threads for queued palettes, in process',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=0,
+            help='Seed of the users\' random colors and choices',
+        )
+        parser.add_argument(
+            '--json',
+            metavar='PATH',
+            help='Write the results to PATH as JSON',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        users = options['users']
+        if users < 1:
+            raise CommandError('--users must be at least 1')
+        url = options['url']
+        needs_token = options['mix'] in ('mixed', 'create_download')
+        if url and needs_token and not options['token']:
+            raise CommandError(
+                f'--token is required for the {options["mix"]} mix with --url'
+            )
+
+        with ExitStack() as stack:
+            if url:
+                def make_transport():
+                    return HTTPTransport(url, options['token'])
+            else:
+                token = self.set_up_in_process(stack, options['workers'])
+
+                def make_transport():
+                    return ClientTransport(token)
+
+            self.stdout.write(
+                f'Running {users} user(s) of the {options["mix"]} mix for '
+                f'{options["duration"]:g}s against {url or "this process"}...'
+            )
+            recorder, elapsed = run_load(
+                make_transport, MIXES[options['mix']], users=users,
+                duration=options['duration'],
+                think_time=options['think_time'],
+                ramp_up=options['ramp_up'], seed=options['seed']
+            )
+
+        rows = recorder.summary(elapsed)
+        self.report(rows, recorder.failures, elapsed)
+        if options['json']:
+            with open(options['json'], 'w') as f:
+                json.dump({
+                    'meta': {
+                        'created_at': timezone.now().isoformat(),
+                        'target': url or 'in-process',
+                        'mix': options['mix'],
+                        'users': users,
+                        'duration': options['duration'],
+                        'think_time': options['think_time'],
+                        'elapsed': elapsed,
+                    },
+                    'endpoints': rows,
+                    'failures': dict(recorder.failures),
+                }, f, indent=2)
+            self.stdout.write(f'Results written to {options["json"]}')
+
+    def set_up_in_process(self, stack, workers):
+        """
+        Serve the load from a throwaway database and media directory, with
+        generator workers on threads if palettes are queued; returns the
+        access token of the user saving palettes.
+        """
+        from django.contrib.auth import get_user_model
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        stack.enter_context(benchmark_database(threaded=True))
+        media_root = tempfile.mkdtemp(prefix='palette_loadtest_')
+        stack.callback(shutil.rmtree, media_root, ignore_errors=True)
+        stack.enter_context(override_settings(MEDIA_ROOT=media_root))
+
+        ensure_file_types()
+        user = get_user_model().objects.create_user(
+            email='loadtest@example.com', first_name='Load',
+            last_name='Test', password='loadtest-only'
+        )
+
+        if settings.PALETTE_GENERATION_QUEUE and workers > 0:
+            stop = threading.Event()
+            threads = [
+                threading.Thread(target=run_worker, args=(stop,), daemon=True)
+                for _ in range(workers)
+            ]
+            for thread in threads:
+                thread.start()
+
+            def stop_workers():
+                stop.set()
+                for thread in threads:
+                    thread.join()
+
+            stack.callback(stop_workers)
+        return str(AccessToken.for_user(user))
+
+    def report(self, rows, failures, elapsed):
+        total = sum(row['requests'] for row in rows
+                    if row['endpoint'] != 'time_to_ready')
+        self.stdout.write(self.style.MIGRATE_HEADING(
+            f'{total} requests in {elapsed:.1f}s '
+            f'({total / elapsed:.1f}/s)'
+        ))
+        self.stdout.write(
+            f'  {"endpoint":<20} {"requests":>9} {"errors":>8} {"req/s":>8} '
+            f'{"p50 ms":>9} {"p95 ms":>9} {"p99 ms":>9} {"max ms":>9}'
+        )
+        for row in rows:
+            line = (
+                f'  {row["endpoint"]:<20} {row["requests"]:>9} '
+                f'{row["error_rate"]:>8.1%} {row["throughput"]:>8.2f} '
+                f'{row["p50_ms"]:>9.1f} {row["p95_ms"]:>9.1f} '
+                f'{row["p99_ms"]:>9.1f} {row["max_ms"]:>9.1f}'
+            )
+            if row['errors']:
+                kinds = ', '.join(
+                    f'{kind}: {count}'
+                    for kind, count in sorted(row['error_kinds'].items())
+                )
+                line = self.style.ERROR(f'{line}  ({kinds})')
+            self.stdout.write(line)
+        for kind, count in sorted(failures.items()):
+            self.stdout.write(self.style.ERROR(
+                f'  {count} scenario(s) failed with {kind}'
+            ))
@@ -0,0 +1,119 @@
+"""
+Django command to run palette generation workers
+"""
+import multiprocessing
+import signal
+import threading
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from generator import jobs, metrics
+
+
+def run_worker(poll_interval, once):
+    """Work the queue in this process until SIGTERM or SIGINT."""
+    stop = threading.Event()
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *args: stop.set())
+    jobs.work(poll_interval=poll_interval, once=once, stop=stop)
+
+
+class Command(BaseCommand):
+    """Process queued palette generation jobs."""
+
+    help = 'Run workers that generate palette files from the job queue.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--processes',
+            type=int,
+            default=getattr(settings, 'PALETTE_WORKER_PROCESSES', 1),
+            help='Number of worker processes (default: '
+                 'PALETTE_WORKER_PROCESSES)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=None,
+            help='Seconds to wait when the queue is empty (default: '
+                 'PALETTE_WORKER_POLL_INTERVAL)',
+        )
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of waiting for jobs',
+        )
+        parser.add_argument(
+            '--metrics-port',
+            type=int,
+            default=None,
+            help='Serve the workers\' Prometheus metrics on this port',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        processes = max(1, options['processes'])
+        poll_interval = options['poll_interval']
+        once = options['once']
+        self.stdout.write(f'Starting {processes} generator worker(s)...')
+
+        if options['metrics_port']:
+            from prometheus_client import start_http_server
+
+            # Counts left by an earlier run would be added to ours
+            metrics.reset_multiprocess_dir()
+            start_http_server(
+                options['metrics_port'], registry=metrics.process_registry()
+            )
+
+        if processes == 1:
+            run_worker(poll_interval, once)
+            self.stdout.write(self.style.SUCCESS('Generator worker stopped'))
+            return
+
+        # Children must not share the parent's database connections
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+
+        def start():
+            worker = context.Process(
+                target=run_worker, args=(poll_interval, once), daemon=True
+            )
+            worker.start()
+            return worker
+
+        stopping = threading.Event()
+
+        def stop(*args):
+            stopping.set()
+            for worker in workers:
+                if worker.is_alive():
+                    worker.terminate()
+
+        workers = [start() for _ in range(processes)]
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, stop)
+
+        # Replace workers that die unexpectedly until asked to stop
+        while not stopping.is_set():
+            for i, worker in enumerate(workers):
+                worker.join(timeout=1 / processes)
+                if worker.is_alive() or stopping.is_set():
+                    continue
+                metrics.mark_process_dead(worker.pid)
+                if once and worker.exitcode == 0:
+                    continue
+                self.stderr.write(
+                    f'Generator worker {worker.pid} exited with code '
+                    f'{worker.exitcode}; restarting'
+                )
+                workers[i] = start()
+            if once and not any(worker.is_alive() for worker in workers):
+                break
+
+        for worker in workers:
+            worker.join()
+            metrics.mark_process_dead(worker.pid)
+        self.stdout.write(self.style.SUCCESS('Generator workers stopped'))
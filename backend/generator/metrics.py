@@ -0,0 +1,196 @@
+"""
+Prometheus metrics for palette generation and the API.
+
+The metrics below are updated where the work happens: format renders,
+palette shading, stored artifacts, zip bundles, cache lookups, generation
+jobs and API requests (``MetricsMiddleware``). ``/metrics`` serves them in
+the Prometheus text format along with the job queue's depth, read from the
+database at each scrape.
+
+Gunicorn and ``run_generator_workers`` run several processes, each with its
+own counters. With PROMETHEUS_MULTIPROC_DIR set in their environment, every
+process writes its metrics to files in that directory and a scrape adds up
+the files of all of them, so any worker can answer for the whole server.
+The directory is cleared when the server starts (see ``gunicorn.conf.py``)
+and the live gauges of a process are dropped when it exits.
+"""
+import glob
+import hmac
+import os
+import time
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils import timezone
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+
+MULTIPROC_DIR = os.environ.get('PROMETHEUS_MULTIPROC_DIR')
+if MULTIPROC_DIR:
+    # Metrics without labels write their file as soon as they are defined
+    os.makedirs(MULTIPROC_DIR, exist_ok=True)
+
+# Bucket bounds for file sizes, in bytes
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+RENDER_SECONDS = Histogram(
+    'palgen_render_seconds',
+    'Time to render one palette file format',
+    ['format']
+)
+PALETTE_SECONDS = Histogram(
+    'palgen_palette_compute_seconds',
+    'Time to compute the shades of a palette not found in the cache'
+)
+CACHE_LOOKUPS = Counter(
+    'palgen_cache_lookups',
+    'Generator cache lookups by cache and result (hit or miss)',
+    ['cache', 'result']
+)
+ARTIFACT_BYTES = Histogram(
+    'palgen_artifact_bytes',
+    'Size of each palette file stored as an artifact',
+    ['format'],
+    buckets=SIZE_BUCKETS
+)
+BUNDLE_SECONDS = Histogram(
+    'palgen_bundle_seconds',
+    'Time to write a palette zip bundle'
+)
+BUNDLE_BYTES = Histogram(
+    'palgen_bundle_bytes',
+    'Size of each palette zip bundle written',
+    buckets=SIZE_BUCKETS
+)
+GENERATION_SECONDS = Histogram(
+    'palgen_generation_seconds',
+    'Time to generate the files of a saved palette'
+)
+GENERATIONS_IN_PROGRESS = Gauge(
+    'palgen_generations_in_progress',
+    'Palettes whose files are being generated',
+    multiprocess_mode='livesum'
+)
+JOBS = Counter(
+    'palgen_generation_jobs_run',
+    'Generation jobs run by outcome (done, retry or failed)',
+    ['result']
+)
+REQUEST_SECONDS = Histogram(
+    'palgen_request_seconds',
+    'API response time by URL name, method and status code',
+    ['view', 'method', 'status']
+)
+
+
+class QueueCollector:
+    """The generation job queue, read from the database at each scrape."""
+
+    def collect(self):
+        from .models import GenerationJob
+
+        jobs = GaugeMetricFamily(
+            'palgen_generation_jobs',
+            'Generation jobs by status (done jobs are not counted)',
+            labels=['status']
+        )
+        oldest = GaugeMetricFamily(
+            'palgen_generation_queue_oldest_seconds',
+            'Seconds the oldest runnable queued job has been waiting'
+        )
+        counts = dict.fromkeys(
+            [GenerationJob.QUEUED, GenerationJob.RUNNING,
+             GenerationJob.FAILED], 0
+        )
+        for status in GenerationJob.objects.exclude(
+            status=GenerationJob.DONE
+        ).values_list('status', flat=True):
+            counts[status] += 1
+        for status, count in counts.items():
+            jobs.add_metric([status], count)
+
+        now = timezone.now()
+        first = GenerationJob.objects.filter(
+            status=GenerationJob.QUEUED, run_after__lte=now
+        ).order_by('run_after').values_list('run_after', flat=True).first()
+        oldest.add_metric([], (now - first).total_seconds() if first else 0)
+        return [jobs, oldest]
+
+
+def process_registry():
+    """Registry holding the metrics of every process, or of this one."""
+    if not MULTIPROC_DIR:
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def reset_multiprocess_dir():
+    """
+    Delete the metric files left by earlier processes, before a server
+    starts its workers; this process's own files are kept.
+    """
+    if not MULTIPROC_DIR:
+        return
+    own = f'_{os.getpid()}.db'
+    for path in glob.glob(os.path.join(MULTIPROC_DIR, '*.db')):
+        if not path.endswith(own):
+            os.remove(path)
+
+
+def mark_process_dead(pid):
+    """Drop the live gauges of a worker process that has exited."""
+    if MULTIPROC_DIR:
+        multiprocess.mark_process_dead(pid, MULTIPROC_DIR)
+
+
+class MetricsMiddleware:
+    """Time each request by the name of the URL it resolved to."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        response = self.get_response(request)
+        match = request.resolver_match
+        REQUEST_SECONDS.labels(
+            view=match.view_name if match else 'unmatched',
+            method=request.method,
+            status=response.status_code
+        ).observe(time.perf_counter() - start)
+        return response
+
+
+def metrics_view(request):
+    """
+    Serve the metrics in the Prometheus text format. With METRICS_TOKEN
+    set, scrapers must send it as a bearer token.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', '')
+    if token:
+        expected = f'Bearer {token}'
+        given = request.headers.get('Authorization', '')
+        if not hmac.compare_digest(given.encode(), expected.encode()):
+            return HttpResponse(status=401)
+
+    output = generate_latest(process_registry())
+    queue = CollectorRegistry()
+    queue.register(QueueCollector())
+    try:
+        output += generate_latest(queue)
+    except Exception as e:
+        # Serve the process metrics even while the database is down
+        print(f"Error collecting generation queue metrics: {e}")
+    return HttpResponse(output, content_type=CONTENT_TYPE_LATEST)
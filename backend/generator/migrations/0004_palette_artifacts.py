@@ -0,0 +1,37 @@
+# Generated by Django 5.1.15 on 2026-10-18 03:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0003_remove_palettefiletype_folder_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PaletteArtifact',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('digest', models.CharField(max_length=64, unique=True)),
+                ('file_extension', models.CharField(max_length=10)),
+                ('file_path', models.CharField(max_length=512)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Palette Artifact',
+                'verbose_name_plural': 'Palette Artifacts',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.AddField(
+            model_name='palettefile',
+            name='artifact',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='palette_files', to='generator.paletteartifact'),
+        ),
+    ]
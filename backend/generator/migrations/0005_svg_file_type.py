@@ -0,0 +1,28 @@
+from django.db import migrations
+
+
+def add_svg_file_type(apps, schema_editor):
+    PaletteFileType = apps.get_model('generator', 'PaletteFileType')
+    PaletteFileType.objects.get_or_create(
+        file_extension='svg',
+        defaults={
+            'name': 'SVG',
+            'description': 'Vector palette sheet',
+        }
+    )
+
+
+def remove_svg_file_type(apps, schema_editor):
+    PaletteFileType = apps.get_model('generator', 'PaletteFileType')
+    PaletteFileType.objects.filter(file_extension='svg').delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0004_palette_artifacts'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_svg_file_type, remove_svg_file_type),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+
+FILE_TYPES = [
+    ('scss', 'SCSS', 'Sass variables and color maps'),
+    ('js', 'Tailwind', 'Tailwind CSS theme colors'),
+    ('json', 'Design Tokens', 'Design tokens (JSON)'),
+    ('xml', 'Android', 'Android color resources'),
+    ('swift', 'Swift', 'SwiftUI color constants'),
+]
+
+
+def add_token_file_types(apps, schema_editor):
+    PaletteFileType = apps.get_model('generator', 'PaletteFileType')
+    for extension, name, description in FILE_TYPES:
+        PaletteFileType.objects.get_or_create(
+            file_extension=extension,
+            defaults={'name': name, 'description': description}
+        )
+
+
+def remove_token_file_types(apps, schema_editor):
+    PaletteFileType = apps.get_model('generator', 'PaletteFileType')
+    PaletteFileType.objects.filter(
+        file_extension__in=[extension for extension, _, _ in FILE_TYPES]
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0005_svg_file_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_token_file_types, remove_token_file_types),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 04:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0006_token_file_types'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='palette',
+            name='bundle_path',
+            field=models.CharField(blank=True, max_length=512, null=True),
+        ),
+        migrations.AddField(
+            model_name='palette',
+            name='bundle_size',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+    ]
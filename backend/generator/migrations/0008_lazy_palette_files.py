@@ -0,0 +1,23 @@
+# Generated by Django 5.1.15 on 2026-10-18 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0007_palette_bundle'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='palette',
+            name='png_profile',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+        migrations.AddField(
+            model_name='palettefile',
+            name='status',
+            field=models.CharField(choices=[('pending', 'Pending'), ('ready', 'Ready')], default='ready', max_length=10),
+        ),
+    ]
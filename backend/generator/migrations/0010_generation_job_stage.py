@@ -0,0 +1,18 @@
+# Generated by Django 5.1.15 on 2026-10-18 04:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0009_generation_jobs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generationjob',
+            name='stage',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
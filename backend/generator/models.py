@@ -20,6 +20,16 @@ class Palette(models.Model):
     is_processing = models.BooleanField(default=False)
     error_message = models.TextField(null=True, blank=True)
     storage_path = models.CharField(max_length=255, null=True, blank=True)
+    bundle_path = models.CharField(max_length=512, null=True, blank=True)  # Zip of all files, relative to MEDIA_ROOT
+    bundle_size = models.PositiveBigIntegerField(default=0)
+    png_profile = models.CharField(max_length=20, blank=True, default='')  # Image encoding profile, blank for the server default
+
+    @property
+    def bundle_full_path(self):
+        """Get the full filesystem path to the prebuilt zip bundle"""
+        if not self.bundle_path:
+            return None
+        return os.path.join(settings.MEDIA_ROOT, self.bundle_path)
 
     def __str__(self):
         return self.name
@@ -47,19 +57,55 @@ class PaletteFileType(models.Model):
         ordering = ['name']
 
 
+class PaletteArtifact(models.Model):
+    """
+    Generated file stored once by content key and shared by every palette
+    file with identical output
+    """
+    digest = models.CharField(max_length=64, unique=True)
+    file_extension = models.CharField(max_length=10)
+    file_path = models.CharField(max_length=512)  # Relative to MEDIA_ROOT
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def full_path(self):
+        """Get the full filesystem path to this artifact"""
+        return os.path.join(settings.MEDIA_ROOT, self.file_path)
+
+    def __str__(self):
+        return f"{self.digest[:12]}.{self.file_extension} ({self.ref_count} refs)"
+
+    class Meta:
+        verbose_name = 'Palette Artifact'
+        verbose_name_plural = 'Palette Artifacts'
+        ordering = ['-created_at']
+
+
 class PaletteFile(models.Model):
     """
     Palette file
     """
+    PENDING = 'pending'  # Rendered on first download
+    READY = 'ready'
+    STATUS_CHOICES = [
+        (PENDING, 'Pending'),
+        (READY, 'Ready'),
+    ]
+
     palette = models.ForeignKey(Palette, on_delete=models.CASCADE, related_name='files')
     file_type = models.ForeignKey(PaletteFileType, on_delete=models.CASCADE)
+    artifact = models.ForeignKey(PaletteArtifact, on_delete=models.PROTECT, null=True, blank=True, related_name='palette_files')
     file_name = models.CharField(max_length=255)
     file_path = models.CharField(max_length=512, blank=True)  # Relative to MEDIA_ROOT
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=READY)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
     def save(self, *args, **kwargs):
-        if not self.file_path and self.palette.storage_path:
+        if not self.file_path and self.status == self.READY and self.palette.storage_path:
             self.file_path = os.path.join(
                 self.palette.storage_path,
                 f"{self.palette.name}-color-palette.{self.file_type.file_extension}"
@@ -90,14 +136,54 @@ class PaletteFile(models.Model):
         unique_together = ['palette', 'file_type']
 
 
+class GenerationJob(models.Model):
+    """
+    Queued generation of a palette's files, claimed and run by the
+    generator workers (see `manage.py run_generator_workers`)
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    ]
+
+    palette = models.ForeignKey(Palette, on_delete=models.CASCADE, related_name='generation_jobs')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    attempts = models.PositiveIntegerField(default=0)
+    run_after = models.DateTimeField()  # Not claimed before this time (retry backoff)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)  # Worker that claimed the job
+    stage = models.CharField(max_length=100, blank=True)  # What a running job is doing, for live status
+    last_error = models.TextField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.palette.name} ({self.status}, attempt {self.attempts})"
+
+    class Meta:
+        verbose_name = 'Generation Job'
+        verbose_name_plural = 'Generation Jobs'
+        ordering = ['run_after', 'id']
+        indexes = [models.Index(fields=['status', 'run_after'])]
+
+
 @receiver(pre_delete, sender=Palette)
 def delete_palette_files(sender, instance, **kwargs):
     """
     Signal handler to clean up files when a palette is deleted.
     This ensures files are removed even if the palette is deleted outside the view.
     """
-    # Delete associated files from storage
+    # Delete associated files from storage (shared artifacts are released by
+    # reference count instead)
     for file_obj in instance.files.all():
+        if file_obj.artifact_id:
+            continue
         if file_obj.full_path and os.path.exists(file_obj.full_path):
             try:
                 os.remove(file_obj.full_path)
@@ -0,0 +1,301 @@
+"""
+Lazy generation of saved palettes' files.
+
+A saved palette gets one PaletteFile row per file type. Formats listed in
+PALETTE_EAGER_FORMATS are rendered when the palette is created; the others
+stay pending until they are first downloaded, either alone or in the zip
+bundle, and are then rendered and stored as shared artifacts like the rest.
+Generator workers, being off the request path, go on to render the pending
+formats and build the bundle right after generation, so downloads of
+queued palettes serve the finished archive.
+
+A pending file is rendered under a per-file lock, which orders concurrent
+first requests within a process: whoever gets the lock second finds the
+file ready and renders nothing. Rendering happens outside any transaction;
+only storing the artifact and marking the row ready run in one, holding the
+row with select_for_update, so concurrent first requests in other processes
+at worst render the same bytes twice and store them once. Bundles are built
+under their palette's row once its files are ready.
+
+``generate_palette_files`` creates a palette's rows. Views call it directly
+or queue it for the generator workers (see ``jobs``).
+"""
+import os
+import threading
+import weakref
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils.text import slugify
+
+from .artifacts import render_artifacts, store_artifacts
+from .bundles import file_chunks, remove_bundle, write_bundle
+from .formats import FORMATS
+from .generator import FormatRenderError
+from .metrics import GENERATION_SECONDS, GENERATIONS_IN_PROGRESS
+from .progress import publish
+from .renderer import resolve_image_profile
+from .thumbnails import ensure_thumbnail
+
+
+# In-process locks by key, dropped once no thread holds a reference
+_locks = weakref.WeakValueDictionary()
+_locks_guard = threading.Lock()
+
+
+def _lock_for(key):
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = threading.Lock()
+        return lock
+
+
+def eager_extensions():
+    """Extensions rendered when a palette is created."""
+    return set(getattr(settings, 'PALETTE_EAGER_FORMATS', ()))
+
+
+def bundle_path(palette):
+    """Storage path, relative to MEDIA_ROOT, of a palette's zip bundle."""
+    name_slug = slugify(palette.name) or 'palette'
+    return os.path.join(
+        palette.storage_path, f'{name_slug}-palette-files.zip'
+    )
+
+
+def ensure_file_ready(file_obj):
+    """
+    Render and store a pending PaletteFile; returns the file, now ready.
+    """
+    from .models import PaletteFile
+
+    if file_obj.status == PaletteFile.READY:
+        return file_obj
+
+    with _lock_for(('file', file_obj.pk)):
+        file_obj = PaletteFile.objects.select_related(
+            'palette', 'file_type'
+        ).get(pk=file_obj.pk)
+        if file_obj.status == PaletteFile.READY:
+            return file_obj
+
+        palette = file_obj.palette
+        extension = file_obj.file_type.file_extension
+        colors = (palette.name, palette.primary, palette.secondary,
+                  palette.tertiary)
+        contents = render_artifacts(
+            *colors, extensions=[extension], png_profile=palette.png_profile
+        )
+        with transaction.atomic():
+            file_obj = PaletteFile.objects.select_for_update().select_related(
+                'palette', 'file_type'
+            ).get(pk=file_obj.pk)
+            if file_obj.status == PaletteFile.PENDING:
+                artifact = store_artifacts(
+                    *colors, extensions=[extension],
+                    png_profile=palette.png_profile, contents=contents
+                )[extension]
+                file_obj.artifact = artifact
+                file_obj.file_path = artifact.file_path
+                file_obj.status = PaletteFile.READY
+                file_obj.save(update_fields=[
+                    'artifact', 'file_path', 'status', 'updated_at'
+                ])
+    return file_obj
+
+
+def ensure_bundle(palette, errors=None):
+    """
+    Build a palette's zip bundle if it has none, rendering its pending
+    files first; returns the palette with ``bundle_path`` set.
+
+    A pending file that fails to render raises FormatRenderError, unless an
+    ``errors`` dict is given: failures are then recorded there by
+    extension, and no bundle is stored since it would lack them. The files
+    that are ready can still be zipped on the fly.
+    """
+    from .models import Palette, PaletteFile
+
+    def built(palette):
+        return bool(palette.bundle_path) and os.path.exists(
+            palette.bundle_full_path
+        )
+
+    if built(palette):
+        return palette
+
+    with _lock_for(('bundle', palette.pk)):
+        # Render pending files before the palette's row is locked
+        failed = {}
+        pending = palette.files.filter(
+            status=PaletteFile.PENDING
+        ).select_related('file_type')
+        for file_obj in pending:
+            try:
+                ensure_file_ready(file_obj)
+            except FormatRenderError as e:
+                if errors is None:
+                    raise
+                failed.update(e.errors)
+        if failed:
+            errors.update(failed)
+            return palette
+
+        with transaction.atomic():
+            palette = Palette.objects.select_for_update().get(pk=palette.pk)
+            if built(palette):
+                return palette
+            files = palette.files.filter(status=PaletteFile.READY)
+            entries = [
+                (
+                    file_obj.file_name,
+                    file_chunks(
+                        lambda path=file_obj.file_path:
+                            default_storage.open(path, 'rb')
+                    )
+                )
+                for file_obj in files
+                if default_storage.exists(file_obj.file_path)
+            ]
+            relative_path = bundle_path(palette)
+            palette.bundle_size = write_bundle(entries, relative_path)
+            palette.bundle_path = relative_path
+            # Leave updated_at alone; downloads should not reorder palettes
+            palette.save(update_fields=['bundle_path', 'bundle_size'])
+    return palette
+
+
+def invalidate_bundle(palette):
+    """Forget and delete a palette's bundle once its files are outdated."""
+    stale_bundle = palette.bundle_path
+    if stale_bundle:
+        palette.bundle_path = None
+        palette.bundle_size = 0
+        palette.save(update_fields=['bundle_path', 'bundle_size'])
+        remove_bundle(stale_bundle)
+
+
+@GENERATIONS_IN_PROGRESS.track_inprogress()
+@GENERATION_SECONDS.time()
+def generate_palette_files(palette, progress=None, bundle=False):
+    """
+    Create (or replace) a palette's PaletteFile rows, rendering the eager
+    formats, and mark the palette as no longer processing. Errors other
+    than a single format failing to render are raised to the caller.
+    ``progress``, if given, is called with the name of each stage as it
+    starts. With ``bundle``, the zip bundle is built afterwards even if
+    that means rendering the pending formats, as generator workers do
+    off the request path.
+    """
+    from .models import GenerationJob, Palette, PaletteFile, PaletteFileType
+
+    # The previous bundle no longer matches once files are regenerated
+    invalidate_bundle(palette)
+
+    # Palette directory with ID and slugged name, for any files that are not
+    # stored as shared artifacts
+    name_slug = slugify(palette.name) or 'palette'
+    palette_dir = os.path.join('palettes', f'{palette.id}-{name_slug}')
+
+    progress = progress or (lambda stage: None)
+    file_types = list(PaletteFileType.objects.all())
+    eager = eager_extensions()
+    eager = [
+        file_type.file_extension for file_type in file_types
+        if file_type.file_extension in eager
+    ]
+    _, image_profile = resolve_image_profile(palette.png_profile)
+    progress(f"rendering {', '.join(eager)}" if eager else 'saving files')
+
+    # Files with identical content are stored once and shared between
+    # palettes; only missing formats are rendered, and only the eager ones
+    # now, before any rows are locked. A format that fails to render is left
+    # pending and tried again on its first download
+    colors = (palette.name, palette.primary, palette.secondary,
+              palette.tertiary)
+    render_errors = {}
+    contents = render_artifacts(
+        *colors, extensions=eager, png_profile=palette.png_profile,
+        errors=render_errors
+    )
+    for extension, error in render_errors.items():
+        print(
+            f"Error rendering {extension} for palette {palette.id}: "
+            f"{error}"
+        )
+
+    with transaction.atomic():
+        # Replace the files of a regenerated palette (their shared artifacts
+        # are released as the rows are deleted)
+        palette.files.all().delete()
+        artifacts = store_artifacts(
+            *colors, extensions=eager, png_profile=palette.png_profile,
+            errors=render_errors, contents=contents
+        )
+
+        for file_type in file_types:
+            artifact = artifacts.get(file_type.file_extension)
+            # Other known formats are rendered on first download
+            pending = (
+                artifact is None and file_type.file_extension in FORMATS
+            )
+            # The image profile may change the file's real extension
+            extension = file_type.file_extension
+            if extension == 'png':
+                extension = image_profile.extension
+            file_name = f"{palette.name}-color-palette.{extension}"
+            if artifact:
+                file_path = artifact.file_path
+            elif pending:
+                file_path = ''
+            else:
+                file_path = os.path.join(palette_dir, file_name)
+
+            PaletteFile.objects.create(
+                palette=palette,
+                file_type=file_type,
+                artifact=artifact,
+                file_name=file_name,
+                file_path=file_path,
+                status=PaletteFile.PENDING if pending else PaletteFile.READY
+            )
+
+    # Render the list thumbnail now so the first page load doesn't
+    progress('thumbnail')
+    ensure_thumbnail(palette.primary, palette.secondary, palette.tertiary)
+
+    # Only the fields generation owns are saved, so an edit made while the
+    # files rendered is kept; it queued a job that renders it again, and
+    # the palette stays processing until that runs. The row lock orders
+    # this with queueing that job
+    with transaction.atomic():
+        Palette.objects.select_for_update().get(pk=palette.pk)
+        palette.is_processing = palette.generation_jobs.filter(
+            status=GenerationJob.QUEUED
+        ).exists()
+        palette.error_message = None
+        palette.storage_path = palette_dir
+        palette.save(update_fields=[
+            'is_processing', 'error_message', 'storage_path', 'updated_at'
+        ])
+    publish(palette.id)
+
+    # Zip the files once now so downloads serve the finished archive. In a
+    # request, only when no format is left to render; otherwise the first
+    # download builds it
+    if bundle or not palette.files.filter(
+        status=PaletteFile.PENDING
+    ).exists():
+        bundle_errors = {}
+        try:
+            ensure_bundle(palette, errors=bundle_errors)
+        except OSError as e:
+            # Downloads fall back to zipping the files on the fly
+            print(f"Error writing bundle for palette {palette.id}: {e}")
+        for extension, error in bundle_errors.items():
+            print(
+                f"Error rendering {extension} for palette {palette.id}: "
+                f"{error}"
+            )
@@ -0,0 +1,64 @@
+"""
+Worker pools for rendering palette formats in parallel.
+
+PALETTE_RENDER_POOL picks how PaletteGenerator.render_many runs the format
+writers: 'serial' renders them one after another in the calling thread,
+'thread' on a shared thread pool and 'process' on a shared process pool.
+The PNG and XLSX writers are independent CPU-bound jobs, so with a pool a
+palette takes about as long as its slowest format rather than the sum of
+all of them. Threads share the warmed-up PNG renderer but contend for the
+GIL; processes do not, at the cost of pickling each result back.
+
+Pools are created on first use, sized by PALETTE_RENDER_WORKERS (0 for the
+executor's default), and live for the rest of the process.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from django.conf import settings
+
+
+RENDER_POOLS = ('serial', 'thread', 'process')
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_render_pool(kind=None):
+    """
+    The shared executor for a pool kind, or for the deployment's
+    PALETTE_RENDER_POOL when ``kind`` is empty; None for 'serial'.
+    """
+    kind = kind or getattr(settings, 'PALETTE_RENDER_POOL', 'serial')
+    if kind not in RENDER_POOLS:
+        raise ValueError(f"Unknown render pool: {kind}")
+    if kind == 'serial':
+        return None
+
+    with _pools_lock:
+        pool = _pools.get(kind)
+        if pool is None:
+            workers = getattr(settings, 'PALETTE_RENDER_WORKERS', 0) or None
+            if kind == 'thread':
+                pool = ThreadPoolExecutor(
+                    max_workers=workers, thread_name_prefix='palette-render'
+                )
+            else:
+                # Forking a threaded server process can copy held locks;
+                # spawned workers start clean and import what they need
+                pool = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn')
+                )
+            _pools[kind] = pool
+        return pool
+
+
+def discard_render_pool(pool):
+    """Forget a broken pool so the next render starts a fresh one."""
+    with _pools_lock:
+        for kind, known in list(_pools.items()):
+            if known is pool:
+                del _pools[kind]
+    pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,226 @@
+"""
+Live generation status of saved palettes.
+
+Clients waiting on a palette would otherwise poll the palette list, which
+serializes every palette and file each time. The status endpoints instead
+hold the request open and send a palette's state whenever it changes:
+queued, each generation stage, then completed or error.
+
+Whatever changes a palette's state calls ``publish``. Once the transaction
+commits, that wakes the requests waiting in this process. On PostgreSQL it
+also sends a NOTIFY on CHANNEL, which a listener thread in each web process
+(started by its first waiting request) turns into the same wake-up, so
+changes made by the generator workers reach every process at once. On other
+databases waiting requests check their palettes every
+PALETTE_EVENTS_POLL_INTERVAL seconds instead.
+
+A woken request reads the state of only the palettes it watches, with one
+small query, and sends those that changed.
+"""
+import hashlib
+import json
+import select
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections, transaction
+
+
+CHANNEL = 'palette_progress'
+
+PROCESSING = 'processing'
+COMPLETED = 'completed'
+ERROR = 'error'
+DELETED = 'deleted'
+# States after which a palette's status no longer changes by itself
+FINAL_STATUSES = (COMPLETED, ERROR, DELETED)
+
+# Seconds the listener waits for notifications before checking its
+# connection, and before reconnecting a lost one
+LISTEN_TIMEOUT = 5
+RECONNECT_DELAY = 5
+
+
+class Notifier:
+    """Wakes the threads waiting for any palette's state to change."""
+
+    def __init__(self):
+        self._condition = threading.Condition()
+        self.version = 0
+
+    def notify(self):
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout):
+        """
+        Wait up to ``timeout`` seconds for a notification after ``version``;
+        returns the current version.
+        """
+        with self._condition:
+            self._condition.wait_for(
+                lambda: self.version != version, timeout
+            )
+            return self.version
+
+
+notifier = Notifier()
+
+_listener = None
+_listener_guard = threading.Lock()
+
+
+def publish(palette_id):
+    """Wake whoever watches ``palette_id`` once the transaction commits."""
+    connection = connections['default']
+    if connection.vendor == 'postgresql':
+        # Delivered by PostgreSQL on commit, and dropped on rollback
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT pg_notify(%s, %s)', [CHANNEL, str(palette_id)]
+            )
+    transaction.on_commit(notifier.notify)
+
+
+def _listen():
+    """Turn NOTIFYs on CHANNEL into wake-ups, reconnecting as needed."""
+    connection = connections['default']
+    while True:
+        conn = None
+        try:
+            conn = connection.Database.connect(
+                **connection.get_connection_params()
+            )
+            conn.autocommit = True
+            with conn.cursor() as cursor:
+                cursor.execute(f'LISTEN {CHANNEL}')
+            # Changes made while disconnected went unnoticed
+            notifier.notify()
+            while True:
+                if select.select([conn], [], [], LISTEN_TIMEOUT)[0]:
+                    conn.poll()
+                    if conn.notifies:
+                        conn.notifies.clear()
+                        notifier.notify()
+                else:
+                    # Fails once the server has gone away
+                    with conn.cursor() as cursor:
+                        cursor.execute('SELECT 1')
+        except Exception as e:
+            print(f"Palette status listener error: {e}")
+        finally:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+        time.sleep(RECONNECT_DELAY)
+
+
+def start_listener():
+    """
+    Start this process's listener thread if it is not running; returns
+    False if the database has no LISTEN/NOTIFY and waiters must poll.
+    """
+    global _listener
+
+    if connections['default'].vendor != 'postgresql':
+        return False
+    with _listener_guard:
+        # A forked process inherits the thread object but not the thread
+        if _listener is None or not _listener.is_alive():
+            _listener = threading.Thread(
+                target=_listen, name='palette-status-listener', daemon=True
+            )
+            _listener.start()
+    return True
+
+
+def palette_states(palettes):
+    """
+    Current state of each palette in the ``palettes`` queryset, by id: its
+    status as the palette API reports it and, while it is processing, the
+    generation stage and the number of attempts so far.
+    """
+    from .models import GenerationJob
+
+    states = {}
+    for row in palettes.values('id', 'is_processing', 'error_message'):
+        if row['is_processing']:
+            status = PROCESSING
+        elif row['error_message']:
+            status = ERROR
+        else:
+            status = COMPLETED
+        states[row['id']] = {
+            'id': row['id'],
+            'status': status,
+            'stage': None,
+            'attempts': 0,
+            'error_message': row['error_message'],
+        }
+
+    processing = [
+        palette_id for palette_id, state in states.items()
+        if state['status'] == PROCESSING
+    ]
+    if processing:
+        jobs = GenerationJob.objects.filter(
+            palette_id__in=processing,
+            status__in=[GenerationJob.QUEUED, GenerationJob.RUNNING]
+        ).order_by('id').values('palette_id', 'status', 'stage', 'attempts')
+        # The latest job wins
+        for job in jobs:
+            states[job['palette_id']].update(
+                stage=job['stage'] or job['status'],
+                attempts=job['attempts']
+            )
+    return states
+
+
+def state_cursor(state):
+    """Short fingerprint of a state, for clients to say what they have."""
+    encoded = json.dumps(state, sort_keys=True).encode()
+    return hashlib.sha1(encoded).hexdigest()[:16]
+
+
+def watch_states(palettes, duration, known=None):
+    """
+    Yield the states of the ``palettes`` queryset that changed, by id, for
+    up to ``duration`` seconds: first those that differ from ``known`` (the
+    states the caller has, by id), then the changes as they happen. A
+    palette that leaves the queryset is reported as deleted. An empty dict
+    is yielded after every PALETTE_EVENTS_HEARTBEAT seconds without
+    changes, so callers can keep their connection alive.
+    """
+    heartbeat = getattr(settings, 'PALETTE_EVENTS_HEARTBEAT', 15)
+    if start_listener():
+        # Check anyway now and then, in case a notification was missed
+        interval = heartbeat
+    else:
+        interval = getattr(settings, 'PALETTE_EVENTS_POLL_INTERVAL', 1.0)
+
+    known = dict(known or {})
+    deadline = time.monotonic() + duration
+    last_sent = None
+    version = notifier.version
+    while True:
+        states = palette_states(palettes)
+        for palette_id in known.keys() - states.keys():
+            if known[palette_id]['status'] != DELETED:
+                states[palette_id] = {'id': palette_id, 'status': DELETED}
+        changed = {
+            palette_id: state for palette_id, state in states.items()
+            if known.get(palette_id) != state
+        }
+        now = time.monotonic()
+        if changed or last_sent is None or now - last_sent >= heartbeat:
+            known.update(changed)
+            last_sent = now
+            yield changed
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return
+        version = notifier.wait(version, min(remaining, interval))
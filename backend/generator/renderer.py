@@ -0,0 +1,396 @@
+"""
+Cached renderer for the PNG palette sheet.
+
+Fonts are loaded once per process and each glyph is rasterized once, so
+label masks are assembled from cached bitmaps instead of going through
+FreeType for every string. Text extents and masks are also memoized per
+string, and the cell grid for a given number of families and shades is
+computed once. Swatches are filled in one array operation before the labels
+are drawn.
+"""
+import math
+import os
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+from django.conf import settings
+from PIL import Image, ImageDraw, ImageFont
+
+from .cache import LRUCache
+
+
+FONT_PATH = os.path.join(os.path.dirname(__file__), 'arial.ttf')
+
+# A4 landscape at 150 dpi
+SHEET_SIZE = (int(11.69 * 150), int(8.27 * 150))
+
+# Label font sizes in pixels; the CMYK line is slightly larger
+REGULAR_FONT_SIZE = 15
+BOLD_FONT_SIZE = 16
+
+LINE_HEIGHT = 18
+CELL_PADDING = 2
+NAME_OFFSET = 5
+
+SheetLayout = namedtuple(
+    'SheetLayout', ['cell_width', 'cell_height', 'boxes', 'index']
+)
+
+ImageProfile = namedtuple(
+    'ImageProfile',
+    ['format', 'extension', 'content_type', 'save_options', 'quantize']
+)
+
+# Encoding profiles for the palette sheet, selected per deployment with
+# PALETTE_PNG_PROFILE or per request
+IMAGE_PROFILES = {
+    # Pillow's defaults, as written before profiles existed
+    'default': ImageProfile('PNG', 'png', 'image/png', {}, False),
+    # Lowest zlib level: less encode time for slightly larger files
+    'fast': ImageProfile(
+        'PNG', 'png', 'image/png', {'compress_level': 1}, False
+    ),
+    # 256-color palette image; swatch fills keep their exact colors and only
+    # anti-aliased text edges are approximated
+    'small': ImageProfile('PNG', 'png', 'image/png', {'optimize': True}, True),
+    'webp': ImageProfile(
+        'WEBP', 'webp', 'image/webp', {'lossless': True}, False
+    ),
+}
+
+
+@lru_cache(maxsize=32)
+def sheet_layout(size, total_colors, total_shades):
+    """
+    Cell boxes for a sheet of ``total_colors`` columns by ``total_shades``
+    rows, and an index map assigning each pixel to a cell (0 is background).
+    ``boxes[j][i]`` is the inclusive ``(x1, y1, x2, y2)`` box of shade ``i``
+    of family ``j``; its cell number is ``1 + j * total_shades + i``.
+    """
+    width, height = size
+    cell_width = width // total_colors
+    cell_height = height // total_shades
+    index = np.zeros((height, width), dtype=np.uint16)
+    boxes = []
+    for j in range(total_colors):
+        column = []
+        for i in range(total_shades):
+            x1 = j * cell_width + CELL_PADDING
+            y1 = i * cell_height + CELL_PADDING
+            x2 = (j + 1) * cell_width - CELL_PADDING
+            y2 = (i + 1) * cell_height - CELL_PADDING
+            index[y1:y2 + 1, x1:x2 + 1] = 1 + j * total_shades + i
+            column.append((x1, y1, x2, y2))
+        boxes.append(tuple(column))
+    index.flags.writeable = False
+    return SheetLayout(cell_width, cell_height, tuple(boxes), index)
+
+
+def _pixel(value):
+    """Round a 26.6 fixed-point value to whole pixels, as FreeType does."""
+    return ((value + 32) & -64) >> 6
+
+
+class GlyphRasterizer:
+    """
+    Single-line text masks built from cached glyph bitmaps.
+
+    Pillow's basic layout renders each glyph into a whole-pixel position and
+    merges overlapping glyphs with a per-pixel maximum, so a string's mask can
+    be assembled from per-character bitmaps rendered once. The results match
+    ``FreeTypeFont.getbbox`` and ``getmask2`` pixel for pixel while loading
+    each glyph from the font file only once.
+    """
+
+    def __init__(self, font):
+        self.font = font
+        self.ascender = (
+            font.getbbox('x', anchor='la')[1]
+            - font.getbbox('x', anchor='ls')[1]
+        )
+        self._glyphs = {}
+        self._kerning = {}
+        self._lock = threading.RLock()
+
+    def glyph(self, char):
+        """
+        ``(advance, left, top, bottom, right, bitmap)`` for a character.
+        The advance is in 26.6 units, the extents are pixels relative to the
+        pen position and baseline, and the bitmap spans left/top to
+        right/bottom.
+        """
+        glyph = self._glyphs.get(char)
+        if glyph is None:
+            with self._lock:
+                glyph = self._glyphs.get(char) or self._load_glyph(char)
+                self._glyphs[char] = glyph
+        return glyph
+
+    def _load_glyph(self, char):
+        advance = round(self.font.getlength(char) * 64)
+        left, top, right, bottom = self.font.getbbox(char)
+        width, height = right - left, bottom - top
+        bitmap = np.zeros((height, width), dtype=np.uint8)
+        if width and height:
+            canvas = Image.new('L', (width, height))
+            ImageDraw.Draw(canvas).text(
+                (-left, -top), char, fill=255, font=self.font
+            )
+            bitmap = np.asarray(canvas)
+        top = self.ascender - top
+        return (advance, left, top, top - height, right, bitmap)
+
+    def kerning(self, pair):
+        """Advance adjustment, in 26.6 units, between two characters."""
+        kerning = self._kerning.get(pair)
+        if kerning is None:
+            with self._lock:
+                kerning = (
+                    round(self.font.getlength(pair) * 64)
+                    - self.glyph(pair[0])[0] - self.glyph(pair[1])[0]
+                )
+                self._kerning[pair] = kerning
+        return kerning
+
+    def layout(self, text):
+        """Glyphs, their pen positions and the text extents."""
+        glyphs = [self.glyph(char) for char in text]
+        positions = []
+        position = x_min = x_max = y_min = y_max = 0
+        for i, (advance, left, top, bottom, right, _) in enumerate(glyphs):
+            if i + 1 < len(text):
+                advance += self.kerning(text[i:i + 2])
+            px = _pixel(position)
+            positions.append(position)
+            position += advance
+            x_max = max(x_max, _pixel(position), right + px)
+            x_min = min(x_min, left + px)
+            y_max = max(y_max, top)
+            y_min = min(y_min, bottom)
+        return glyphs, positions, (x_min, y_min, x_max, y_max)
+
+    def getbbox(self, text):
+        """Same as ``font.getbbox(text)``."""
+        _, _, (x_min, y_min, x_max, y_max) = self.layout(text)
+        return (x_min, self.ascender - y_max, x_max, self.ascender - y_min)
+
+    def getmask(self, text, start=(0, 0)):
+        """
+        Same as ``font.getmask2(text, 'L', start=start)``, with the mask as
+        an ``L`` image, or None for text without any pixels.
+        """
+        glyphs, positions, (x_min, y_min, x_max, y_max) = self.layout(text)
+        width = x_max - x_min + math.ceil(start[0])
+        height = y_max - y_min + math.ceil(start[1])
+        offset = (x_min, self.ascender - y_max)
+        if width <= 0 or height <= 0:
+            return None, offset
+
+        mask = np.zeros((height, width), dtype=np.uint8)
+        pen_x = int((-x_min + start[0]) * 64)
+        pen_y = _pixel(int((-y_max - start[1]) * 64))
+        for glyph, position in zip(glyphs, positions):
+            _, left, top, _, _, bitmap = glyph
+            x = _pixel(pen_x + position) + left
+            y = -(pen_y + top)
+            h, w = bitmap.shape
+            x1, y1 = max(x, 0), max(y, 0)
+            x2, y2 = min(x + w, width), min(y + h, height)
+            if x1 < x2 and y1 < y2:
+                region = mask[y1:y2, x1:x2]
+                np.maximum(
+                    region, bitmap[y1 - y:y2 - y, x1 - x:x2 - x], out=region
+                )
+        return Image.fromarray(mask, 'L'), offset
+
+
+class PaletteSheetRenderer:
+    """
+    Draws the PNG palette sheet, reusing fonts, text metrics and glyph masks
+    across palettes.
+    """
+
+    def __init__(self, font_path=FONT_PATH, size=SHEET_SIZE, cache_size=4096):
+        self.size = size
+        self.fonts = {
+            'regular': GlyphRasterizer(
+                ImageFont.truetype(font_path, REGULAR_FONT_SIZE)
+            ),
+            'bold': GlyphRasterizer(
+                ImageFont.truetype(font_path, BOLD_FONT_SIZE)
+            ),
+        }
+        self.bbox_cache = LRUCache('png_text_bbox', cache_size)
+        self.mask_cache = LRUCache('png_text_mask', cache_size)
+
+    def text_bbox(self, text, font):
+        """``textbbox((0, 0), text)`` for one of the renderer's fonts."""
+        return self.bbox_cache.get_or_compute(
+            (text, font), lambda: self.fonts[font].getbbox(text)
+        )
+
+    def text_width(self, text, font):
+        bbox = self.text_bbox(text, font)
+        return bbox[2] - bbox[0]
+
+    def draw_text(self, draw, xy, text, font, fill):
+        """Same pixels as ``draw.text(xy, text, fill, font=...)``."""
+        if '\n' in text or '\r' in text:
+            draw.text(xy, text, fill, font=self.fonts[font].font)
+            return
+        x, y = xy
+        # The mask depends on the sub-pixel part of the position
+        start = (math.modf(x)[0], math.modf(y)[0])
+        mask, offset = self.mask_cache.get_or_compute(
+            (text, font, start),
+            lambda: self.fonts[font].getmask(text, start)
+        )
+        if mask is not None:
+            draw.bitmap(
+                (int(x) + offset[0], int(y) + offset[1]), mask, fill=fill
+            )
+
+    def render(self, swatches, total_shades):
+        """
+        Render ``{family: {shade: Swatch}}`` as an RGB image with one column
+        per family and ``total_shades`` rows.
+        """
+        families = list(swatches.items())
+        layout = sheet_layout(self.size, len(families), total_shades)
+
+        # Fill every swatch at once: colors[cell number] -> RGB
+        colors = np.full(
+            (len(families) * total_shades + 1, 3), 255, dtype=np.uint8
+        )
+        for j, (_, shades) in enumerate(families):
+            for i, swatch in enumerate(shades.values()):
+                colors[1 + j * total_shades + i] = swatch.rgb
+        img = Image.fromarray(colors[layout.index], 'RGB')
+
+        draw = ImageDraw.Draw(img)
+        cell_width = layout.cell_width
+        for j, (name, shades) in enumerate(families):
+            for i, (shade, swatch) in enumerate(shades.items()):
+                x1, y1, x2, y2 = layout.boxes[j][i]
+                ink = swatch.contrast
+
+                text_lines = (
+                    f"Weight - {shade}",
+                    f"HSB - {swatch.hsb}",
+                    f"RGB - {swatch.rgb}",
+                    f"HEX - {swatch.hex}",
+                )
+                # +1 line for the bold CMYK label
+                total_height = len(text_lines) * LINE_HEIGHT + LINE_HEIGHT
+                start_y = y1 + ((y2 - y1) - total_height) / 2
+
+                for idx, line in enumerate(text_lines):
+                    line_width = self.text_width(line, 'regular')
+                    text_x = x1 + (cell_width - line_width) / 2
+                    text_y = start_y + (idx * LINE_HEIGHT)
+                    self.draw_text(
+                        draw, (text_x, text_y), line, 'regular', ink
+                    )
+
+                # Drawn twice with a half-pixel offset for a bold effect
+                cmyk_text = f"CMYK - {swatch.cmyk}"
+                cmyk_width = self.text_width(cmyk_text, 'bold')
+                cmyk_x = x1 + (cell_width - cmyk_width) / 2
+                cmyk_y = start_y + (len(text_lines) * LINE_HEIGHT)
+                self.draw_text(draw, (cmyk_x, cmyk_y), cmyk_text, 'bold', ink)
+                self.draw_text(
+                    draw, (cmyk_x + 0.5, cmyk_y), cmyk_text, 'bold', ink
+                )
+
+                if i == total_shades - 1:
+                    name_width = self.text_bbox(name, 'regular')[2]
+                    name_x = x1 + (cell_width - name_width) / 2
+                    name_y = y2 + NAME_OFFSET
+                    self.draw_text(
+                        draw, (name_x, name_y), name, 'regular', (0, 0, 0)
+                    )
+        return img
+
+    def cache_stats(self):
+        return [self.bbox_cache.stats(), self.mask_cache.stats()]
+
+
+def resolve_image_profile(name=None):
+    """
+    ``(name, ImageProfile)`` for a profile name, or for the deployment's
+    PALETTE_PNG_PROFILE when ``name`` is empty.
+    """
+    name = name or getattr(settings, 'PALETTE_PNG_PROFILE', 'default')
+    if name not in IMAGE_PROFILES:
+        raise ValueError(f"Unknown image profile: {name}")
+    return name, IMAGE_PROFILES[name]
+
+
+def encode_image(img, fp, profile, exact_colors=()):
+    """
+    Save a rendered sheet to a path or file object with an ImageProfile.
+    ``exact_colors`` are kept unchanged when the profile quantizes.
+    """
+    if profile.quantize:
+        img = quantize(img, exact_colors)
+    img.save(fp, format=profile.format, **profile.save_options)
+
+
+def quantize(img, exact_colors=(), colors=256):
+    """
+    Convert to a palette image whose palette contains ``exact_colors``
+    (plus black and white for the labels), with the remaining entries
+    chosen by quantizing the image. Every pixel maps to its nearest entry,
+    so pixels of an exact color keep it.
+    """
+    fixed = set(map(tuple, exact_colors)) | {(0, 0, 0), (255, 255, 255)}
+    fixed = sorted(fixed)
+    if len(fixed) > colors:
+        return img.quantize(colors, dither=Image.Dither.NONE)
+    palette = np.array(fixed, dtype=np.int64).reshape(-1, 3)
+    free = colors - len(fixed)
+    if free:
+        rest = img.quantize(
+            free, method=Image.Quantize.FASTOCTREE, dither=Image.Dither.NONE
+        )
+        rest = np.array(rest.getpalette()[:free * 3], dtype=np.int64)
+        palette = np.concatenate([palette, rest.reshape(-1, 3)])
+
+    # Map each distinct image color (far fewer than pixels) to its nearest
+    # palette entry; Pillow's own lookup is only approximate
+    pixels = np.asarray(img.convert('RGB'), dtype=np.int64)
+    packed = (pixels[..., 0] << 16) | (pixels[..., 1] << 8) | pixels[..., 2]
+    present = np.zeros(1 << 24, dtype=bool)
+    present[packed] = True
+    unique = np.flatnonzero(present)
+    unique_rgb = np.stack(
+        [unique >> 16, (unique >> 8) & 0xFF, unique & 0xFF], axis=1
+    ).astype(np.float64)
+    entries = palette.astype(np.float64)
+    # |u - p|^2 without the per-color |u|^2 term, which does not change
+    # the ordering
+    distance = (entries * entries).sum(axis=1) - 2 * unique_rgb @ entries.T
+    lookup = np.zeros(1 << 24, dtype=np.uint8)
+    lookup[unique] = np.argmin(distance, axis=1)
+
+    result = Image.fromarray(lookup[packed], 'P')
+    result.putpalette(palette.astype(np.uint8).ravel().tolist())
+    return result
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_png_renderer():
+    """The process-wide renderer, created on first use."""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = PaletteSheetRenderer(
+                    cache_size=getattr(settings, 'PNG_TEXT_CACHE_SIZE', 4096)
+                )
+    return _renderer
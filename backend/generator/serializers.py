@@ -1,6 +1,8 @@
 # serializers.py
 from rest_framework import serializers
 from .models import Palette, PaletteFile, PaletteFileType
+from .formats import DOWNLOAD_FORMATS, FORMATS
+from .renderer import IMAGE_PROFILES
 
 class PaletteFileTypeSerializer(serializers.ModelSerializer):
     class Meta:
@@ -25,11 +27,18 @@ class PaletteFileSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = PaletteFile
-        fields = ['id', 'file_type', 'file_name', 'created_at', 'updated_at', 'download_url']
+        fields = ['id', 'file_type', 'file_name', 'status', 'created_at', 'updated_at', 'download_url']
 
 class PaletteSerializer(serializers.ModelSerializer):
     files = PaletteFileSerializer(many=True, read_only=True)
     status = serializers.SerializerMethodField()
+    thumbnail_url = serializers.SerializerMethodField()
+    png_profile = serializers.ChoiceField(
+        choices=list(IMAGE_PROFILES),
+        write_only=True,
+        required=False,
+        help_text="Encoding profile for the palette image (defaults to the server setting)"
+    )
 
     def get_status(self, obj: 'Palette') -> str:
         """Get the processing status of a palette.
@@ -46,10 +55,29 @@ class PaletteSerializer(serializers.ModelSerializer):
             return "error"
         return "completed"
 
+    def get_thumbnail_url(self, obj: 'Palette') -> str:
+        """Get the URL of the palette's swatch-strip thumbnail.
+
+        Args:
+            obj: The Palette instance
+
+        Returns:
+            str: The thumbnail URL, or None if the colors are not valid hex
+                codes or no thumbnail has been rendered for them yet
+        """
+        from django.urls import reverse
+        from .generator import GENERATOR_VERSION
+        from .thumbnails import thumbnail_exists, thumbnail_key
+        key = thumbnail_key(obj.primary, obj.secondary, obj.tertiary)
+        if key is None or not thumbnail_exists(key):
+            return None
+        return reverse('palette-thumbnail', kwargs={'version': GENERATOR_VERSION, 'colors': key})
+
     class Meta:
         model = Palette
         fields = ['id', 'name', 'primary', 'secondary', 'tertiary',
-                 'created_at', 'updated_at', 'files', 'status', 'error_message']
+                 'created_at', 'updated_at', 'files', 'status', 'error_message',
+                 'thumbnail_url', 'png_profile']
 
 class PalettePreviewRequestSerializer(serializers.Serializer):
     """Serializer for validating palette preview requests."""
@@ -84,6 +112,63 @@ class PalettePreviewRequestSerializer(serializers.Serializer):
         return value
 
 
+class PaletteRenderRequestSerializer(PalettePreviewRequestSerializer):
+    """Serializer for preview requests that may ask for one rendered file."""
+    file_format = serializers.ChoiceField(
+        choices=list(FORMATS),
+        required=False,
+        help_text="Return this file format instead of the JSON preview"
+    )
+    png_profile = serializers.ChoiceField(
+        choices=list(IMAGE_PROFILES),
+        required=False,
+        help_text="Encoding profile for the palette image (defaults to the server setting)"
+    )
+
+
+class PaletteDownloadRequestSerializer(PalettePreviewRequestSerializer):
+    """Serializer for validating anonymous palette download requests."""
+    png_profile = serializers.ChoiceField(
+        choices=list(IMAGE_PROFILES),
+        required=False,
+        help_text="Encoding profile for the palette image (defaults to the server setting)"
+    )
+    formats = serializers.ListField(
+        child=serializers.ChoiceField(choices=list(FORMATS)),
+        required=False,
+        allow_empty=False,
+        default=list(DOWNLOAD_FORMATS),
+        help_text=f"Formats to include (defaults to {', '.join(DOWNLOAD_FORMATS)})"
+    )
+
+
+class PaletteSimilarRequestSerializer(PalettePreviewRequestSerializer):
+    """Serializer for validating nearest-palette queries."""
+    limit = serializers.IntegerField(min_value=1, max_value=50, default=10)
+
+
+class PaletteBatchPreviewRequestSerializer(serializers.Serializer):
+    """Serializer for batch preview requests.
+
+    Each entry is validated individually while the response streams, so one
+    invalid color set does not fail the whole batch.
+    """
+    palettes = serializers.ListField(
+        child=serializers.DictField(),
+        allow_empty=False,
+        help_text="List of color sets, each shaped like a preview request"
+    )
+
+    def validate_palettes(self, value):
+        from django.conf import settings
+        limit = settings.PALETTE_BATCH_PREVIEW_LIMIT
+        if len(value) > limit:
+            raise serializers.ValidationError(
+                f"A batch may contain at most {limit} color sets"
+            )
+        return value
+
+
 class ColorShadeSerializer(serializers.Serializer):
     """Serializer for individual color shades."""
     rgb = serializers.ListField(
@@ -0,0 +1,12 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from .artifacts import release_artifact
+from .models import PaletteFile
+
+
+@receiver(post_delete, sender=PaletteFile)
+def release_palette_file_artifact(sender, instance, **kwargs):
+    """Drop the deleted file's reference to its shared artifact."""
+    if instance.artifact_id:
+        release_artifact(instance.artifact_id)
@@ -0,0 +1,125 @@
+"""
+Declarative shade-scale and palette-family specifications.
+
+A ShadeScale describes the weights of a scale (e.g. 100-900) and how far each
+weight moves saturation and brightness away from the anchor weight. It is
+compiled once into offset arrays so every family of a palette can be shaded
+in a single vectorized pass. The defaults reproduce the original nine-step
+scale and the four supporting hues.
+"""
+from dataclasses import dataclass
+from functools import lru_cache
+
+import numpy as np
+
+
+@dataclass(frozen=True)
+class ShadeScale:
+    """
+    Weights of a shade scale and the per-100-weight adjustment rates.
+
+    Weights below the anchor lose ``saturation_rate`` saturation and gain
+    ``lighten_rate`` brightness per 100; weights above it gain saturation and
+    lose ``darken_rate`` brightness per 100.
+    """
+    steps: tuple = (100, 200, 300, 400, 500, 600, 700, 800, 900)
+    anchor: int = 500
+    saturation_rate: float = 10
+    lighten_rate: float = 12.5
+    darken_rate: float = 17.5
+
+    def __post_init__(self):
+        steps = tuple(int(step) for step in self.steps)
+        if not steps or len(set(steps)) != len(steps):
+            raise ValueError("A shade scale needs distinct steps")
+        if self.anchor not in steps:
+            raise ValueError(f"Anchor {self.anchor} must be one of the steps")
+        object.__setattr__(self, 'steps', tuple(sorted(steps)))
+
+    @classmethod
+    def from_range(cls, start, stop, step, **kwargs):
+        """Evenly spaced weights, e.g. ``from_range(50, 950, 50)``."""
+        return cls(steps=tuple(range(start, stop + 1, step)), **kwargs)
+
+    @property
+    def labels(self):
+        """Shade keys as used in palettes, e.g. ``('100', ..., '900')``."""
+        return tuple(str(step) for step in self.steps)
+
+    @property
+    def anchor_label(self):
+        return str(self.anchor)
+
+
+@dataclass(frozen=True)
+class PaletteSpec:
+    """
+    Which families a palette contains and how their base colors are derived.
+
+    Neutral takes the primary hue with fixed saturation and brightness.
+    Supporting families use fixed hues with the primary's saturation and
+    brightness shifted by the given offsets.
+    """
+    scale: ShadeScale = ShadeScale()
+    neutral: tuple = (15, 70)
+    supporting: tuple = (
+        ("Green", 134),
+        ("Orange", 23),
+        ("Red", 0),
+        ("Blue", 204),
+    )
+    supporting_saturation_offset: int = -10
+    supporting_brightness_offset: int = -2
+
+    def family_bases(self, primary_hsb, secondary_hsb=None, tertiary_hsb=None):
+        """Ordered ``(family name, base HSB)`` pairs for a palette."""
+        families = [("Primary", tuple(primary_hsb))]
+        if secondary_hsb:
+            families.append(("Secondary", tuple(secondary_hsb)))
+        if tertiary_hsb:
+            families.append(("Tertiary", tuple(tertiary_hsb)))
+        families.append(("Neutral", (primary_hsb[0],) + tuple(self.neutral)))
+
+        saturation = primary_hsb[1] + self.supporting_saturation_offset
+        brightness = primary_hsb[2] + self.supporting_brightness_offset
+        for name, hue in self.supporting:
+            families.append((name, (hue, saturation, brightness)))
+        return families
+
+
+class CompiledScale:
+    """
+    Offset arrays for a ShadeScale, shared by every palette that uses it.
+    """
+
+    def __init__(self, scale):
+        self.labels = scale.labels
+        steps = np.array(scale.steps, dtype=np.float64)
+        distance = (steps - scale.anchor) / 100
+        self.saturation = distance * scale.saturation_rate
+        self.brightness = np.where(
+            distance < 0,
+            -distance * scale.lighten_rate,
+            -distance * scale.darken_rate,
+        )
+        self.lighter = distance < 0
+        self.darker = distance > 0
+
+
+def to_python_number(value):
+    """
+    Return ``value`` as an int when it is integral and as a float otherwise,
+    matching the mixed int/float tuples produced by the scalar functions.
+    """
+    value = float(value)
+    return int(value) if value.is_integer() else value
+
+
+@lru_cache(maxsize=None)
+def compile_scale(scale):
+    """Compile (once per distinct scale) the offset arrays for ``scale``."""
+    return CompiledScale(scale)
+
+
+DEFAULT_SCALE = ShadeScale()
+DEFAULT_SPEC = PaletteSpec()
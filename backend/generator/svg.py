@@ -0,0 +1,114 @@
+"""
+SVG palette sheet.
+
+The sheet has the same grid and labels as the PNG image but is written as
+text from string templates, so nothing is rasterized: swatches are ``rect``
+elements and labels are ``text`` elements centered with ``text-anchor``.
+"""
+from xml.sax.saxutils import escape
+
+from .renderer import (
+    BOLD_FONT_SIZE,
+    LINE_HEIGHT,
+    NAME_OFFSET,
+    REGULAR_FONT_SIZE,
+    SHEET_SIZE,
+    sheet_layout,
+)
+
+
+# Arial's ascender in ems; moves the PNG's top-aligned label positions to
+# the baselines SVG text is placed on
+FONT_ASCENT = 1854 / 2048
+
+SVG_DOCUMENT = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{width}" '
+    'height="{height}" viewBox="0 0 {width} {height}" '
+    'font-family="Arial, Helvetica, sans-serif" '
+    'font-size="{font_size}" text-anchor="middle">\n'
+    '<rect width="{width}" height="{height}" fill="#ffffff"/>\n'
+    '{body}'
+    '</svg>\n'
+)
+SVG_SWATCH = (
+    '<rect x="{x}" y="{y}" width="{width}" height="{height}" '
+    'fill="{fill}"/>\n'
+    '<g fill="{ink}">\n{labels}</g>\n'
+)
+SVG_TEXT = '<text x="{x}" y="{y}">{text}</text>\n'
+SVG_BOLD_TEXT = (
+    '<text x="{x}" y="{y}" font-size="{font_size}" '
+    'font-weight="bold">{text}</text>\n'
+)
+
+
+def _number(value):
+    return format(round(value, 2), 'g')
+
+
+def _hex(rgb):
+    return '#{:02x}{:02x}{:02x}'.format(*rgb)
+
+
+def render_svg(swatches, total_shades, size=SHEET_SIZE):
+    """
+    Render ``{family: {shade: Swatch}}`` as an SVG document with one column
+    per family and ``total_shades`` rows.
+    """
+    families = list(swatches.items())
+    layout = sheet_layout(size, len(families), total_shades)
+    regular_ascent = REGULAR_FONT_SIZE * FONT_ASCENT
+    bold_ascent = BOLD_FONT_SIZE * FONT_ASCENT
+
+    body = []
+    for j, (name, shades) in enumerate(families):
+        for i, (shade, swatch) in enumerate(shades.items()):
+            x1, y1, x2, y2 = layout.boxes[j][i]
+            center_x = _number(x1 + layout.cell_width / 2)
+
+            text_lines = (
+                f"Weight - {shade}",
+                f"HSB - {swatch.hsb}",
+                f"RGB - {swatch.rgb}",
+                f"HEX - {swatch.hex}",
+            )
+            # +1 line for the bold CMYK label
+            total_height = len(text_lines) * LINE_HEIGHT + LINE_HEIGHT
+            start_y = y1 + ((y2 - y1) - total_height) / 2
+
+            labels = [
+                SVG_TEXT.format(
+                    x=center_x,
+                    y=_number(start_y + idx * LINE_HEIGHT + regular_ascent),
+                    text=escape(line),
+                )
+                for idx, line in enumerate(text_lines)
+            ]
+            labels.append(SVG_BOLD_TEXT.format(
+                x=center_x,
+                y=_number(
+                    start_y + len(text_lines) * LINE_HEIGHT + bold_ascent
+                ),
+                font_size=BOLD_FONT_SIZE,
+                text=escape(f"CMYK - {swatch.cmyk}"),
+            ))
+
+            body.append(SVG_SWATCH.format(
+                x=x1, y=y1, width=x2 - x1 + 1, height=y2 - y1 + 1,
+                fill=swatch.hex, ink=_hex(swatch.contrast),
+                labels=''.join(labels),
+            ))
+
+            if i == total_shades - 1:
+                body.append(SVG_TEXT.format(
+                    x=center_x,
+                    y=_number(y2 + NAME_OFFSET + regular_ascent),
+                    text=escape(name),
+                ))
+
+    width, height = size
+    return SVG_DOCUMENT.format(
+        width=width, height=height, font_size=REGULAR_FONT_SIZE,
+        body=''.join(body),
+    )
@@ -0,0 +1,139 @@
+"""
+Tests for the content-addressed artifact store.
+"""
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator.artifacts import artifact_digest, render
+from generator.generator import PaletteGenerator
+from generator.formats import FORMATS
+from generator.models import Palette, PaletteArtifact, PaletteFileType
+
+User = get_user_model()
+
+
+@override_settings(
+    PALETTE_EAGER_FORMATS=list(FORMATS), PALETTE_GENERATION_QUEUE=False
+)
+class ArtifactStoreTests(APITestCase):
+    """Identical palettes share stored files"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='palette_media_')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        for ext in ('png', 'xlsx', 'css', 'ts', 'dart'):
+            PaletteFileType.objects.create(
+                name=ext.upper(), description=ext, file_extension=ext
+            )
+        self.user = User.objects.create_user(
+            email='artifacts@example.com', first_name='Artifact',
+            last_name='User', password='artifactpass123'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def create_palette(self, name, primary, secondary, **extra):
+        res = self.client.post(reverse('palette-list'), {
+            'name': name, 'primary': primary, 'secondary': secondary, **extra
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return Palette.objects.get(id=res.data['id'])
+
+    def test_digest_depends_on_normalized_colors_and_format(self):
+        digest = artifact_digest('css', '#3366CC', 'ff9900')
+
+        self.assertEqual(digest, artifact_digest('css', '#3366cc', '#ff9900'))
+        self.assertNotEqual(
+            digest, artifact_digest('ts', '#3366cc', '#ff9900')
+        )
+        self.assertNotEqual(digest, artifact_digest('css', '#3366cc'))
+        self.assertEqual(digest, artifact_digest(
+            'css', '#3366cc', '#ff9900', name='Other'
+        ))
+
+    def test_identical_palettes_share_artifacts(self):
+        first = self.create_palette('First', '#3366cc', '#ff9900')
+
+        with patch.object(PaletteGenerator, 'render') as render_format:
+            second = self.create_palette('Second', '#3366CC', 'ff9900')
+
+        render_format.assert_not_called()
+        self.assertIsNone(second.error_message)
+        self.assertEqual(
+            PaletteArtifact.objects.count(), PaletteFileType.objects.count()
+        )
+        for artifact in PaletteArtifact.objects.all():
+            self.assertEqual(artifact.ref_count, 2)
+            self.assertEqual(
+                artifact.size, os.path.getsize(artifact.full_path)
+            )
+
+        first_paths = {f.file_path for f in first.files.all()}
+        for file_obj in second.files.all():
+            self.assertTrue(file_obj.file_name.startswith('Second-'))
+            self.assertIn(file_obj.file_path, first_paths)
+
+    def test_only_missing_artifacts_are_generated(self):
+        first = self.create_palette('First', '#3366cc', '#ff9900')
+        css = first.files.get(file_type__file_extension='css')
+        os.remove(css.full_path)
+
+        with patch('generator.artifacts.render', wraps=render) as spy:
+            self.create_palette('Second', '#3366cc', '#ff9900')
+
+        self.assertEqual(spy.call_args.args[2], ['css'])
+        self.assertTrue(os.path.exists(css.full_path))
+
+    def test_png_profile_selects_image_artifact(self):
+        first = self.create_palette('First', '#3366cc', '#ff9900')
+        second = self.create_palette(
+            'Second', '#3366cc', '#ff9900', png_profile='webp'
+        )
+
+        png = first.files.get(file_type__file_extension='png')
+        webp = second.files.get(file_type__file_extension='png')
+        self.assertEqual(webp.file_name, 'Second-color-palette.webp')
+        self.assertNotEqual(png.artifact_id, webp.artifact_id)
+        self.assertEqual(
+            first.files.get(file_type__file_extension='css').artifact_id,
+            second.files.get(file_type__file_extension='css').artifact_id
+        )
+
+        res = self.client.get(
+            reverse('palette-files-download', args=[webp.id])
+        )
+        self.assertEqual(res['Content-Type'], 'image/webp')
+
+    def test_delete_releases_references(self):
+        first = self.create_palette('First', '#3366cc', '#ff9900')
+        second = self.create_palette('Second', '#3366cc', '#ff9900')
+        paths = [f.full_path for f in second.files.all()]
+
+        with self.captureOnCommitCallbacks(execute=True):
+            res = self.client.delete(
+                reverse('palette-detail', args=[first.id])
+            )
+        self.assertEqual(res.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertTrue(all(os.path.exists(path) for path in paths))
+        self.assertEqual(
+            {a.ref_count for a in PaletteArtifact.objects.all()}, {1}
+        )
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertFalse(PaletteArtifact.objects.exists())
+        self.assertFalse(any(os.path.exists(path) for path in paths))
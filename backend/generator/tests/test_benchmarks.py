@@ -0,0 +1,101 @@
+"""
+Tests for the benchmark results and their comparison with a baseline.
+"""
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase
+
+from generator.benchmarks import compare_results
+
+
+class CompareResultsTests(SimpleTestCase):
+    """Cases are flagged by their change from the baseline"""
+
+    def test_statuses(self):
+        baseline = {'formats': [
+            {'case': 'render/css', 'time_us': 100.0},
+            {'case': 'render/png', 'time_us': 100.0},
+            {'case': 'render/ts', 'time_us': 100.0},
+            {'case': 'render/gone', 'time_us': 100.0},
+        ]}
+        results = {'formats': [
+            {'case': 'render/css', 'time_us': 125.0},
+            {'case': 'render/png', 'time_us': 50.0},
+            {'case': 'render/ts', 'time_us': 105.0},
+            {'case': 'render/new', 'time_us': 1.0},
+            {'case': 'render/dart', 'skipped': 'not built'},
+        ]}
+
+        rows = compare_results(baseline, results, threshold=0.1)
+
+        self.assertEqual(
+            [(row['case'], row['status']) for row in rows],
+            [('render/css', 'regression'), ('render/png', 'improvement'),
+             ('render/ts', 'ok')]
+        )
+        self.assertAlmostEqual(rows[0]['change'], 0.25)
+
+    def test_threshold(self):
+        baseline = {'b': [{'case': 'c', 'time_us': 100.0}]}
+        results = {'b': [{'case': 'c', 'time_us': 125.0}]}
+
+        [row] = compare_results(baseline, results, threshold=0.3)
+
+        self.assertEqual(row['status'], 'ok')
+
+
+class BenchmarkCommandTests(SimpleTestCase):
+    """The command saves results and fails on regressions"""
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        self.addCleanup(os.remove, self.path)
+
+    def run_command(self, *args):
+        call_command(
+            'benchmark_generator', 'color_math', '--number', '1', *args,
+            stdout=io.StringIO()
+        )
+
+    def save_baseline(self, time_us):
+        with open(self.path) as f:
+            document = json.load(f)
+        for row in document['results']['color_math']:
+            row['time_us'] = time_us
+        with open(self.path, 'w') as f:
+            json.dump(document, f)
+
+    def test_json_output(self):
+        self.run_command('--json', self.path)
+
+        with open(self.path) as f:
+            document = json.load(f)
+        self.assertEqual(document['meta']['number'], 1)
+        self.assertIn('generator_version', document['meta'])
+        cases = [row['case'] for row in document['results']['color_math']]
+        self.assertIn('hex_to_hsb', cases)
+
+    def test_compare_fails_on_regression(self):
+        self.run_command('--json', self.path)
+        self.save_baseline(1e-6)
+
+        with self.assertRaisesMessage(CommandError, 'slower than the'):
+            self.run_command('--compare', self.path)
+
+    def test_compare_passes_when_faster(self):
+        self.run_command('--json', self.path)
+        self.save_baseline(1e9)
+
+        self.run_command('--compare', self.path)
+
+    def test_unreadable_baseline(self):
+        with open(self.path, 'w') as f:
+            f.write('not json')
+
+        with self.assertRaisesMessage(CommandError, 'Cannot read baseline'):
+            self.run_command('--compare', self.path)
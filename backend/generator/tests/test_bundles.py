@@ -0,0 +1,229 @@
+"""
+Tests for streaming palette bundles.
+"""
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator.bundles import entry_compression, file_chunks, stream_zip
+from generator.formats import FORMATS
+from generator.models import Palette, PaletteFileType
+
+User = get_user_model()
+
+
+class StreamZipTests(SimpleTestCase):
+    """The streamed archive is a valid zip produced piece by piece"""
+
+    def test_members_round_trip(self):
+        big = os.urandom(300 * 1024)
+        entries = [
+            ('a.css', [b':root {}\n']),
+            ('b.bin', (big[i:i + 65536] for i in range(0, len(big), 65536))),
+            ('empty.txt', []),
+        ]
+
+        pieces = list(stream_zip(entries))
+
+        self.assertGreater(len(pieces), 5)
+        self.assertLessEqual(max(len(p) for p in pieces), 70 * 1024)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(pieces)))
+        self.assertIsNone(archive.testzip())
+        self.assertEqual(archive.namelist(), ['a.css', 'b.bin', 'empty.txt'])
+        self.assertEqual(archive.read('b.bin'), big)
+        self.assertEqual(archive.read('empty.txt'), b'')
+
+    def test_entries_consumed_lazily(self):
+        opened = []
+
+        def entries():
+            for name in ('one', 'two'):
+                opened.append(name)
+                yield name, [name.encode()]
+
+        stream = stream_zip(entries())
+        next(stream)
+
+        self.assertEqual(opened, ['one'])
+
+    def test_compression_policy(self):
+        self.assertEqual(
+            entry_compression('Blue-color-palette.png'),
+            (zipfile.ZIP_STORED, None)
+        )
+        self.assertEqual(
+            entry_compression('Blue-color-palette.WEBP'),
+            (zipfile.ZIP_STORED, None)
+        )
+        self.assertEqual(
+            entry_compression('Blue-color-palette.xlsx'),
+            (zipfile.ZIP_STORED, None)
+        )
+        with override_settings(PALETTE_BUNDLE_COMPRESSLEVEL=9):
+            self.assertEqual(
+                entry_compression('Blue-color-palette.css'),
+                (zipfile.ZIP_DEFLATED, 9)
+            )
+        self.assertEqual(
+            entry_compression('Blue-color-palette.css', 1),
+            (zipfile.ZIP_DEFLATED, 1)
+        )
+
+    def test_compressed_members_stored(self):
+        text = b':root { --primary-500: #3366cc; }\n' * 100
+        entries = [('a.png', [b'\x89PNG' * 100]), ('a.css', [text])]
+
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(stream_zip(entries))))
+
+        png, css = archive.infolist()
+        self.assertEqual(png.compress_type, zipfile.ZIP_STORED)
+        self.assertEqual(png.compress_size, png.file_size)
+        self.assertEqual(css.compress_type, zipfile.ZIP_DEFLATED)
+        self.assertLess(css.compress_size, css.file_size)
+        self.assertEqual(archive.read('a.css'), text)
+
+    def test_file_chunks_opens_on_iteration(self):
+        opened = []
+
+        def open_file():
+            opened.append(True)
+            return io.BytesIO(b'x' * 10)
+
+        chunks = file_chunks(open_file, chunk_size=4)
+        self.assertEqual(opened, [])
+
+        self.assertEqual(list(chunks), [b'xxxx', b'xxxx', b'xx'])
+        self.assertEqual(opened, [True])
+
+
+@override_settings(
+    PALETTE_EAGER_FORMATS=list(FORMATS), PALETTE_GENERATION_QUEUE=False
+)
+class PaletteDownloadTests(APITestCase):
+    """Saved palettes download as a streamed zip"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='palette_media_')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        for ext in ('png', 'xlsx', 'css', 'ts', 'dart'):
+            PaletteFileType.objects.create(
+                name=ext.upper(), description=ext, file_extension=ext
+            )
+        self.user = User.objects.create_user(
+            email='bundle@example.com', first_name='Bundle',
+            last_name='User', password='bundlepass123'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def test_download_streams_all_files(self):
+        res = self.client.post(reverse('palette-list'), {
+            'name': 'Bundle', 'primary': '#3366cc', 'secondary': '#ff9900'
+        }, format='json')
+        palette = Palette.objects.get(id=res.data['id'])
+
+        res = self.client.get(reverse('palette-download', args=[palette.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'application/zip')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+        files = {f.file_name: f for f in palette.files.all()}
+        self.assertEqual(sorted(archive.namelist()), sorted(files))
+        css = files['Bundle-color-palette.css']
+        with open(css.full_path, 'rb') as f:
+            self.assertEqual(archive.read(css.file_name), f.read())
+
+    def create_palette(self, **data):
+        res = self.client.post(reverse('palette-list'), {
+            'name': 'Bundle', 'primary': '#3366cc', **data
+        }, format='json')
+        return Palette.objects.get(id=res.data['id'])
+
+    def test_bundle_built_at_generation(self):
+        palette = self.create_palette(secondary='#ff9900')
+
+        self.assertTrue(os.path.isfile(palette.bundle_full_path))
+        self.assertEqual(
+            palette.bundle_size, os.path.getsize(palette.bundle_full_path)
+        )
+        with zipfile.ZipFile(palette.bundle_full_path) as archive:
+            self.assertEqual(
+                sorted(archive.namelist()),
+                sorted(f.file_name for f in palette.files.all())
+            )
+
+    def test_download_serves_prebuilt_bundle(self):
+        palette = self.create_palette()
+
+        with patch('generator.bundles.stream_zip') as zip_files:
+            res = self.client.get(
+                reverse('palette-download', args=[palette.id])
+            )
+            content = b''.join(res.streaming_content)
+
+        zip_files.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(int(res['Content-Length']), palette.bundle_size)
+        self.assertIn('Bundle-palette-files.zip', res['Content-Disposition'])
+        with open(palette.bundle_full_path, 'rb') as f:
+            self.assertEqual(content, f.read())
+
+    def test_download_rebuilds_missing_bundle(self):
+        palette = self.create_palette()
+        os.remove(palette.bundle_full_path)
+
+        res = self.client.get(reverse('palette-download', args=[palette.id]))
+
+        self.assertEqual(int(res['Content-Length']), palette.bundle_size)
+        self.assertTrue(os.path.isfile(palette.bundle_full_path))
+
+    def test_download_without_bundle_zips_files(self):
+        palette = self.create_palette()
+        os.remove(palette.bundle_full_path)
+
+        with patch('generator.palette_files.write_bundle',
+                   side_effect=OSError('disk full')):
+            res = self.client.get(
+                reverse('palette-download', args=[palette.id])
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotIn('Content-Length', res)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertEqual(len(archive.namelist()), palette.files.count())
+
+    def test_regeneration_replaces_bundle(self):
+        palette = self.create_palette()
+        old_bundle = palette.bundle_full_path
+
+        res = self.client.patch(
+            reverse('palette-detail', args=[palette.id]),
+            {'name': 'Renamed', 'primary': '#aa3366'}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        palette.refresh_from_db()
+        self.assertFalse(os.path.exists(old_bundle))
+        self.assertFalse(os.path.exists(os.path.dirname(old_bundle)))
+        self.assertEqual(
+            palette.files.count(), PaletteFileType.objects.count()
+        )
+        with zipfile.ZipFile(palette.bundle_full_path) as archive:
+            css = archive.read('Renamed-color-palette.css').decode()
+        self.assertIn('--primary-500: #aa336', css)
@@ -0,0 +1,90 @@
+"""
+Tests for palette memoization.
+"""
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator.cache import LRUCache
+from generator.generator import (
+    compute_palette,
+    generate_palette,
+    palette_cache,
+)
+
+User = get_user_model()
+
+
+class LRUCacheTests(SimpleTestCase):
+    """Test the bounded LRU cache"""
+
+    def test_counts_hits_misses_and_evictions(self):
+        cache = LRUCache('test', maxsize=2)
+        cache.get_or_compute('a', lambda: 1)
+        cache.get_or_compute('b', lambda: 2)
+        cache.get_or_compute('a', lambda: 1)
+        cache.get_or_compute('c', lambda: 3)  # evicts 'b'
+
+        stats = cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 3)
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['size'], 2)
+        self.assertEqual(cache.get_or_compute('b', lambda: 'new'), 'new')
+
+
+class PaletteCacheTests(SimpleTestCase):
+    """Test generate_palette memoization"""
+
+    def setUp(self):
+        palette_cache.clear()
+
+    def test_normalized_inputs_share_an_entry(self):
+        first = generate_palette('#3366CC', 'ff9900')
+        second = generate_palette('3366cc', '#FF9900', '')
+
+        self.assertIs(first, second)
+        self.assertEqual(palette_cache.stats()['hits'], 1)
+        self.assertEqual(
+            {name: dict(shades) for name, shades in first.items()},
+            compute_palette('#3366cc', '#ff9900'),
+        )
+
+    def test_results_are_read_only(self):
+        palette = generate_palette('#3366cc')
+
+        with self.assertRaises(TypeError):
+            palette['Primary'] = {}
+        with self.assertRaises(TypeError):
+            palette['Primary']['500'] = (0, 0, 0)
+
+
+class PaletteCacheStatsViewTests(APITestCase):
+    """Test the cache stats endpoint"""
+
+    def setUp(self):
+        self.url = reverse('palette-cache-stats')
+
+    def auth_header(self, **extra):
+        user = User.objects.create_user(
+            email='stats@example.com', first_name='Stats', last_name='User',
+            password='statspass123', **extra
+        )
+        return {'HTTP_AUTHORIZATION': f'Bearer {AccessToken.for_user(user)}'}
+
+    def test_staff_can_read_stats(self):
+        res = self.client.get(self.url, **self.auth_header(is_staff=True))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        names = [cache['name'] for cache in res.data['caches']]
+        self.assertEqual(
+            names, ['palette', 'png_text_bbox', 'png_text_mask']
+        )
+
+    def test_regular_user_is_forbidden(self):
+        res = self.client.get(self.url, **self.auth_header())
+
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
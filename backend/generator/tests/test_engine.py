@@ -0,0 +1,65 @@
+"""
+Tests for the vectorized color engine.
+"""
+import random
+
+from django.test import SimpleTestCase
+
+from generator import engine
+from generator.generator import (
+    contrast_color,
+    generate_palette,
+    hex_to_hsb,
+    hsb_to_hex,
+    hsb_to_rgb,
+    rgb_to_cmyk,
+)
+
+
+class EngineTests(SimpleTestCase):
+    """Vectorized conversions match the scalar helpers"""
+
+    def setUp(self):
+        rng = random.Random(42)
+        self.colors = ['#%06x' % rng.randrange(1 << 24) for _ in range(200)]
+        self.colors += ['#000000', '#ffffff', '#808080', '#050505']
+
+    def test_hex_to_hsb_array(self):
+        result = engine.hex_to_hsb_array(self.colors).tolist()
+        expected = [list(hex_to_hsb(color)) for color in self.colors]
+        self.assertEqual(result, expected)
+
+    def test_palette_swatches_match_scalar_conversions(self):
+        palette = generate_palette('#3366cc', '#0a0a0a', '#fefefe')
+        swatches = engine.palette_swatches(palette)
+
+        for name, shades in palette.items():
+            for shade, hsb in shades.items():
+                rgb = hsb_to_rgb(hsb)
+                swatch = swatches[name][shade]
+                self.assertEqual(swatch.rgb, rgb)
+                self.assertEqual(swatch.hex, hsb_to_hex(hsb))
+                self.assertEqual(swatch.cmyk, rgb_to_cmyk(rgb))
+                self.assertEqual(swatch.contrast, contrast_color(rgb))
+
+    def test_generate_palette_batch_matches_generate_palette(self):
+        sets = [
+            (self.colors[i], self.colors[i + 1], self.colors[i + 2])
+            for i in range(0, 150, 3)
+        ]
+        sets += [(self.colors[0], None, None), ('#808080', '#ffffff', None)]
+
+        batch = engine.generate_palette_batch(sets)
+
+        self.assertEqual(len(batch), len(sets))
+        for colors, palette in zip(sets, batch):
+            expected = {
+                name: dict(shades)
+                for name, shades in generate_palette(*colors).items()
+            }
+            # repr() also checks the int/float type of every component
+            self.assertEqual(repr(palette), repr(expected))
+
+    def test_invalid_hex_raises(self):
+        with self.assertRaises(ValueError):
+            engine.hex_to_hsb_array(['#abc'])
@@ -0,0 +1,87 @@
+"""
+Tests for the output format registry.
+"""
+import json
+import shutil
+import tempfile
+from xml.etree import ElementTree
+
+from django.test import SimpleTestCase
+
+from generator.artifacts import artifact_digest
+from generator.formats import FORMATS, content_type_for, text_format
+from generator.generator import PaletteGenerator
+
+
+class FormatRegistryTests(SimpleTestCase):
+    """Formats plug into the generator through the registry"""
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp(prefix='palette_formats_')
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+
+    def generate(self, *formats):
+        return PaletteGenerator(
+            'Tokens', '#3366cc', '#ff9900', base_dir=self.output_dir,
+            formats=formats
+        )
+
+    def read(self, generator, extension):
+        with open(generator.get_output_path(extension), encoding='utf-8') as f:
+            return f.read()
+
+    def test_content_types(self):
+        self.assertEqual(content_type_for('css'), 'text/css')
+        self.assertEqual(content_type_for('svg'), 'image/svg+xml')
+        self.assertEqual(content_type_for('webp'), 'image/webp')
+        self.assertIsNone(content_type_for('exe'))
+
+    def test_registered_format_is_generated(self):
+        @text_format('txt', 'text/plain', embeds_name=True)
+        def render_text(generator):
+            return f"{generator.name}: {len(generator.swatches)} families\n"
+        self.addCleanup(FORMATS.pop, 'txt')
+
+        generator = self.generate('txt')
+
+        self.assertEqual(
+            self.read(generator, 'txt'),
+            f'Tokens: {len(generator.swatches)} families\n'
+        )
+        self.assertIn(
+            'Tokens-color-palette.txt',
+            [f['name'] for f in generator.get_generated_files()]
+        )
+        self.assertNotEqual(
+            artifact_digest('txt', '#3366cc', name='One'),
+            artifact_digest('txt', '#3366cc', name='Two')
+        )
+
+    def test_token_formats(self):
+        generator = self.generate('scss', 'js', 'json', 'xml', 'swift')
+        swatch = generator.swatches['Secondary']['300']
+
+        tokens = json.loads(self.read(generator, 'json'))
+        self.assertEqual(
+            tokens['color']['secondary']['300'],
+            {'$type': 'color', '$value': swatch.hex}
+        )
+
+        resources = ElementTree.fromstring(self.read(generator, 'xml'))
+        colors = {c.get('name'): c.text for c in resources.iter('color')}
+        self.assertEqual(
+            colors['secondary_300'], '#FF' + swatch.hex[1:].upper()
+        )
+
+        self.assertIn(
+            f'$secondary-300: {swatch.hex};', self.read(generator, 'scss')
+        )
+        self.assertIn(
+            f"          300: '{swatch.hex}',", self.read(generator, 'js')
+        )
+        red, green, blue = swatch.rgb
+        self.assertIn(
+            f'static let secondary300 = Color(red: {red} / 255, '
+            f'green: {green} / 255, blue: {blue} / 255)',
+            self.read(generator, 'swift')
+        )
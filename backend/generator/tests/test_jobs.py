@@ -0,0 +1,284 @@
+"""
+Tests for the palette generation job queue.
+"""
+import io
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator import jobs
+from generator.models import (
+    GenerationJob,
+    Palette,
+    PaletteFile,
+    PaletteFileType,
+)
+
+User = get_user_model()
+
+
+@override_settings(PALETTE_GENERATION_QUEUE=True, PALETTE_JOB_RETRY_DELAY=5,
+                   PALETTE_JOB_MAX_ATTEMPTS=3, PALETTE_JOB_TIMEOUT=300)
+class GenerationJobTests(APITestCase):
+    """Palettes are generated by workers claiming queued jobs"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='palette_media_')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        for ext in ('png', 'xlsx', 'css', 'ts', 'dart'):
+            PaletteFileType.objects.create(
+                name=ext.upper(), description=ext, file_extension=ext
+            )
+        self.user = User.objects.create_user(
+            email='jobs@example.com', first_name='Job',
+            last_name='User', password='jobspass123'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def create_palette(self, name='Queued'):
+        res = self.client.post(reverse('palette-list'), {
+            'name': name, 'primary': '#3366cc'
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res, Palette.objects.get(id=res.data['id'])
+
+    def test_create_queues_job(self):
+        res, palette = self.create_palette()
+
+        self.assertEqual(res.data['status'], 'processing')
+        self.assertEqual(palette.files.count(), 0)
+        job = palette.generation_jobs.get()
+        self.assertEqual(job.status, GenerationJob.QUEUED)
+        self.assertEqual(job.attempts, 0)
+
+    def test_worker_generates_files(self):
+        _, palette = self.create_palette()
+
+        self.assertEqual(jobs.work(once=True), 1)
+
+        palette.refresh_from_db()
+        self.assertFalse(palette.is_processing)
+        self.assertEqual(
+            palette.files.count(), PaletteFileType.objects.count()
+        )
+        job = palette.generation_jobs.get()
+        self.assertEqual(job.status, GenerationJob.DONE)
+        self.assertEqual(job.attempts, 1)
+        res = self.client.get(reverse('palette-detail', args=[palette.id]))
+        self.assertEqual(res.data['status'], 'completed')
+
+    @override_settings(PALETTE_EAGER_FORMATS=[])
+    def test_worker_builds_bundle(self):
+        _, palette = self.create_palette()
+
+        jobs.work(once=True)
+
+        palette.refresh_from_db()
+        self.assertTrue(palette.bundle_path)
+        self.assertFalse(
+            palette.files.filter(status=PaletteFile.PENDING).exists()
+        )
+        self.assertEqual(
+            int(self.client.get(
+                reverse('palette-download', args=[palette.id])
+            )['Content-Length']),
+            palette.bundle_size
+        )
+
+    def test_claim_order_and_visibility(self):
+        _, first = self.create_palette('First')
+        _, second = self.create_palette('Second')
+        _, later = self.create_palette('Later')
+        later.generation_jobs.update(
+            run_after=timezone.now() + timedelta(minutes=1)
+        )
+
+        claimed = [jobs.claim_job('test'), jobs.claim_job('test')]
+
+        self.assertEqual(
+            [job.palette_id for job in claimed], [first.id, second.id]
+        )
+        self.assertTrue(all(
+            job.status == GenerationJob.RUNNING and job.locked_by == 'test'
+            for job in claimed
+        ))
+        # Running jobs and jobs waiting out a backoff are not claimable
+        self.assertIsNone(jobs.claim_job('test'))
+
+    def test_lost_job_claimed_again(self):
+        _, palette = self.create_palette()
+        job = jobs.claim_job('lost')
+        GenerationJob.objects.filter(pk=job.pk).update(
+            locked_at=timezone.now() - timedelta(seconds=301)
+        )
+
+        job = jobs.claim_job('rescuer')
+
+        self.assertEqual(job.locked_by, 'rescuer')
+        self.assertEqual(job.attempts, 2)
+
+    def test_lost_job_failed_when_attempts_used_up(self):
+        _, palette = self.create_palette()
+        job = jobs.claim_job('lost')
+        GenerationJob.objects.filter(pk=job.pk).update(
+            attempts=3, locked_at=timezone.now() - timedelta(seconds=301)
+        )
+
+        self.assertIsNone(jobs.claim_job('rescuer'))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.FAILED)
+        self.assertEqual(job.attempts, 3)
+        self.assertEqual(job.locked_by, 'lost')
+        palette.refresh_from_db()
+        self.assertFalse(palette.is_processing)
+        self.assertIn('300 seconds', palette.error_message)
+        self.assertIsNone(jobs.claim_job('rescuer'))
+
+    def test_progress_renews_lock(self):
+        _, palette = self.create_palette()
+        job = jobs.claim_job('slow')
+        claimed_at = timezone.now() - timedelta(seconds=299)
+        GenerationJob.objects.filter(pk=job.pk).update(locked_at=claimed_at)
+        job.refresh_from_db()
+
+        def generate(palette, progress, **kwargs):
+            progress('rendering')
+            # Past the timeout since the claim, but not since the last stage
+            with patch('django.utils.timezone.now',
+                       return_value=claimed_at + timedelta(seconds=301)):
+                self.assertIsNone(jobs.claim_job('thief'))
+
+        with patch('generator.jobs.generate_palette_files',
+                   side_effect=generate):
+            self.assertTrue(jobs.run_job(job))
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, GenerationJob.DONE)
+        self.assertEqual(job.locked_by, 'slow')
+        self.assertGreater(job.locked_at, claimed_at)
+
+    def test_failed_job_retried_with_backoff(self):
+        _, palette = self.create_palette()
+
+        with patch('generator.jobs.generate_palette_files',
+                   side_effect=RuntimeError('disk full')):
+            for attempt in range(1, 4):
+                GenerationJob.objects.update(run_after=timezone.now())
+                job = jobs.claim_job()
+                self.assertFalse(jobs.run_job(job))
+                job.refresh_from_db()
+                self.assertEqual(job.attempts, attempt)
+                if attempt < 3:
+                    self.assertEqual(job.status, GenerationJob.QUEUED)
+                    delay = (job.run_after - timezone.now()).total_seconds()
+                    self.assertAlmostEqual(
+                        delay, 5 * 2 ** (attempt - 1), delta=2
+                    )
+
+        self.assertEqual(job.status, GenerationJob.FAILED)
+        self.assertEqual(job.last_error, 'RuntimeError: disk full')
+        palette.refresh_from_db()
+        self.assertFalse(palette.is_processing)
+        self.assertEqual(palette.error_message, 'disk full')
+
+    def test_regeneration_reuses_queued_job(self):
+        _, palette = self.create_palette()
+        url = reverse('palette-detail', args=[palette.id])
+
+        self.client.patch(url, {'primary': '#aa3366'}, format='json')
+        self.client.patch(url, {'primary': '#66aa33'}, format='json')
+
+        self.assertEqual(palette.generation_jobs.count(), 1)
+        jobs.work(once=True)
+        css = palette.files.get(file_type__file_extension='css')
+        self.assertEqual(css.file_name, 'Queued-color-palette.css')
+        palette.refresh_from_db()
+        self.assertEqual(palette.primary, '#66aa33')
+
+    def test_edit_during_generation_kept(self):
+        _, palette = self.create_palette()
+        url = reverse('palette-detail', args=[palette.id])
+        job = jobs.claim_job('first')
+
+        def edit(*args, **kwargs):
+            res = self.client.patch(url, {
+                'name': 'Edited', 'primary': '#aa3366'
+            }, format='json')
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            # The edit queues a job that waits for this one
+            self.assertIsNone(jobs.claim_job('second'))
+            return original(*args, **kwargs)
+
+        original = jobs.generate_palette_files
+        with patch('generator.jobs.generate_palette_files',
+                   side_effect=edit):
+            self.assertTrue(jobs.run_job(job))
+
+        palette.refresh_from_db()
+        self.assertEqual(palette.name, 'Edited')
+        self.assertEqual(palette.primary, '#aa3366')
+        # Newer work is queued, so the palette is still processing
+        self.assertTrue(palette.is_processing)
+
+        job = jobs.claim_job('second')
+        self.assertEqual(job.status, GenerationJob.RUNNING)
+        self.assertTrue(jobs.run_job(job))
+        palette.refresh_from_db()
+        self.assertFalse(palette.is_processing)
+        css = palette.files.get(file_type__file_extension='css')
+        self.assertEqual(css.file_name, 'Edited-color-palette.css')
+
+    def test_no_claim_while_palette_running(self):
+        _, palette = self.create_palette()
+        _, other = self.create_palette('Other')
+        running = jobs.claim_job('first')
+        queued = GenerationJob.objects.create(
+            palette=running.palette, run_after=timezone.now()
+        )
+
+        # The other palette's job is claimed past the blocked one
+        job = jobs.claim_job('second')
+        self.assertEqual(job.palette_id, other.id)
+        self.assertIsNone(jobs.claim_job('second'))
+
+        GenerationJob.objects.filter(pk=running.pk).update(
+            status=GenerationJob.DONE
+        )
+        self.assertEqual(jobs.claim_job('second').pk, queued.pk)
+
+    def test_retry_delay_is_capped(self):
+        self.assertEqual(jobs.retry_delay(1), 5)
+        self.assertEqual(jobs.retry_delay(3), 20)
+        self.assertEqual(jobs.retry_delay(30), jobs.MAX_RETRY_DELAY)
+
+    def test_worker_command_drains_queue(self):
+        self.create_palette('One')
+        self.create_palette('Two')
+        out = io.StringIO()
+
+        call_command('run_generator_workers', '--once', stdout=out)
+
+        self.assertEqual(
+            GenerationJob.objects.filter(status=GenerationJob.DONE).count(),
+            2
+        )
+        self.assertFalse(
+            Palette.objects.filter(is_processing=True).exists()
+        )
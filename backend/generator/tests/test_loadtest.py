@@ -0,0 +1,133 @@
+"""
+Tests for the load generation scenarios and their results.
+"""
+import shutil
+import tempfile
+import threading
+from random import Random
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator.benchmarks import ensure_file_types
+from generator.loadtest import (
+    ClientTransport,
+    Recorder,
+    VirtualUser,
+    anonymous_download,
+    create_then_download,
+    debounced_previews,
+    percentile,
+    run_load,
+)
+
+User = get_user_model()
+
+
+class FakeTransport:
+    """Answers previews with 200 and anonymous downloads with 500."""
+
+    def __init__(self):
+        self.paths = []
+
+    def request(self, method, path, data=None):
+        self.paths.append(path)
+        if 'download-anonymous' in path:
+            return 500, b''
+        return 200, b'{}'
+
+
+class RecorderTests(SimpleTestCase):
+    """Request times are summarized by endpoint"""
+
+    def test_percentile(self):
+        times = list(range(1, 101))
+
+        self.assertEqual(percentile(times, 50), 50)
+        self.assertEqual(percentile(times, 95), 95)
+        self.assertEqual(percentile(times, 100), 100)
+        self.assertEqual(percentile([7], 99), 7)
+
+    def test_summary(self):
+        recorder = Recorder()
+        for ms in range(1, 11):
+            recorder.record('preview', ms / 1000)
+        recorder.record('create', 0.5, error=500)
+        recorder.record('create', 0.1)
+
+        rows = {row['endpoint']: row for row in recorder.summary(2.0)}
+
+        self.assertEqual(rows['preview']['requests'], 10)
+        self.assertEqual(rows['preview']['throughput'], 5.0)
+        self.assertAlmostEqual(rows['preview']['p50_ms'], 5.0)
+        self.assertAlmostEqual(rows['preview']['max_ms'], 10.0)
+        self.assertEqual(rows['create']['error_rate'], 0.5)
+        self.assertEqual(rows['create']['error_kinds'], {'500': 1})
+
+
+class RunLoadTests(SimpleTestCase):
+    """Virtual users replay their scenarios until time is up"""
+
+    def test_errors_by_endpoint(self):
+        transports = []
+
+        def make_transport():
+            transports.append(FakeTransport())
+            return transports[-1]
+
+        recorder, elapsed = run_load(
+            make_transport,
+            [(debounced_previews, 1), (anonymous_download, 1)],
+            users=3, duration=0.2, think_time=0
+        )
+
+        rows = {row['endpoint']: row for row in recorder.summary(elapsed)}
+        self.assertEqual(len(transports), 3)
+        self.assertEqual(rows['preview']['errors'], 0)
+        self.assertEqual(rows['download_anonymous']['error_rate'], 1.0)
+        self.assertFalse(recorder.failures)
+
+
+@override_settings(PALETTE_GENERATION_QUEUE=False)
+class ScenarioTests(TestCase):
+    """The scenarios drive the API without errors"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(prefix='palette_loadtest_')
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        ensure_file_types()
+        user = User.objects.create_user(
+            email='load@example.com', first_name='Load',
+            last_name='Test', password='loadtestpass123'
+        )
+        self.recorder = Recorder()
+        self.user = VirtualUser(
+            ClientTransport(AccessToken.for_user(user)), self.recorder,
+            Random(1), think_time=0, stop=threading.Event()
+        )
+
+    def assert_no_errors(self, *endpoints):
+        rows = {row['endpoint']: row for row in self.recorder.summary(1.0)}
+        for endpoint in endpoints:
+            self.assertIn(endpoint, rows)
+            self.assertEqual(rows[endpoint]['errors'], 0, rows[endpoint])
+
+    def test_create_then_download(self):
+        create_then_download(self.user)
+
+        self.assert_no_errors('create', 'status', 'time_to_ready',
+                              'download_bundle', 'detail', 'download_file')
+
+    def test_previews(self):
+        debounced_previews(self.user)
+
+        self.assert_no_errors('preview')
+
+    def test_anonymous_download(self):
+        anonymous_download(self.user)
+
+        self.assert_no_errors('download_anonymous')
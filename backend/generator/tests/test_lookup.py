@@ -0,0 +1,60 @@
+"""
+Tests for the memory-mapped color lookup tables.
+"""
+import shutil
+import tempfile
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+
+from generator import lookup
+from generator.generator import (
+    compute_hex_to_hsb,
+    compute_rgb_to_cmyk,
+    hex_to_hsb,
+    hex_to_rgb,
+    rgb_to_cmyk,
+)
+
+
+# Build tables for the first 4096 colors only to keep the tests fast
+@patch.object(lookup, 'COLOR_COUNT', 1 << 12)
+class ColorTableTests(SimpleTestCase):
+    """Test building and reading the lookup tables"""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='color_tables_')
+        self.addCleanup(shutil.rmtree, self.directory, ignore_errors=True)
+        lookup.reset_color_tables()
+        self.addCleanup(lookup.reset_color_tables)
+
+    def test_missing_tables_fall_back_to_computation(self):
+        with override_settings(COLOR_TABLE_DIR=self.directory):
+            self.assertIsNone(lookup.get_color_tables())
+            self.assertEqual(
+                hex_to_hsb('#000abc'), compute_hex_to_hsb('#000abc')
+            )
+
+    def test_tables_match_computed_values(self):
+        call_command(
+            'build_color_tables', output=self.directory, stdout=StringIO()
+        )
+
+        with override_settings(COLOR_TABLE_DIR=self.directory):
+            self.assertIsNotNone(lookup.get_color_tables())
+            for packed in range(0, 1 << 12, 7):
+                color = '#%06x' % packed
+                rgb = hex_to_rgb(color)
+                self.assertEqual(hex_to_hsb(color), compute_hex_to_hsb(color))
+                self.assertEqual(rgb_to_cmyk(rgb), compute_rgb_to_cmyk(rgb))
+
+    def test_incomplete_table_is_ignored(self):
+        with open(f'{self.directory}/{lookup.HSB_TABLE}', 'wb') as f:
+            f.write(b'\0' * 16)
+        with open(f'{self.directory}/{lookup.CMYK_TABLE}', 'wb') as f:
+            f.write(b'\0' * 16)
+
+        with override_settings(COLOR_TABLE_DIR=self.directory):
+            self.assertIsNone(lookup.get_color_tables())
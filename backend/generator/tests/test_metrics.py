@@ -0,0 +1,183 @@
+"""
+Tests for the Prometheus metrics.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from prometheus_client import CollectorRegistry, multiprocess
+from prometheus_client.parser import text_string_to_metric_families
+
+from generator import metrics
+from generator.generator import PaletteGenerator
+from generator.models import GenerationJob, Palette
+
+User = get_user_model()
+
+# Observes one render in a fresh process, writing to PROMETHEUS_MULTIPROC_DIR
+OBSERVE_RENDER = """
+import django
+django.setup()
+from generator.metrics import RENDER_SECONDS
+RENDER_SECONDS.labels(format='css').observe(0.5)
+"""
+
+
+def samples(content):
+    """{(name, sorted label items): value} of a text exposition."""
+    return {
+        (sample.name, tuple(sorted(sample.labels.items()))): sample.value
+        for family in text_string_to_metric_families(content.decode())
+        for sample in family.samples
+    }
+
+
+def sample(content, name, **labels):
+    return samples(content).get((name, tuple(sorted(labels.items()))))
+
+
+class MetricsEndpointTests(TestCase):
+    """/metrics serves the generator and API metrics"""
+
+    def scrape(self, **headers):
+        res = self.client.get(reverse('metrics'), **headers)
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res['Content-Type'].startswith('text/plain'))
+        return res.content
+
+    def test_render_and_cache_metrics(self):
+        before = self.scrape()
+
+        PaletteGenerator(
+            'Metrics', '#123456', generate=False
+        ).render('css')
+        after = self.scrape()
+
+        count = 'palgen_render_seconds_count'
+        self.assertEqual(
+            sample(after, count, format='css'),
+            (sample(before, count, format='css') or 0) + 1
+        )
+        self.assertGreaterEqual(sample(
+            after, 'palgen_cache_lookups_total',
+            cache='palette', result='miss'
+        ), 1)
+
+    def test_request_latency_by_view(self):
+        self.client.get(reverse('palette-list'))
+
+        content = self.scrape()
+
+        self.assertGreaterEqual(sample(
+            content, 'palgen_request_seconds_count',
+            view='palette-list', method='GET', status='401'
+        ), 1)
+
+    def test_queue_depth(self):
+        user = User.objects.create_user(
+            email='metrics@example.com', first_name='Metrics',
+            last_name='User', password='metricspass123'
+        )
+        palette = Palette.objects.create(
+            name='Queued', primary='#3366cc', user=user
+        )
+        waited = timezone.now() - timedelta(seconds=30)
+        for job_status in ('queued', 'queued', 'running', 'done'):
+            GenerationJob.objects.create(
+                palette=palette, status=job_status, run_after=waited
+            )
+
+        content = self.scrape()
+
+        jobs = 'palgen_generation_jobs'
+        self.assertEqual(sample(content, jobs, status='queued'), 2)
+        self.assertEqual(sample(content, jobs, status='running'), 1)
+        self.assertEqual(sample(content, jobs, status='failed'), 0)
+        self.assertGreaterEqual(
+            sample(content, 'palgen_generation_queue_oldest_seconds'), 30
+        )
+
+    def test_queue_errors_do_not_fail_scrape(self):
+        with patch.object(metrics.QueueCollector, 'collect',
+                          side_effect=RuntimeError('database down')):
+            content = self.scrape()
+
+        self.assertIn(b'palgen_render_seconds', content)
+        self.assertNotIn(b'palgen_generation_jobs{', content)
+
+    @override_settings(METRICS_TOKEN='s3cret')
+    def test_token_required_when_set(self):
+        url = reverse('metrics')
+
+        self.assertEqual(self.client.get(url).status_code, 401)
+        self.assertEqual(
+            self.client.get(
+                url, HTTP_AUTHORIZATION='Bearer wrong'
+            ).status_code,
+            401
+        )
+        self.scrape(HTTP_AUTHORIZATION='Bearer s3cret')
+
+
+class MultiprocessTests(TestCase):
+    """Metrics of several processes are added up"""
+
+    def setUp(self):
+        self.path = tempfile.mkdtemp(prefix='palette_metrics_')
+        self.addCleanup(shutil.rmtree, self.path, ignore_errors=True)
+
+    def observe_in_process(self):
+        env = dict(os.environ, PROMETHEUS_MULTIPROC_DIR=self.path)
+        subprocess.run(
+            [sys.executable, '-c', OBSERVE_RENDER], check=True, env=env,
+            cwd=os.path.dirname(os.path.dirname(metrics.__file__))
+        )
+
+    def collect(self):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry, path=self.path)
+        return {
+            sample.name: sample.value
+            for family in registry.collect()
+            if family.name == 'palgen_render_seconds'
+            for sample in family.samples
+            if sample.labels.get('format') == 'css'
+            and 'le' not in sample.labels
+        }
+
+    def test_processes_are_added_up(self):
+        self.observe_in_process()
+        self.observe_in_process()
+
+        values = self.collect()
+
+        self.assertEqual(values['palgen_render_seconds_count'], 2)
+        self.assertEqual(values['palgen_render_seconds_sum'], 1.0)
+
+    def test_reset_keeps_own_files(self):
+        self.observe_in_process()
+        own = os.path.join(self.path, f'gauge_livesum_{os.getpid()}.db')
+        open(own, 'wb').close()
+
+        with patch.object(metrics, 'MULTIPROC_DIR', self.path):
+            metrics.reset_multiprocess_dir()
+
+        self.assertEqual(os.listdir(self.path), [os.path.basename(own)])
+
+    def test_dead_process_live_gauges_dropped(self):
+        for name in ('gauge_livesum_123.db', 'counter_123.db'):
+            open(os.path.join(self.path, name), 'wb').close()
+
+        with patch.object(metrics, 'MULTIPROC_DIR', self.path):
+            metrics.mark_process_dead(123)
+
+        # Counters of dead processes still count
+        self.assertEqual(os.listdir(self.path), ['counter_123.db'])
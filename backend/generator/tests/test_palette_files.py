@@ -0,0 +1,214 @@
+"""
+Tests for lazily generated palette files.
+"""
+import io
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator import palette_files
+from generator.generator import PaletteGenerator
+from generator.models import (
+    Palette,
+    PaletteArtifact,
+    PaletteFile,
+    PaletteFileType,
+)
+
+User = get_user_model()
+
+
+@override_settings(PALETTE_EAGER_FORMATS=[], PALETTE_GENERATION_QUEUE=False)
+class LazyPaletteFileTests(APITestCase):
+    """Formats are rendered on first download, once"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='palette_media_')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        for ext in ('png', 'xlsx', 'css', 'ts', 'dart'):
+            PaletteFileType.objects.create(
+                name=ext.upper(), description=ext, file_extension=ext
+            )
+        self.user = User.objects.create_user(
+            email='lazy@example.com', first_name='Lazy',
+            last_name='User', password='lazypass123'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def create_palette(self, **data):
+        res = self.client.post(reverse('palette-list'), {
+            'name': 'Lazy', 'primary': '#3366cc', 'secondary': '#ff9900',
+            **data
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return Palette.objects.get(id=res.data['id'])
+
+    def test_create_leaves_files_pending(self):
+        palette = self.create_palette()
+
+        self.assertEqual(
+            palette.files.filter(status=PaletteFile.PENDING).count(),
+            PaletteFileType.objects.count()
+        )
+        self.assertFalse(PaletteArtifact.objects.exists())
+        self.assertIsNone(palette.bundle_path)
+        self.assertFalse(palette.files.exclude(file_path='').exists())
+
+    @override_settings(PALETTE_EAGER_FORMATS=['css'])
+    def test_eager_formats_rendered_at_create(self):
+        palette = self.create_palette()
+
+        ready = palette.files.filter(status=PaletteFile.READY)
+        self.assertEqual(
+            [f.file_type.file_extension for f in ready], ['css']
+        )
+        self.assertEqual(PaletteArtifact.objects.count(), 1)
+
+    def test_file_download_renders_once(self):
+        palette = self.create_palette()
+        css = palette.files.get(file_type__file_extension='css')
+        url = reverse('palette-files-download', args=[css.id])
+
+        with patch('generator.palette_files.render_artifacts',
+                   wraps=palette_files.render_artifacts) as render:
+            first = b''.join(self.client.get(url).streaming_content)
+            second = b''.join(self.client.get(url).streaming_content)
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertIn(b'--primary-500:', first)
+        css.refresh_from_db()
+        self.assertEqual(css.status, PaletteFile.READY)
+        self.assertEqual(css.artifact.ref_count, 1)
+        # Other formats are still waiting for their first download
+        self.assertEqual(
+            palette.files.filter(status=PaletteFile.PENDING).count(),
+            PaletteFileType.objects.count() - 1
+        )
+
+    def test_concurrent_first_requests_render_once(self):
+        palette = self.create_palette()
+        # Both requests loaded the row while it was still pending
+        first = palette.files.get(file_type__file_extension='ts')
+        second = PaletteFile.objects.get(pk=first.pk)
+
+        with patch('generator.palette_files.render_artifacts',
+                   wraps=palette_files.render_artifacts) as render:
+            first = palette_files.ensure_file_ready(first)
+            second = palette_files.ensure_file_ready(second)
+
+        self.assertEqual(render.call_count, 1)
+        self.assertEqual(second.status, PaletteFile.READY)
+        self.assertEqual(second.artifact_id, first.artifact_id)
+
+    def test_render_holds_no_transaction(self):
+        from django.db import connection
+
+        palette = self.create_palette()
+        css = palette.files.get(file_type__file_extension='css')
+        # The test case's own transaction
+        depth = len(connection.atomic_blocks)
+        seen = []
+        original = palette_files.render_artifacts
+
+        def render(*args, **kwargs):
+            seen.append(len(connection.atomic_blocks))
+            return original(*args, **kwargs)
+
+        with patch('generator.palette_files.render_artifacts',
+                   side_effect=render):
+            palette_files.ensure_file_ready(css)
+
+        self.assertEqual(seen, [depth])
+        css.refresh_from_db()
+        self.assertEqual(css.status, PaletteFile.READY)
+
+    def test_bundle_download_renders_pending_files(self):
+        palette = self.create_palette()
+
+        res = self.client.get(reverse('palette-download', args=[palette.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertEqual(
+            sorted(archive.namelist()),
+            sorted(f.file_name for f in palette.files.all())
+        )
+        self.assertFalse(
+            palette.files.filter(status=PaletteFile.PENDING).exists()
+        )
+        palette.refresh_from_db()
+        self.assertEqual(int(res['Content-Length']), palette.bundle_size)
+
+    def test_failed_file_render_stays_pending(self):
+        palette = self.create_palette()
+        css = palette.files.get(file_type__file_extension='css')
+        url = reverse('palette-files-download', args=[css.id])
+
+        failure = ({}, {'css': RuntimeError('broken')})
+        with patch.object(PaletteGenerator, 'render_many',
+                          return_value=failure):
+            res = self.client.get(url)
+
+        self.assertEqual(
+            res.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+        self.assertIn('broken', res.data['error'])
+        css.refresh_from_db()
+        self.assertEqual(css.status, PaletteFile.PENDING)
+        # Tried again on the next download
+        res = self.client.get(url)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_bundle_skips_failed_formats(self):
+        palette = self.create_palette()
+        render_many = PaletteGenerator.render_many
+
+        def fail_css(generator, extensions=None, pool=None):
+            if list(extensions) == ['css']:
+                return {}, {'css': RuntimeError('broken')}
+            return render_many(generator, extensions, pool)
+
+        with patch.object(PaletteGenerator, 'render_many', fail_css):
+            res = self.client.get(
+                reverse('palette-download', args=[palette.id])
+            )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['X-Missing-Formats'], 'css')
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertEqual(
+            sorted(archive.namelist()),
+            sorted(f.file_name for f in palette.files.exclude(
+                file_type__file_extension='css'
+            ))
+        )
+        palette.refresh_from_db()
+        # An incomplete bundle is not kept
+        self.assertIsNone(palette.bundle_path)
+
+    def test_pending_image_keeps_profile(self):
+        palette = self.create_palette(png_profile='webp')
+        image = palette.files.get(file_type__file_extension='png')
+
+        self.assertEqual(palette.png_profile, 'webp')
+        self.assertEqual(image.file_name, 'Lazy-color-palette.webp')
+        res = self.client.get(
+            reverse('palette-files-download', args=[image.id])
+        )
+        self.assertEqual(res['Content-Type'], 'image/webp')
+        self.assertTrue(b''.join(res.streaming_content).startswith(b'RIFF'))
@@ -0,0 +1,176 @@
+"""
+Tests for rendering formats on worker pools.
+"""
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+import openpyxl
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator.artifacts import store_artifacts
+from generator.formats import FORMATS
+from generator.generator import FormatRenderError, PaletteGenerator
+from generator.models import Palette, PaletteFile, PaletteFileType
+from generator.pools import get_render_pool
+
+User = get_user_model()
+
+
+def sheet_values(content):
+    sheet = openpyxl.load_workbook(io.BytesIO(content)).active
+    return list(sheet.iter_rows(values_only=True))
+
+
+def fail(generator, fp):
+    raise RuntimeError('renderer exploded')
+
+
+def failing_format(extension):
+    """Patch a registered format's writer to raise."""
+    return patch.dict(
+        FORMATS, {extension: FORMATS[extension]._replace(write=fail)}
+    )
+
+
+class RenderPoolTests(SimpleTestCase):
+    """Formats render the same on every pool and fail independently"""
+
+    def generator(self, **kwargs):
+        return PaletteGenerator(
+            'Pool', '#3366cc', '#ff9900', generate=False, **kwargs
+        )
+
+    def test_pools_are_shared(self):
+        self.assertIsNone(get_render_pool('serial'))
+        self.assertIs(get_render_pool('thread'), get_render_pool('thread'))
+        with self.assertRaises(ValueError):
+            get_render_pool('gpu')
+
+    @override_settings(PALETTE_RENDER_POOL='thread')
+    def test_default_pool_from_settings(self):
+        with patch('generator.generator.get_render_pool',
+                   wraps=get_render_pool) as get_pool:
+            self.generator().render_many(['css', 'ts'])
+
+        get_pool.assert_called_once_with(None)
+
+    def test_pools_match_serial_output(self):
+        generator = self.generator()
+        formats = ['png', 'xlsx', 'css', 'dart']
+        serial, errors = generator.render_many(formats, pool='serial')
+        self.assertEqual(errors, {})
+        self.assertEqual(list(serial), formats)
+
+        for kind in ('thread', 'process'):
+            contents, errors = generator.render_many(formats, pool=kind)
+            self.assertEqual(errors, {}, kind)
+            self.assertEqual(list(contents), formats, kind)
+            for ext in ('png', 'css', 'dart'):
+                self.assertEqual(contents[ext], serial[ext], (kind, ext))
+            # Workbooks carry their creation time; compare the cells
+            self.assertEqual(
+                sheet_values(contents['xlsx']), sheet_values(serial['xlsx'])
+            )
+
+    def test_failed_format_does_not_stop_others(self):
+        generator = self.generator()
+
+        with failing_format('xlsx'):
+            contents, errors = generator.render_many(
+                ['css', 'xlsx', 'ts'], pool='thread'
+            )
+
+        self.assertEqual(list(contents), ['css', 'ts'])
+        self.assertEqual(list(errors), ['xlsx'])
+        self.assertIsInstance(errors['xlsx'], RuntimeError)
+
+    def test_generate_files_reports_failures(self):
+        output_dir = tempfile.mkdtemp(prefix='palette_pool_')
+        self.addCleanup(shutil.rmtree, output_dir, ignore_errors=True)
+
+        for kind in ('serial', 'thread'):
+            with override_settings(PALETTE_RENDER_POOL=kind), \
+                    failing_format('css'), \
+                    self.assertRaisesMessage(RuntimeError, 'exploded'):
+                PaletteGenerator(
+                    kind, '#3366cc', base_dir=output_dir,
+                    formats=['css', 'ts']
+                )
+
+            self.assertTrue(os.path.exists(
+                os.path.join(output_dir, f'{kind}-color-palette.ts')
+            ))
+            # No empty file is left for the failed format
+            self.assertFalse(os.path.exists(
+                os.path.join(output_dir, f'{kind}-color-palette.css')
+            ))
+
+
+@override_settings(
+    PALETTE_EAGER_FORMATS=list(FORMATS), PALETTE_GENERATION_QUEUE=False
+)
+class PartialStoreTests(APITestCase):
+    """Formats that fail to render are skipped when errors are collected"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='palette_media_')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        for ext in ('png', 'xlsx', 'css', 'ts', 'dart'):
+            PaletteFileType.objects.create(
+                name=ext.upper(), description=ext, file_extension=ext
+            )
+        user = User.objects.create_user(
+            email='partial@example.com', first_name='Partial',
+            last_name='User', password='partialpass123'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+
+    def test_store_artifacts_collects_errors(self):
+        errors = {}
+        with failing_format('xlsx'):
+            artifacts = store_artifacts(
+                'Partial', '#3366cc', extensions=['css', 'xlsx'],
+                errors=errors
+            )
+            with self.assertRaises(FormatRenderError):
+                store_artifacts('Partial', '#3366cc', extensions=['xlsx'])
+
+        self.assertEqual(list(artifacts), ['css'])
+        self.assertEqual(list(errors), ['xlsx'])
+
+    def test_failed_eager_format_left_pending(self):
+        with failing_format('xlsx'):
+            res = self.client.post(reverse('palette-list'), {
+                'name': 'Partial', 'primary': '#3366cc'
+            }, format='json')
+
+        palette = Palette.objects.get(id=res.data['id'])
+        self.assertIsNone(palette.error_message)
+        xlsx = palette.files.get(file_type__file_extension='xlsx')
+        self.assertEqual(xlsx.status, PaletteFile.PENDING)
+        self.assertEqual(
+            palette.files.filter(status=PaletteFile.READY).count(),
+            palette.files.count() - 1
+        )
+
+        # The next download renders it with the working writer
+        res = self.client.get(
+            reverse('palette-files-download', args=[xlsx.id])
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        xlsx.refresh_from_db()
+        self.assertEqual(xlsx.status, PaletteFile.READY)
@@ -0,0 +1,68 @@
+"""
+Tests for the palette preview endpoints.
+"""
+import json
+
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+
+class PalettePreviewTests(APITestCase):
+    """Test single and batch palette previews"""
+
+    def test_preview_returns_all_families(self):
+        res = self.client.post(reverse('palette-preview'), {
+            'primary': '#3366cc',
+            'secondary': '#ff9900',
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            list(res.data),
+            ['primary', 'secondary', 'neutral', 'green', 'orange', 'red',
+             'blue'],
+        )
+        primary = res.data['primary']['shades']
+        self.assertEqual(primary['500']['hex'], '#3366cc')
+
+    @override_settings(PALETTE_BATCH_PREVIEW_CHUNK=2)
+    def test_batch_preview_streams_one_line_per_color_set(self):
+        color_sets = [
+            {'primary': '#3366cc', 'secondary': '#ff9900'},
+            {'primary': 'not-a-color-at-all'},
+            {'primary': '#12ab34', 'tertiary': '#abcdef',
+             'include_tertiary': True},
+        ]
+
+        res = self.client.post(
+            reverse('palette-preview-batch'),
+            {'palettes': color_sets},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/x-ndjson')
+        lines = [
+            json.loads(line)
+            for line in b''.join(res.streaming_content).splitlines()
+        ]
+        self.assertEqual([line['index'] for line in lines], [0, 1, 2])
+        self.assertIn('error', lines[1])
+        self.assertIn('tertiary', lines[2]['palette'])
+
+        single = self.client.post(
+            reverse('palette-preview'), color_sets[0], format='json'
+        )
+        self.assertEqual(lines[0]['palette'], json.loads(single.content))
+
+    @override_settings(PALETTE_BATCH_PREVIEW_LIMIT=2)
+    def test_batch_preview_rejects_oversized_batches(self):
+        res = self.client.post(
+            reverse('palette-preview-batch'),
+            {'palettes': [{'primary': '#3366cc'}] * 3},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
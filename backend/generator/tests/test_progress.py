@@ -0,0 +1,223 @@
+"""
+Tests for the live palette status endpoints.
+"""
+import json
+import shutil
+import tempfile
+import threading
+import time
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator import jobs, progress
+from generator.models import Palette, PaletteFileType
+
+User = get_user_model()
+
+
+def read_events(chunks):
+    """Parse server-sent event chunks into (event, data) pairs."""
+    events = []
+    for block in b''.join(chunks).decode().split('\n\n'):
+        fields = dict(
+            line.split(': ', 1) for line in block.splitlines()
+            if ': ' in line and not line.startswith(':')
+        )
+        if 'event' in fields:
+            events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+class NotifierTests(SimpleTestCase):
+    """Waiters wake on notifications or when they time out"""
+
+    def test_wait_times_out(self):
+        notifier = progress.Notifier()
+
+        start = time.monotonic()
+        self.assertEqual(notifier.wait(notifier.version, 0.05), 0)
+        self.assertGreaterEqual(time.monotonic() - start, 0.05)
+
+    def test_notify_wakes_waiters(self):
+        notifier = progress.Notifier()
+        timer = threading.Timer(0.05, notifier.notify)
+        timer.start()
+        self.addCleanup(timer.cancel)
+
+        self.assertEqual(notifier.wait(0, 5), 1)
+        # A notification the waiter already missed returns at once
+        self.assertEqual(notifier.wait(0, 5), 1)
+
+
+class PublishTests(TestCase):
+    """Published changes wake waiters once committed"""
+
+    def test_notifies_on_commit(self):
+        version = progress.notifier.version
+
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            progress.publish(1)
+            self.assertEqual(progress.notifier.version, version)
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertGreater(progress.notifier.version, version)
+
+    def test_polls_without_listen_notify(self):
+        # The test database is SQLite
+        self.assertFalse(progress.start_listener())
+
+
+@override_settings(
+    PALETTE_GENERATION_QUEUE=True, PALETTE_EAGER_FORMATS=['css'],
+    PALETTE_EVENTS_TIMEOUT=1, PALETTE_EVENTS_HEARTBEAT=60,
+    PALETTE_EVENTS_POLL_INTERVAL=0.01
+)
+class PaletteStatusTests(APITestCase):
+    """Clients follow a palette's generation without polling the list"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='palette_media_')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        for ext in ('png', 'xlsx', 'css', 'ts', 'dart'):
+            PaletteFileType.objects.create(
+                name=ext.upper(), description=ext, file_extension=ext
+            )
+        self.user = User.objects.create_user(
+            email='status@example.com', first_name='Status',
+            last_name='User', password='statuspass123'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def create_palette(self, name='Live'):
+        res = self.client.post(reverse('palette-list'), {
+            'name': name, 'primary': '#3366cc'
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return Palette.objects.get(id=res.data['id'])
+
+    def test_status_of_queued_palette(self):
+        palette = self.create_palette()
+
+        res = self.client.get(reverse('palette-status', args=[palette.id]))
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['status'], 'processing')
+        self.assertEqual(res.data['stage'], 'queued')
+        self.assertEqual(res.data['attempts'], 0)
+        self.assertTrue(res.data['cursor'])
+
+    def test_long_poll_waits_for_change(self):
+        palette = self.create_palette()
+        url = reverse('palette-status', args=[palette.id])
+        cursor = self.client.get(url).data['cursor']
+
+        start = time.monotonic()
+        res = self.client.get(url, {'since': cursor, 'wait': 0.2})
+
+        # Nothing changed, so the request waited it out
+        self.assertGreaterEqual(time.monotonic() - start, 0.2)
+        self.assertEqual(res.data['cursor'], cursor)
+
+        jobs.work(once=True)
+        res = self.client.get(url, {'since': cursor, 'wait': 5})
+
+        self.assertEqual(res.data['status'], 'completed')
+        self.assertIsNone(res.data['stage'])
+        self.assertNotEqual(res.data['cursor'], cursor)
+
+    def test_long_poll_rejects_bad_wait(self):
+        palette = self.create_palette()
+        url = reverse('palette-status', args=[palette.id])
+
+        for wait in ('soon', '-1', 'nan'):
+            res = self.client.get(url, {'wait': wait})
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_job_publishes_each_stage(self):
+        palette = self.create_palette()
+        palettes = Palette.objects.filter(pk=palette.pk)
+        seen = []
+
+        def record(palette_id):
+            state = progress.palette_states(palettes)[palette_id]
+            seen.append((state['status'], state['stage']))
+
+        with patch('generator.jobs.publish', side_effect=record), \
+                patch('generator.palette_files.publish', side_effect=record):
+            jobs.work(once=True)
+
+        self.assertEqual(seen, [
+            ('processing', 'running'),
+            ('processing', 'rendering css'),
+            ('processing', 'thumbnail'),
+            ('completed', None),
+        ])
+
+    def test_event_stream_until_finished(self):
+        palette = self.create_palette()
+
+        res = self.client.get(
+            reverse('palette-events', args=[palette.id]),
+            HTTP_ACCEPT='text/event-stream'
+        )
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'text/event-stream')
+        stream = iter(res.streaming_content)
+        self.assertEqual(next(stream), b'retry: 3000\n\n')
+        [(event, state)] = read_events([next(stream)])
+        self.assertEqual((event, state['stage']), ('status', 'queued'))
+
+        jobs.work(once=True)
+        # The stream sends the change and ends with it
+        [(event, state)] = read_events(stream)
+
+        self.assertEqual(state['status'], 'completed')
+
+    def test_event_stream_of_all_palettes(self):
+        first = self.create_palette('First')
+        second = self.create_palette('Second')
+
+        res = self.client.get(
+            reverse('palette-list-events'), HTTP_ACCEPT='text/event-stream'
+        )
+        stream = iter(res.streaming_content)
+        next(stream)
+        initial = read_events([next(stream), next(stream)])
+        self.assertEqual(
+            sorted(state['id'] for _, state in initial),
+            [first.id, second.id]
+        )
+
+        self.client.delete(reverse('palette-detail', args=[second.id]))
+        jobs.work(once=True)
+        # The stream ends after PALETTE_EVENTS_TIMEOUT
+        states = {state['id']: state for _, state in read_events(stream)}
+
+        self.assertEqual(states[first.id]['status'], 'completed')
+        self.assertEqual(states[second.id], {
+            'id': second.id, 'status': 'deleted'
+        })
+
+    def test_events_require_authentication(self):
+        palette = self.create_palette()
+        self.client.credentials()
+
+        res = self.client.get(
+            reverse('palette-events', args=[palette.id]),
+            HTTP_ACCEPT='text/event-stream'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn('detail', json.loads(res.content))
@@ -0,0 +1,142 @@
+"""
+Tests for rendering palette files in memory.
+"""
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from generator.formats import DOWNLOAD_FORMATS
+from generator.generator import PaletteGenerator
+
+
+class RenderTests(SimpleTestCase):
+    """render() matches the generated files without touching the disk"""
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp(prefix='palette_render_')
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+
+    def test_no_files_without_generate(self):
+        base_dir = os.path.join(self.output_dir, 'unused')
+
+        generator = PaletteGenerator(
+            'Memory', '#3366cc', base_dir=base_dir, generate=False
+        )
+
+        self.assertFalse(os.path.exists(base_dir))
+        self.assertEqual(generator.user_data, {})
+        self.assertIn('Primary', generator.swatches)
+
+    def test_render_matches_generated_files(self):
+        generated = PaletteGenerator(
+            'Memory', '#3366cc', '#ff9900', base_dir=self.output_dir,
+            formats=['css', 'svg', 'dart', 'json']
+        )
+        in_memory = PaletteGenerator(
+            'Memory', '#3366cc', '#ff9900', generate=False
+        )
+
+        for ext in generated.formats:
+            with open(generated.get_output_path(ext), 'rb') as f:
+                self.assertEqual(in_memory.render(ext), f.read(), ext)
+
+    def test_render_to_stream(self):
+        generator = PaletteGenerator('Memory', '#3366cc', generate=False)
+        stream = io.BytesIO()
+
+        self.assertIs(generator.render('ts', stream), stream)
+        self.assertEqual(stream.getvalue(), generator.render('ts'))
+        with self.assertRaises(ValueError):
+            generator.render('exe')
+
+    def test_render_files_names(self):
+        generator = PaletteGenerator(
+            'Memory', '#3366cc', formats=['png', 'css'], png_profile='webp',
+            generate=False
+        )
+
+        names = [name for name, _ in generator.render_files()]
+
+        self.assertEqual(
+            names, ['Memory-color-palette.webp', 'Memory-color-palette.css']
+        )
+
+
+class InMemoryEndpointTests(APITestCase):
+    """Anonymous downloads and file previews render without temp files"""
+
+    def test_anonymous_download_zip(self):
+        with patch('tempfile.mkdtemp') as mkdtemp:
+            res = self.client.post(reverse('palette-download-anonymous'), {
+                'name': 'Zip Me', 'primary': '#3366cc',
+                'secondary': '#ff9900'
+            }, format='json')
+
+        mkdtemp.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertIn('zip-me-palette-files.zip', res['Content-Disposition'])
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertEqual(
+            archive.namelist(),
+            [f'Zip Me-color-palette.{ext}' for ext in DOWNLOAD_FORMATS]
+        )
+
+    def test_anonymous_download_extra_formats_opt_in(self):
+        res = self.client.post(reverse('palette-download-anonymous'), {
+            'name': 'Zip Me', 'primary': '#3366cc', 'secondary': '#ff9900',
+            'formats': ['css', 'svg', 'swift']
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        archive = zipfile.ZipFile(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertEqual(
+            archive.namelist(),
+            [f'Zip Me-color-palette.{ext}' for ext in ('css', 'svg', 'swift')]
+        )
+
+    def test_anonymous_download_unknown_format(self):
+        res = self.client.post(reverse('palette-download-anonymous'), {
+            'name': 'Zip Me', 'primary': '#3366cc', 'secondary': '#ff9900',
+            'formats': ['exe']
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_anonymous_download_render_error(self):
+        render = PaletteGenerator.render
+
+        def fail_css(generator, extension, stream=None):
+            if extension == 'css':
+                raise RuntimeError('broken writer')
+            return render(generator, extension, stream)
+
+        with patch.object(PaletteGenerator, 'render', fail_css):
+            res = self.client.post(reverse('palette-download-anonymous'), {
+                'name': 'Zip Me', 'primary': '#3366cc',
+                'secondary': '#ff9900'
+            }, format='json')
+
+        self.assertEqual(
+            res.status_code, status.HTTP_500_INTERNAL_SERVER_ERROR
+        )
+        self.assertFalse(res.streaming)
+        self.assertEqual(res.data['failed_formats'], ['css'])
+
+    def test_preview_file_format(self):
+        res = self.client.post(reverse('palette-preview'), {
+            'primary': '#3366cc', 'secondary': '#ff9900',
+            'file_format': 'svg'
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'image/svg+xml')
+        self.assertTrue(res.content.startswith(b'<?xml'))
+        self.assertIn('inline', res['Content-Disposition'])
@@ -0,0 +1,124 @@
+"""
+Tests for the cached PNG sheet renderer.
+"""
+import io
+
+from django.test import SimpleTestCase, override_settings
+from PIL import Image, ImageChops, ImageDraw
+
+from generator.engine import palette_swatches
+from generator.generator import generate_palette
+from generator.renderer import (
+    IMAGE_PROFILES,
+    PaletteSheetRenderer,
+    encode_image,
+    resolve_image_profile,
+    sheet_layout,
+)
+
+
+class PaletteSheetRendererTests(SimpleTestCase):
+    """Cached glyph rendering matches Pillow's own text drawing"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.renderer = PaletteSheetRenderer()
+
+    def test_text_bbox_matches_font(self):
+        for font in ('regular', 'bold'):
+            rasterizer = self.renderer.fonts[font]
+            for text in ('HSB - (204, 87.5, 100)', 'AV To Wa', 'Ñeutral'):
+                self.assertEqual(
+                    self.renderer.text_bbox(text, font),
+                    rasterizer.font.getbbox(text)
+                )
+
+    def test_draw_text_matches_pillow(self):
+        lines = ('CMYK - (12, 0, 100, 3)', 'HEX - #3366cc', 'AVAT yo', 'W')
+        for font in ('regular', 'bold'):
+            for xy in ((10, 10), (10.5, 10), (10, 10.5), (10.5, 10.5)):
+                for text in lines:
+                    expected = Image.new('RGB', (300, 40), (51, 102, 204))
+                    ImageDraw.Draw(expected).text(
+                        xy, text, (255, 255, 255),
+                        font=self.renderer.fonts[font].font
+                    )
+                    actual = Image.new('RGB', (300, 40), (51, 102, 204))
+                    self.renderer.draw_text(
+                        ImageDraw.Draw(actual), xy, text, font,
+                        (255, 255, 255)
+                    )
+                    self.assertIsNone(
+                        ImageChops.difference(expected, actual).getbbox(),
+                        f'{text!r} at {xy} in {font}'
+                    )
+
+    def test_layout_boxes(self):
+        layout = sheet_layout((100, 90), 2, 3)
+
+        self.assertEqual(layout.boxes[1][2], (52, 62, 98, 88))
+        self.assertEqual(layout.index[62, 52], 1 + 1 * 3 + 2)
+        self.assertEqual(layout.index[0, 0], 0)
+
+    def test_render_fills_swatches_and_reuses_masks(self):
+        swatches = palette_swatches(generate_palette('#3366cc', '#ff9900'))
+        renderer = PaletteSheetRenderer()
+
+        img = renderer.render(swatches, 9)
+        misses = renderer.mask_cache.misses
+        renderer.render(swatches, 9)
+
+        self.assertEqual(img.size, (1753, 1240))
+        x1, y1, _, _ = sheet_layout(img.size, len(swatches), 9).boxes[0][0]
+        self.assertEqual(
+            img.getpixel((x1, y1)), swatches['Primary']['100'].rgb
+        )
+        self.assertEqual(renderer.mask_cache.misses, misses)
+
+
+class ImageProfileTests(SimpleTestCase):
+    """Encoding profiles for the palette sheet"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.swatches = palette_swatches(generate_palette('#3366cc', '#ff9900'))
+        cls.img = PaletteSheetRenderer().render(cls.swatches, 9)
+        cls.fills = {
+            swatch.rgb for family in cls.swatches.values()
+            for swatch in family.values()
+        }
+
+    def encode(self, name):
+        buffer = io.BytesIO()
+        encode_image(
+            self.img, buffer, IMAGE_PROFILES[name], exact_colors=self.fills
+        )
+        buffer.seek(0)
+        return Image.open(buffer)
+
+    def test_lossless_profiles_round_trip(self):
+        for name in ('default', 'fast', 'webp'):
+            decoded = self.encode(name).convert('RGB')
+            self.assertIsNone(
+                ImageChops.difference(self.img, decoded).getbbox(), name
+            )
+
+    def test_small_profile_keeps_swatch_colors(self):
+        decoded = self.encode('small')
+
+        self.assertEqual(decoded.mode, 'P')
+        layout = sheet_layout(self.img.size, len(self.swatches), 9)
+        rgb = decoded.convert('RGB')
+        for j, family in enumerate(self.swatches.values()):
+            for i, swatch in enumerate(family.values()):
+                x1, y1, _, _ = layout.boxes[j][i]
+                self.assertEqual(rgb.getpixel((x1, y1)), swatch.rgb)
+
+    def test_resolve_profile(self):
+        with override_settings(PALETTE_PNG_PROFILE='fast'):
+            self.assertEqual(resolve_image_profile()[0], 'fast')
+            self.assertEqual(resolve_image_profile('webp')[0], 'webp')
+        with self.assertRaises(ValueError):
+            resolve_image_profile('gif')
@@ -0,0 +1,94 @@
+"""
+Tests for the palette similarity search.
+"""
+import shutil
+import tempfile
+
+import numpy as np
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator.models import Palette, PaletteFileType
+from generator.similarity import find_similar, palette_vectors, stored_vectors
+
+User = get_user_model()
+
+
+class SimilaritySearchTests(SimpleTestCase):
+    """Stored palettes are embedded and ranked by OKLab distance"""
+
+    def test_missing_colors_repeat_previous(self):
+        vectors = palette_vectors([('#3366cc', None, None)])
+
+        self.assertEqual(vectors.shape, (1, 9))
+        np.testing.assert_allclose(vectors[0, :3], vectors[0, 3:6])
+        np.testing.assert_allclose(vectors[0, 3:6], vectors[0, 6:])
+
+    def test_malformed_stored_colors_skipped(self):
+        ids, vectors = stored_vectors([
+            (1, '#3366cc', '#ff9900', None),
+            (2, '#zzzzzz', None, None),
+            (3, '#cc2222', None, None),
+        ])
+
+        self.assertEqual(ids, [1, 3])
+        self.assertEqual(vectors.shape, (2, 9))
+
+
+class SimilarPaletteTests(APITestCase):
+    """Test the similar endpoint"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='palette_media_')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        for ext in ('png', 'xlsx', 'css', 'ts', 'dart'):
+            PaletteFileType.objects.create(
+                name=ext.upper(), description=ext, file_extension=ext
+            )
+        self.user = User.objects.create_user(
+            email='similar@example.com', first_name='Similar',
+            last_name='User', password='similarpass123'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def create_palette(self, name, primary, secondary):
+        res = self.client.post(reverse('palette-list'), {
+            'name': name, 'primary': primary, 'secondary': secondary,
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        return res.data['id']
+
+    def test_similar_returns_nearest_palettes_first(self):
+        blue = self.create_palette('Blue', '#3366cc', '#ff9900')
+        navy = self.create_palette('Navy', '#223377', '#ff9900')
+        self.create_palette('Red', '#cc2222', '#00ff00')
+        other_user = User.objects.create_user(
+            email='other@example.com', first_name='Other', last_name='User',
+            password='otherpass123'
+        )
+        Palette.objects.create(
+            name='Theirs', primary='#3366cc', secondary='#ff9900',
+            user=other_user
+        )
+
+        res = self.client.get(reverse('palette-similar'), {
+            'primary': '#3366cd', 'secondary': '#ff9900', 'limit': 2,
+        })
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [match['palette']['id'] for match in res.data], [blue, navy]
+        )
+
+    def test_user_without_palettes(self):
+        self.assertEqual(find_similar('#3366cc', owner_id=self.user.id), [])
@@ -0,0 +1,67 @@
+"""
+Tests for shade-scale and palette specifications.
+"""
+import os
+import shutil
+import tempfile
+
+import openpyxl
+from django.test import SimpleTestCase
+
+from generator.generator import PaletteGenerator, generate_palette
+from generator.specs import DEFAULT_SPEC, PaletteSpec, ShadeScale
+
+
+class ShadeScaleTests(SimpleTestCase):
+    """Test ShadeScale definitions"""
+
+    def test_default_scale_matches_original_weights(self):
+        self.assertEqual(
+            DEFAULT_SPEC.scale.labels,
+            ('100', '200', '300', '400', '500', '600', '700', '800', '900'),
+        )
+
+    def test_from_range(self):
+        scale = ShadeScale.from_range(50, 950, 50)
+
+        self.assertEqual(len(scale.steps), 19)
+        self.assertEqual(scale.labels[0], '50')
+
+    def test_anchor_must_be_a_step(self):
+        with self.assertRaises(ValueError):
+            ShadeScale(steps=(100, 200), anchor=500)
+
+
+class PaletteSpecTests(SimpleTestCase):
+    """Test palettes generated from custom specs"""
+
+    def setUp(self):
+        self.spec = PaletteSpec(
+            scale=ShadeScale.from_range(50, 950, 50),
+            supporting=tuple((f'Hue{i}', i * 36) for i in range(9)),
+        )
+        self.output_dir = tempfile.mkdtemp(prefix='palette_spec_')
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+
+    def test_palette_uses_spec_families_and_steps(self):
+        palette = generate_palette(
+            '#3366cc', '#ff9900', '#123456', spec=self.spec
+        )
+
+        self.assertEqual(len(palette), 13)
+        self.assertEqual(list(palette['Hue3']), list(self.spec.scale.labels))
+        self.assertEqual(palette['Primary']['500'], (220, 75, 80))
+        self.assertEqual(palette['Primary']['50'], (220, 30, 100))
+
+    def test_writers_follow_the_spec(self):
+        generator = PaletteGenerator(
+            'Spec', '#3366cc', '#ff9900', base_dir=self.output_dir,
+            spec=self.spec
+        )
+
+        ws = openpyxl.load_workbook(generator.get_output_path('xlsx')).active
+        self.assertEqual(ws.max_row, 1 + len(self.spec.scale.steps))
+        self.assertEqual(ws.max_column, 1 + len(generator.palette))
+        with open(generator.get_output_path('css')) as f:
+            self.assertIn('--hue8-950:', f.read())
+        self.assertTrue(os.path.exists(generator.get_output_path('png')))
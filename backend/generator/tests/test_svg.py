@@ -0,0 +1,106 @@
+"""
+Tests for the SVG palette sheet.
+"""
+import shutil
+import tempfile
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator.engine import palette_swatches
+from generator.generator import generate_palette
+from generator.models import Palette
+from generator.renderer import SHEET_SIZE, sheet_layout
+from generator.svg import render_svg
+
+User = get_user_model()
+
+SVG = '{http://www.w3.org/2000/svg}'
+
+
+class RenderSvgTests(SimpleTestCase):
+    """The SVG sheet mirrors the PNG layout"""
+
+    def setUp(self):
+        self.swatches = palette_swatches(
+            generate_palette('#3366cc', '#ff9900')
+        )
+
+    def test_swatches_use_png_layout(self):
+        root = ElementTree.fromstring(render_svg(self.swatches, 9))
+        rects = root.findall(f'{SVG}rect')[1:]
+        layout = sheet_layout(SHEET_SIZE, len(self.swatches), 9)
+
+        self.assertEqual(root.get('width'), str(SHEET_SIZE[0]))
+        self.assertEqual(len(rects), len(self.swatches) * 9)
+        x1, y1, x2, y2 = layout.boxes[1][2]
+        rect = rects[9 + 2]
+        self.assertEqual(
+            (rect.get('x'), rect.get('y'), rect.get('width')),
+            (str(x1), str(y1), str(x2 - x1 + 1))
+        )
+        self.assertEqual(
+            rect.get('fill'), self.swatches['Secondary']['300'].hex
+        )
+
+    def test_labels(self):
+        root = ElementTree.fromstring(render_svg(self.swatches, 9))
+        texts = [text.text for text in root.iter(f'{SVG}text')]
+        swatch = self.swatches['Primary']['500']
+
+        self.assertIn('Weight - 500', texts)
+        self.assertIn(f'HEX - {swatch.hex}', texts)
+        self.assertIn(f'CMYK - {swatch.cmyk}', texts)
+        self.assertIn('Primary', texts)
+
+    def test_names_are_escaped(self):
+        swatches = {'<Brand & Co>': self.swatches['Primary']}
+
+        root = ElementTree.fromstring(render_svg(swatches, 9))
+
+        texts = [text.text for text in root.iter(f'{SVG}text')]
+        self.assertIn('<Brand & Co>', texts)
+
+
+@override_settings(PALETTE_GENERATION_QUEUE=False)
+class SvgFileTests(APITestCase):
+    """SVG files are generated and served for saved palettes"""
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp(prefix='palette_media_')
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user(
+            email='svg@example.com', first_name='Svg',
+            last_name='User', password='svgpass123'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def test_download_svg(self):
+        res = self.client.post(reverse('palette-list'), {
+            'name': 'Vector', 'primary': '#3366cc'
+        }, format='json')
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        svg = Palette.objects.get(id=res.data['id']).files.get(
+            file_type__file_extension='svg'
+        )
+
+        res = self.client.get(
+            reverse('palette-files-download', args=[svg.id])
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'image/svg+xml')
+        self.assertEqual(svg.file_name, 'Vector-color-palette.svg')
+        content = b''.join(res.streaming_content)
+        self.assertTrue(content.startswith(b'<?xml'))
@@ -0,0 +1,155 @@
+"""
+Tests for palette thumbnails.
+"""
+import io
+import os
+import shutil
+import tempfile
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from generator import thumbnails
+from generator.engine import palette_swatches
+from generator.generator import generate_palette
+from generator.models import Palette
+from generator.thumbnails import (
+    CELL_HEIGHT,
+    CELL_WIDTH,
+    render_thumbnail,
+    thumbnail_key,
+    thumbnail_path,
+)
+
+User = get_user_model()
+
+
+@override_settings(PALETTE_GENERATION_QUEUE=False)
+class PaletteThumbnailTests(APITestCase):
+    """Thumbnails are rendered once and served with long cache headers"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp(prefix='palette_media_')
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+
+        self.user = User.objects.create_user(
+            email='thumbs@example.com', first_name='Thumb',
+            last_name='User', password='thumbpass123'
+        )
+        self.client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(self.user)}'
+        )
+
+    def test_key_normalizes_colors(self):
+        self.assertEqual(
+            thumbnail_key('#3366CC', 'ff9900', ''), '3366cc-ff9900'
+        )
+        self.assertIsNone(thumbnail_key('#3366zz'))
+        self.assertIsNone(thumbnail_key('#36c'))
+
+    def test_render_uses_exact_swatch_colors(self):
+        swatches = palette_swatches(generate_palette('#3366cc', '#ff9900'))
+
+        img = render_thumbnail('#3366cc', '#ff9900').convert('RGB')
+
+        self.assertEqual(
+            img.size, (9 * CELL_WIDTH, len(swatches) * CELL_HEIGHT)
+        )
+        self.assertEqual(
+            img.getpixel((4 * CELL_WIDTH, 1 * CELL_HEIGHT)),
+            swatches['Secondary']['500'].rgb
+        )
+
+    def test_created_palette_has_cached_thumbnail(self):
+        res = self.client.post(reverse('palette-list'), {
+            'name': 'Thumb', 'primary': '#3366cc', 'secondary': '#ff9900'
+        }, format='json')
+
+        self.assertEqual(res.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            res.data['thumbnail_url'],
+            reverse('palette-thumbnail', kwargs={
+                'version': '1', 'colors': '3366cc-ff9900'
+            })
+        )
+        self.assertTrue(os.path.exists(os.path.join(
+            self.media_root, thumbnail_path('3366cc-ff9900')
+        )))
+
+        # Listing and fetching do not render again
+        self.client.credentials()
+        with patch.object(
+            thumbnails, 'render_thumbnail', wraps=render_thumbnail
+        ) as spy:
+            res = self.client.get(res.data['thumbnail_url'])
+        spy.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'image/png')
+        self.assertIn('immutable', res['Cache-Control'])
+        self.assertIn('max-age=31536000', res['Cache-Control'])
+        img = Image.open(io.BytesIO(b''.join(res.streaming_content)))
+        self.assertEqual(img.format, 'PNG')
+
+    def test_colors_without_saved_palette_not_rendered(self):
+        url = reverse('palette-thumbnail', kwargs={
+            'version': '1', 'colors': 'abcdef-123456'
+        })
+
+        self.client.credentials()
+        with patch.object(
+            thumbnails, 'render_thumbnail', wraps=render_thumbnail
+        ) as spy:
+            res = self.client.get(url)
+
+        spy.assert_not_called()
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertFalse(os.path.exists(os.path.join(
+            self.media_root, thumbnail_path('abcdef-123456')
+        )))
+
+    def test_unknown_version_or_colors_not_found(self):
+        for kwargs in ({'version': '0', 'colors': '3366cc'},
+                       {'version': '1', 'colors': '33-66'}):
+            res = self.client.get(reverse('palette-thumbnail', kwargs=kwargs))
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_palette_without_thumbnail_has_no_url(self):
+        palette = Palette.objects.create(
+            name='Old', primary='#3366cc', secondary='#ff9900',
+            user=self.user
+        )
+
+        res = self.client.get(reverse('palette-detail', args=[palette.id]))
+
+        self.assertIsNone(res.data['thumbnail_url'])
+
+    def test_build_command_backfills_and_prunes(self):
+        Palette.objects.create(
+            name='Old', primary='#3366CC', secondary='#ff9900',
+            user=self.user
+        )
+        unused = os.path.join(self.media_root, thumbnail_path('abcdef'))
+        outdated = os.path.join(
+            self.media_root, thumbnail_path('3366cc-ff9900', version='0')
+        )
+        for path in (unused, outdated):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            open(path, 'wb').close()
+
+        call_command('build_thumbnails', '--prune', stdout=io.StringIO())
+
+        self.assertTrue(os.path.exists(os.path.join(
+            self.media_root, thumbnail_path('3366cc-ff9900')
+        )))
+        self.assertFalse(os.path.exists(unused))
+        self.assertFalse(os.path.exists(outdated))
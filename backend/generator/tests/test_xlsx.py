@@ -0,0 +1,118 @@
+"""
+Tests for the XLSX palette sheet.
+"""
+import shutil
+import tempfile
+import zipfile
+from copy import copy
+
+import openpyxl
+from django.test import SimpleTestCase, override_settings
+
+from generator.generator import PaletteGenerator
+
+
+class ExcelFileTests(SimpleTestCase):
+    """The workbook has one labeled, filled cell per shade"""
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp(prefix='palette_xlsx_')
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+        self.generator = PaletteGenerator(
+            'Sheet', '#3366cc', '#ff9900', base_dir=self.output_dir,
+            formats=['xlsx']
+        )
+        self.ws = openpyxl.load_workbook(
+            self.generator.get_output_path('xlsx')
+        ).active
+
+    def test_header_and_dimensions(self):
+        names = list(self.generator.swatches)
+
+        self.assertEqual(
+            [cell.value for cell in self.ws[1]], [None] + names
+        )
+        self.assertEqual(self.ws.max_row, 10)
+        self.assertEqual(self.ws.column_dimensions['B'].width, 30)
+        self.assertEqual(self.ws.row_dimensions[2].height, 100)
+        self.assertIsNone(self.ws.row_dimensions[1].height)
+
+    def test_shade_cells(self):
+        swatch = self.generator.swatches['Secondary']['300']
+        cell = self.ws['C4']
+
+        self.assertEqual(cell.value, (
+            f"Weight - 300\nHSB - {swatch.hsb}\nRGB - {swatch.rgb}\n"
+            f"HEX - {swatch.hex}\nCMYK - {swatch.cmyk}"
+        ))
+        self.assertEqual(cell.fill.fill_type, 'solid')
+        self.assertEqual(cell.fill.fgColor.rgb, '00' + swatch.hex[1:])
+        self.assertEqual(
+            cell.font.color.rgb,
+            '00' + '{:02X}{:02X}{:02X}'.format(*swatch.contrast)
+        )
+        self.assertTrue(cell.alignment.wrap_text)
+        self.assertEqual(cell.alignment.horizontal, 'center')
+
+
+class DirectEngineTests(SimpleTestCase):
+    """The template writer matches the openpyxl writer cell for cell"""
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp(prefix='palette_xlsx_')
+        self.addCleanup(shutil.rmtree, self.output_dir, ignore_errors=True)
+
+    def generate(self, engine, *colors):
+        with override_settings(PALETTE_XLSX_ENGINE=engine):
+            generator = PaletteGenerator(
+                engine, *colors, base_dir=self.output_dir, formats=['xlsx']
+            )
+        return generator.get_output_path('xlsx')
+
+    def test_cells_match_openpyxl_engine(self):
+        for colors in (('#3366cc', '#ff9900'),
+                       ('#0a0a0a', '#fefefe', '#12ab34')):
+            expected = openpyxl.load_workbook(
+                self.generate('openpyxl', *colors)
+            ).active
+            actual = openpyxl.load_workbook(
+                self.generate('direct', *colors)
+            ).active
+
+            self.assertEqual(actual.title, expected.title)
+            self.assertEqual(
+                (actual.max_row, actual.max_column),
+                (expected.max_row, expected.max_column)
+            )
+            for row in range(1, expected.max_row + 1):
+                self.assertEqual(
+                    actual.row_dimensions[row].height,
+                    expected.row_dimensions[row].height
+                )
+            for column in range(1, expected.max_column + 1):
+                letter = openpyxl.utils.get_column_letter(column)
+                self.assertEqual(
+                    actual.column_dimensions[letter].width,
+                    expected.column_dimensions[letter].width
+                )
+            for expected_row, actual_row in zip(
+                    expected.iter_rows(), actual.iter_rows()):
+                for want, got in zip(expected_row, actual_row):
+                    for attr in ('fill', 'font', 'alignment', 'border'):
+                        self.assertEqual(
+                            copy(getattr(got, attr)),
+                            copy(getattr(want, attr)),
+                            f'{want.coordinate} {attr}'
+                        )
+                    self.assertEqual(got.value, want.value)
+
+    def test_direct_package_parts(self):
+        path = self.generate('direct', '#3366cc')
+
+        with zipfile.ZipFile(path) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertIn('xl/sharedStrings.xml', archive.namelist())
+
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            self.generate('xlsxwriter', '#3366cc')
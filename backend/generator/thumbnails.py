@@ -0,0 +1,119 @@
+"""
+Small swatch-strip thumbnails for saved palettes.
+
+A thumbnail depends only on the generator version and the palette colors, so
+it is addressed by those (``v1/3366cc-ff9900.png``): identical palettes share
+one file, the URL never changes meaning and can be cached by browsers and
+proxies indefinitely. Files are rendered once, when a saved palette's files
+are generated, and kept under MEDIA_ROOT; the public endpoint only serves
+stored files, so requests for other colors cost neither rendering nor disk.
+``manage.py build_thumbnails`` renders the thumbnails of palettes saved
+before they existed and, with ``--prune``, deletes those no palette uses.
+"""
+import os
+import re
+import threading
+
+import numpy as np
+from django.conf import settings
+from PIL import Image
+
+from .engine import palette_swatches
+from .generator import GENERATOR_VERSION, generate_palette, normalize_hex
+
+
+THUMBNAIL_DIR = 'thumbnails'
+
+# Pixel size of one shade in the strip; families are stacked as rows
+CELL_WIDTH = 24
+CELL_HEIGHT = 12
+
+COLORS_PATTERN = re.compile(r'^[0-9a-f]{6}(?:-[0-9a-f]{6}){0,2}$')
+
+
+def thumbnail_key(primary, secondary=None, tertiary=None):
+    """
+    URL-safe key for a palette's colors, e.g. ``3366cc-ff9900``, or None if
+    a color is not a six-digit hex code.
+    """
+    colors = [normalize_hex(c) for c in (primary, secondary, tertiary)]
+    if colors[2] and not colors[1]:
+        # The key is positional; a lone tertiary would read as secondary
+        return None
+    key = '-'.join(c[1:] for c in colors if c)
+    return key if COLORS_PATTERN.match(key) else None
+
+
+def thumbnail_path(key, version=GENERATOR_VERSION):
+    """Storage path, relative to MEDIA_ROOT, of a thumbnail."""
+    return os.path.join(THUMBNAIL_DIR, f'v{version}', f'{key}.png')
+
+
+def thumbnail_exists(key):
+    """Whether the thumbnail for ``key`` is stored."""
+    return os.path.exists(
+        os.path.join(settings.MEDIA_ROOT, thumbnail_path(key))
+    )
+
+
+def render_thumbnail(primary, secondary=None, tertiary=None):
+    """
+    Palette-mode image with one row per color family and one cell per
+    shade, using the exact swatch colors.
+    """
+    swatches = palette_swatches(generate_palette(primary, secondary, tertiary))
+    colors = [
+        swatch.rgb
+        for shades in swatches.values()
+        for swatch in shades.values()
+    ]
+    total_shades = len(next(iter(swatches.values())))
+    cells = np.arange(len(colors), dtype=np.uint8).reshape(-1, total_shades)
+    pixels = np.repeat(
+        np.repeat(cells, CELL_HEIGHT, axis=0), CELL_WIDTH, axis=1
+    )
+    img = Image.fromarray(pixels, 'P')
+    img.putpalette([value for rgb in colors for value in rgb])
+    return img
+
+
+def ensure_thumbnail(primary, secondary=None, tertiary=None):
+    """
+    Render the thumbnail for these colors unless it is already stored;
+    returns its key, or None for colors that cannot have a thumbnail.
+    """
+    key = thumbnail_key(primary, secondary, tertiary)
+    if key is None:
+        return None
+    if thumbnail_exists(key):
+        return key
+    full_path = os.path.join(settings.MEDIA_ROOT, thumbnail_path(key))
+
+    img = render_thumbnail(*(f'#{color}' for color in key.split('-')))
+    os.makedirs(os.path.dirname(full_path), exist_ok=True)
+    tmp_path = f'{full_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+    img.save(tmp_path, 'PNG', optimize=True)
+    os.replace(tmp_path, full_path)
+    return key
+
+
+def prune_thumbnails(keys):
+    """
+    Delete stored thumbnails whose key is not in ``keys``, and those of
+    older generator versions; returns the number of files deleted.
+    """
+    current = os.path.dirname(thumbnail_path('key'))
+    removed = 0
+    root = os.path.join(settings.MEDIA_ROOT, THUMBNAIL_DIR)
+    for directory, _, names in os.walk(root):
+        relative = os.path.relpath(directory, settings.MEDIA_ROOT)
+        for name in names:
+            key, extension = os.path.splitext(name)
+            if relative == current and extension == '.png' and key in keys:
+                continue
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                continue
+            removed += 1
+    return removed
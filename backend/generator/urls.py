@@ -1,5 +1,5 @@
 # urls.py
-from django.urls import path, include
+from django.urls import path, re_path, include
 from rest_framework.routers import DefaultRouter
 from . import views
 
@@ -10,6 +10,11 @@ router.register(r'palette-files', views.PaletteFileViewSet, basename='palette-fi
 urlpatterns = [
     # Register the preview endpoint before the router's URLs
     path('palettes/preview/', views.PalettePreviewView.as_view(), name='palette-preview'),
+    path('palettes/preview/batch/', views.PaletteBatchPreviewView.as_view(), name='palette-preview-batch'),
+    # Cache counters for staff and metrics tooling
+    path('palettes/cache-stats/', views.PaletteCacheStatsView.as_view(), name='palette-cache-stats'),
+    # Public, immutable thumbnails addressed by generator version and colors
+    re_path(r'^palettes/thumbnails/v(?P<version>\w+)/(?P<colors>[0-9a-f-]+)\.png$', views.PaletteThumbnailView.as_view(), name='palette-thumbnail'),
     # Register the anonymous download endpoint
     path('palettes/download-anonymous/', views.AnonymousPaletteDownloadView.as_view(), name='palette-download-anonymous'),
     # Include the router's URLs
@@ -5,45 +5,74 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.parsers import JSONParser, MultiPartParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from django.shortcuts import get_object_or_404
-from .models import Palette, PaletteFile, PaletteFileType
-from .serializers import PaletteSerializer, PaletteFileSerializer, PalettePreviewRequestSerializer, PalettePreviewResponseSerializer
-from .generator import PaletteGenerator, generate_palette
+from .models import Palette, PaletteFile
+from .serializers import PaletteSerializer, PaletteFileSerializer, PalettePreviewRequestSerializer, PaletteRenderRequestSerializer, PalettePreviewResponseSerializer, PaletteBatchPreviewRequestSerializer, PaletteSimilarRequestSerializer, PaletteDownloadRequestSerializer
+from .generator import PaletteGenerator, generate_palette, cache_stats
+from .engine import palette_swatches, generate_palette_batch
+from .similarity import find_similar
+from .renderer import resolve_image_profile
+from .formats import content_type_for
 from django.conf import settings
 import os
 import json
 from django.core.files import File
-import tempfile
 from django.core.files.base import ContentFile
 import shutil
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from core.authentication import CustomJWTAuthentication
-from rest_framework.permissions import IsAuthenticated, AllowAny
+from rest_framework.permissions import IsAuthenticated, AllowAny, IsAdminUser
 from rest_framework.views import APIView
 from rest_framework.generics import GenericAPIView
-import colorsys
-from contextlib import contextmanager
 
 
-@contextmanager
-def temporary_palette_directory():
+def build_preview_data(palette):
     """
-    Context manager for creating and cleaning up temporary palette directories.
-    Ensures cleanup even if errors occur during generation.
+    Format a generated palette for the preview response, converting every
+    shade in one vectorized pass.
     """
-    # Create temp dir in system temp, not in app directory to avoid Django autoreloader issues
-    temp_dir = tempfile.mkdtemp(prefix='palette_', dir=tempfile.gettempdir())
-    try:
-        yield temp_dir
-    finally:
-        # Clean up the temporary directory with retry logic
-        if os.path.exists(temp_dir):
-            try:
-                # Force remove even if files are in use
-                shutil.rmtree(temp_dir, ignore_errors=True)
-            except Exception as e:
-                # Log but don't raise - cleanup failure shouldn't break the response
-                print(f"Warning: Could not clean up temporary directory {temp_dir}: {e}")
+    # Ensure HSB values are in correct ranges before converting
+    clamped = {
+        name: {
+            shade: (max(0, min(360, h)), max(0, min(100, s)), max(0, min(100, b)))
+            for shade, (h, s, b) in shades.items()
+        }
+        for name, shades in palette.items()
+    }
+    swatches = palette_swatches(clamped, rounded=True)
+
+    response_data = {}
+    # Include all colors from the palette (Primary, Secondary, Tertiary, Neutral, and supporting colors)
+    for color_name, shades in swatches.items():
+        shade_data = {}
+        for shade, swatch in shades.items():
+            shade_data[str(shade)] = {
+                'rgb': list(swatch.rgb),
+                'hex': swatch.hex,
+                'hsb': list(swatch.hsb),  # Original HSB values
+                'cmyk': swatch.cmyk       # Calculated CMYK values
+            }
+
+        if shade_data:  # Only add if we have valid shades
+            response_data[color_name.lower()] = {
+                'name': color_name,
+                'shades': shade_data
+            }
+    return response_data
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Accepts requests for server-sent events; the event streams are written
+    by the views, so this only renders error responses, as JSON
+    """
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode(self.charset)
 
 
 class PaletteViewSet(viewsets.ModelViewSet):
@@ -67,20 +96,30 @@ class PaletteViewSet(viewsets.ModelViewSet):
     def create(self, request):
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+        # Record the resolved profile so files rendered later match
+        png_profile, _ = resolve_image_profile(serializer.validated_data.pop('png_profile', None))
 
         # Create palette in processing state with the current user
-        palette = serializer.save(user=self.request.user, is_processing=True)
+        palette = serializer.save(user=self.request.user, is_processing=True,
+                                  png_profile=png_profile)
 
-        # Start async task to generate files
+        # Queue the files for the generator workers; the palette reports
+        # status "processing" until they are done
         self._generate_palette_files(palette)
 
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     def destroy(self, request, *args, **kwargs):
+        from .progress import publish
+
         instance = self.get_object()
+        palette_id = instance.id
 
-        # Delete associated files from storage
+        # Delete associated files from storage (shared artifacts are released
+        # when their PaletteFile rows are deleted)
         for file_obj in instance.files.all():
+            if file_obj.artifact_id:
+                continue
             if file_obj.full_path and os.path.exists(file_obj.full_path):
                 try:
                     os.remove(file_obj.full_path)
@@ -98,82 +137,207 @@ class PaletteViewSet(viewsets.ModelViewSet):
                     print(f"Error deleting directory {palette_dir}: {e}")
 
         # Let DRF handle the actual model deletion
-        return super().destroy(request, *args, **kwargs)
-
-    def _generate_palette_files(self, palette):
-        try:
-            from django.utils.text import slugify
-
-            # Generate a slug from the palette name
-            name_slug = slugify(palette.name)
-            if not name_slug:  # In case name is empty or only special characters
-                name_slug = 'palette'
-
-            # Create palette directory with ID and slugged name
-            palette_dir = os.path.join('palettes', f'{palette.id}-{name_slug}')
-            full_palette_dir = os.path.join(settings.MEDIA_ROOT, palette_dir)
-            os.makedirs(full_palette_dir, exist_ok=True)
+        response = super().destroy(request, *args, **kwargs)
+        publish(palette_id)
+        return response
 
-            # Generate files
-            generator = PaletteGenerator(
-                name=palette.name,
-                primary=palette.primary,
-                secondary=palette.secondary,
-                tertiary=palette.tertiary,
-                base_dir=full_palette_dir  # Pass the full path to the generator
+    def perform_update(self, serializer):
+        """Regenerate the palette's files when its name, colors or profile change."""
+        if 'png_profile' in serializer.validated_data:
+            serializer.validated_data['png_profile'], _ = resolve_image_profile(
+                serializer.validated_data['png_profile']
             )
+        fields = ('name', 'primary', 'secondary', 'tertiary', 'png_profile')
+        changed = any(
+            field in serializer.validated_data
+            and serializer.validated_data[field] != getattr(serializer.instance, field)
+            for field in fields
+        )
+        palette = serializer.save()
+        if changed:
+            self._generate_palette_files(palette)
 
-            # Save files to database
-            file_types = PaletteFileType.objects.all()
-            for file_type in file_types:
-                file_name = f"{palette.name}-color-palette.{file_type.file_extension}"
-                file_path = os.path.join(palette_dir, file_name)
-
-                # Save file to database
-                PaletteFile.objects.create(
-                    palette=palette,
-                    file_type=file_type,
-                    file_name=file_name,
-                    file_path=file_path  # Store relative path
-                )
+    def _generate_palette_files(self, palette):
+        """Queue the palette's files for the generator workers, or generate them now"""
+        from .jobs import enqueue_generation
+        from .palette_files import generate_palette_files
+        from .progress import publish
 
-            # Update palette status
-            palette.is_processing = False
-            palette.storage_path = palette_dir  # Store relative path
-            palette.save()
+        if settings.PALETTE_GENERATION_QUEUE:
+            enqueue_generation(palette)
+            return
 
+        try:
+            generate_palette_files(palette)
         except Exception as e:
             palette.error_message = str(e)
             palette.is_processing = False
             palette.save()
+            publish(palette.id)
+
+    def _event_stream(self, palettes, until_final=False):
+        """
+        Stream the palettes' states as server-sent ``status`` events as they
+        change, starting with their current states. With ``until_final``,
+        the stream ends once every palette has finished; otherwise it ends
+        after PALETTE_EVENTS_TIMEOUT seconds and clients reconnect
+        """
+        from django.http import StreamingHttpResponse
+        from .progress import FINAL_STATUSES, watch_states
+
+        def events():
+            # Milliseconds before EventSource clients reconnect
+            yield 'retry: 3000\n\n'
+            for changed in watch_states(palettes, settings.PALETTE_EVENTS_TIMEOUT):
+                if not changed:
+                    yield ': keepalive\n\n'
+                for state in changed.values():
+                    yield f"event: status\ndata: {json.dumps(state)}\n\n"
+                if until_final and changed and all(
+                    state['status'] in FINAL_STATUSES for state in changed.values()
+                ):
+                    return
+
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        # Keep nginx and similar proxies from buffering the events
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(detail=True, methods=['get'], url_path='status', url_name='status')
+    def live_status(self, request, pk=None):
+        """
+        Get a palette's generation status. Given ``since``, the cursor of the
+        state the client already has, wait up to ``wait`` seconds for it to
+        change before responding (long polling)
+        """
+        from .progress import state_cursor, watch_states
+
+        palette = self.get_object()
+        try:
+            wait = float(request.query_params.get('wait', 0))
+            if not wait >= 0:
+                raise ValueError
+        except ValueError:
+            return Response({"error": "wait must be a number of seconds"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        wait = min(wait, settings.PALETTE_EVENTS_TIMEOUT)
+        since = request.query_params.get('since')
+
+        state = None
+        palettes = self.get_queryset().filter(pk=palette.pk)
+        for changed in watch_states(palettes, wait):
+            state = changed.get(palette.pk, state)
+            if state_cursor(state) != since:
+                break
+        return Response({**state, 'cursor': state_cursor(state)})
+
+    @action(detail=True, methods=['get'], renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def events(self, request, pk=None):
+        """
+        Stream a palette's generation status as server-sent events until it
+        has finished
+        """
+        palette = self.get_object()
+        return self._event_stream(self.get_queryset().filter(pk=palette.pk),
+                                  until_final=True)
+
+    @action(detail=False, methods=['get'], url_path='events', url_name='list-events',
+            renderer_classes=[JSONRenderer, EventStreamRenderer])
+    def list_events(self, request):
+        """
+        Stream the generation status of the current user's palettes as
+        server-sent events: first those still processing, then every change
+        """
+        from datetime import timedelta
+        from django.db.models import Q
+        from django.utils import timezone
+
+        # Palettes processing now or saved from now on; the minute of slack
+        # allows for clock differences with the generator workers
+        started = timezone.now() - timedelta(minutes=1)
+        palettes = self.get_queryset().filter(
+            Q(is_processing=True) | Q(updated_at__gte=started)
+        )
+        return self._event_stream(palettes)
+
+    @action(detail=False, methods=['get'])
+    def similar(self, request):
+        """
+        Find the current user's palettes perceptually closest to the given
+        colors, nearest first
+        """
+        query_serializer = PaletteSimilarRequestSerializer(data=request.query_params)
+        query_serializer.is_valid(raise_exception=True)
+        query = query_serializer.validated_data
+
+        try:
+            matches = find_similar(
+                query['primary'],
+                query.get('secondary'),
+                query.get('tertiary'),
+                k=query['limit'],
+                owner_id=request.user.id
+            )
+        except ValueError as e:
+            return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        palettes = self.get_queryset().in_bulk([palette_id for palette_id, _ in matches])
+        results = [
+            {
+                'distance': distance,
+                'palette': self.get_serializer(palettes[palette_id]).data
+            }
+            for palette_id, distance in matches
+            if palette_id in palettes
+        ]
+        return Response(results)
 
     @action(detail=True, methods=['get'])
     def download(self, request, pk=None):
         """
-        Download all files for a palette as a zip archive
+        Download all files for a palette as a zip archive. Formats that fail
+        to render are left out and listed in the X-Missing-Formats header
         """
-        import zipfile
-        import io
-        from django.http import FileResponse
+        from django.http import FileResponse, StreamingHttpResponse
         from django.core.files.storage import default_storage
+        from .bundles import file_chunks, stream_zip
+        from .palette_files import ensure_bundle
 
         palette = self.get_object()
+        filename = f"{palette.name}-palette-files.zip"
 
-        # Create a zip file in memory
-        buffer = io.BytesIO()
-        with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-            # Add each file to the zip
-            for file_obj in palette.files.all():
-                file_path = file_obj.file_path
-                if default_storage.exists(file_path):
-                    with default_storage.open(file_path, 'rb') as file_content:
-                        zip_file.writestr(file_obj.file_name, file_content.read())
-
-        # Prepare the response
-        buffer.seek(0)
-        response = FileResponse(buffer, as_attachment=True,
-                              content_type='application/zip')
-        response['Content-Disposition'] = f'attachment; filename="{palette.name}-palette-files.zip"'
+        # Build the bundle (and any pending files) on first download
+        render_errors = {}
+        try:
+            palette = ensure_bundle(palette, errors=render_errors)
+        except OSError as e:
+            print(f"Error writing bundle for palette {palette.id}: {e}")
+        for extension, error in render_errors.items():
+            print(f"Error rendering {extension} for palette {palette.id}: {error}")
+
+        # Serve the bundle built when the files were generated
+        if palette.bundle_path and default_storage.exists(palette.bundle_path):
+            bundle = default_storage.open(palette.bundle_path, 'rb')
+            response = FileResponse(bundle, content_type='application/zip')
+            response['Content-Disposition'] = f'attachment; filename="{filename}"'
+            response['Content-Length'] = default_storage.size(palette.bundle_path)
+            return response
+
+        # Otherwise stream the zip as each member is read, a chunk at a time
+        entries = [
+            (
+                file_obj.file_name,
+                file_chunks(lambda path=file_obj.file_path: default_storage.open(path, 'rb'))
+            )
+            for file_obj in palette.files.filter(status=PaletteFile.READY)
+            if default_storage.exists(file_obj.file_path)
+        ]
+        response = StreamingHttpResponse(stream_zip(entries),
+                                         content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        if render_errors:
+            response['X-Missing-Formats'] = ','.join(sorted(render_errors))
         return response
 
 
@@ -183,12 +347,13 @@ class PalettePreviewView(GenericAPIView):
     """
     authentication_classes = [CustomJWTAuthentication]
     permission_classes = [AllowAny]
-    serializer_class = PalettePreviewRequestSerializer
+    serializer_class = PaletteRenderRequestSerializer
     http_method_names = ['post']  # Explicitly allow only POST method
 
     def post(self, request, *args, **kwargs):
         """
         Generate a preview of a color palette without saving it.
+        With file_format, return that file rendered in memory instead.
         """
         # Manually validate the request data
         request_serializer = self.serializer_class(data=request.data)
@@ -201,46 +366,18 @@ class PalettePreviewView(GenericAPIView):
             include_tertiary = request_serializer.validated_data.get('include_tertiary', False)
             tertiary = request_serializer.validated_data.get('tertiary') if include_tertiary else None
 
+            file_format = request_serializer.validated_data.get('file_format')
+            if file_format:
+                return self.render_file(
+                    file_format, primary, secondary, tertiary,
+                    request_serializer.validated_data.get('png_profile')
+                )
+
             # Generate the palette
             palette = generate_palette(primary, secondary, tertiary)
 
             # Format the response
-            response_data = {}
-
-            # Include all colors from the palette (Primary, Secondary, Tertiary, Neutral, and supporting colors)
-            for color_name, shades in palette.items():
-                shade_data = {}
-                for shade, hsb in shades.items():
-                    # Ensure HSB values are in correct ranges
-                    h, s, b = hsb
-                    h = max(0, min(360, h))  # Hue: 0-360
-                    s = max(0, min(100, s))  # Saturation: 0-100
-                    b = max(0, min(100, b))  # Brightness: 0-100
-
-                    # Convert HSB to RGB
-                    rgb = colorsys.hsv_to_rgb(h/360, s/100, b/100)
-                    rgb_ints = [int(round(x * 255)) for x in rgb]
-                    rgb_ints = [max(0, min(255, c)) for c in rgb_ints]  # Ensure 0-255 range
-
-                    # Convert RGB to hex
-                    hex_color = '#{:02x}{:02x}{:02x}'.format(*rgb_ints)
-                    
-                    # Convert RGB to CMYK
-                    from .generator import rgb_to_cmyk
-                    cmyk = rgb_to_cmyk(rgb_ints)
-
-                    shade_data[str(shade)] = {
-                        'rgb': rgb_ints,
-                        'hex': hex_color.lower(),
-                        'hsb': [h, s, b],  # Original HSB values
-                        'cmyk': cmyk       # Calculated CMYK values
-                    }
-
-                if shade_data:  # Only add if we have valid shades
-                    response_data[color_name.lower()] = {
-                        'name': color_name,
-                        'shades': shade_data
-                    }
+            response_data = build_preview_data(palette)
 
             # Validate the response data with the response serializer
             response_serializer = PalettePreviewResponseSerializer(data=response_data)
@@ -256,6 +393,145 @@ class PalettePreviewView(GenericAPIView):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
+    def render_file(self, file_format, primary, secondary, tertiary, png_profile):  # noqa: E501
+        """
+        Return one palette file rendered in memory, for display inline.
+        """
+        from django.http import HttpResponse
+
+        generator = PaletteGenerator(
+            'preview', primary, secondary, tertiary,
+            png_profile=png_profile, generate=False
+        )
+        file_name = generator.get_file_name(file_format)
+        response = HttpResponse(
+            generator.render(file_format),
+            content_type=content_type_for(os.path.splitext(file_name)[1][1:])
+        )
+        response['Content-Disposition'] = f'inline; filename="{file_name}"'
+        return response
+
+
+class PaletteBatchPreviewView(GenericAPIView):
+    """
+    API endpoint for previewing many color palettes in one request.
+    Streams one JSON line per color set (NDJSON) as each chunk is computed.
+    """
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [AllowAny]
+    serializer_class = PaletteBatchPreviewRequestSerializer
+    http_method_names = ['post']
+
+    def post(self, request, *args, **kwargs):
+        """
+        Generate previews for a list of color sets.
+
+        Each line is either {"index": i, "palette": {...}} or
+        {"index": i, "error": {...}}, in request order.
+        """
+        from django.http import StreamingHttpResponse
+
+        request_serializer = self.serializer_class(data=request.data)
+        request_serializer.is_valid(raise_exception=True)
+
+        response = StreamingHttpResponse(
+            self.stream_previews(request_serializer.validated_data['palettes']),
+            content_type='application/x-ndjson'
+        )
+        response['X-Accel-Buffering'] = 'no'  # Let proxies flush each line
+        return response
+
+    def stream_previews(self, color_sets):
+        chunk_size = max(1, settings.PALETTE_BATCH_PREVIEW_CHUNK)
+        for start in range(0, len(color_sets), chunk_size):
+            lines = self.preview_chunk(color_sets[start:start + chunk_size], start)
+            yield ''.join(lines).encode()
+
+    def preview_chunk(self, color_sets, offset):
+        results = {}
+        valid = []
+        for index, data in enumerate(color_sets, start=offset):
+            item_serializer = PalettePreviewRequestSerializer(data=data)
+            if not item_serializer.is_valid():
+                results[index] = {'index': index, 'error': item_serializer.errors}
+                continue
+            item = item_serializer.validated_data
+            tertiary = item.get('tertiary') if item.get('include_tertiary') else None
+            valid.append((index, (item['primary'], item.get('secondary'), tertiary)))
+
+        if valid:
+            try:
+                palettes = generate_palette_batch([colors for _, colors in valid])
+            except Exception:
+                # Fall back to one at a time so a bad entry only fails itself
+                palettes = None
+            for position, (index, colors) in enumerate(valid):
+                try:
+                    palette = palettes[position] if palettes else generate_palette(*colors)
+                    results[index] = {'index': index, 'palette': build_preview_data(palette)}
+                except Exception as e:
+                    results[index] = {
+                        'index': index,
+                        'error': {
+                            "error": f"Error generating palette: {str(e)}",
+                            "type": type(e).__name__
+                        }
+                    }
+
+        for index in sorted(results):
+            yield json.dumps(results[index], separators=(',', ':')) + '\n'
+
+
+class PaletteCacheStatsView(APIView):
+    """
+    API endpoint exposing the generator cache counters to staff users.
+    """
+    authentication_classes = [CustomJWTAuthentication]
+    permission_classes = [IsAdminUser]
+
+    def get(self, request, *args, **kwargs):
+        """
+        Return hit/miss/eviction counters for this worker's caches.
+        """
+        return Response({'pid': os.getpid(), 'caches': cache_stats()})
+
+
+class PaletteThumbnailView(APIView):
+    """
+    Public endpoint serving swatch-strip thumbnails by palette colors.
+    The URL encodes everything the image depends on, so responses may be
+    cached indefinitely.
+    """
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request, version, colors, *args, **kwargs):
+        """
+        Return the PNG thumbnail for the given colors. Thumbnails are only
+        rendered when a saved palette's files are generated; this endpoint
+        needs no login, so it never renders or stores one itself
+        """
+        from django.http import FileResponse
+        from rest_framework.exceptions import NotFound
+        from .generator import GENERATOR_VERSION
+        from .thumbnails import thumbnail_key, thumbnail_path
+
+        # Thumbnails from an older generator are never served
+        if version != GENERATOR_VERSION:
+            raise NotFound("Thumbnail not found")
+        key = thumbnail_key(*(f'#{color}' for color in colors.split('-')))
+        if key is None:
+            raise NotFound("Thumbnail not found")
+
+        full_path = os.path.join(settings.MEDIA_ROOT, thumbnail_path(key))
+        try:
+            thumbnail = open(full_path, 'rb')
+        except FileNotFoundError:
+            raise NotFound("Thumbnail not found")
+        response = FileResponse(thumbnail, content_type='image/png')
+        response['Cache-Control'] = f'public, max-age={settings.PALETTE_THUMBNAIL_MAX_AGE}, immutable'
+        return response
+
 
 class PaletteFileViewSet(viewsets.ReadOnlyModelViewSet):
     """
@@ -278,8 +554,20 @@ class PaletteFileViewSet(viewsets.ReadOnlyModelViewSet):
         from django.http import FileResponse
         from django.core.files.storage import default_storage
         from rest_framework.exceptions import NotFound
+        from .generator import FormatRenderError
+        from .palette_files import ensure_file_ready
 
+        # Render the file now if nobody has downloaded it before; one that
+        # fails stays pending and is tried again on the next download
         file_obj = self.get_object()
+        try:
+            file_obj = ensure_file_ready(file_obj)
+        except FormatRenderError as e:
+            print(f"Error rendering palette file {file_obj.id}: {e}")
+            return Response(
+                {"error": f"Error generating palette file: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         file_path = file_obj.file_path
 
         if not default_storage.exists(file_path):
@@ -290,17 +578,10 @@ class PaletteFileViewSet(viewsets.ReadOnlyModelViewSet):
         response['Content-Disposition'] = f'attachment; filename="{file_obj.file_name}"'
         response['Content-Length'] = default_storage.size(file_path)
 
-        # Set appropriate content type based on file extension
-        if file_path.endswith('.png'):
-            response['Content-Type'] = 'image/png'
-        elif file_path.endswith('.xlsx'):
-            response['Content-Type'] = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
-        elif file_path.endswith('.css'):
-            response['Content-Type'] = 'text/css'
-        elif file_path.endswith('.ts'):
-            response['Content-Type'] = 'application/typescript'
-        elif file_path.endswith('.dart'):
-            response['Content-Type'] = 'application/dart'
+        # Set the content type registered for the file's format
+        content_type = content_type_for(os.path.splitext(file_path)[1][1:])
+        if content_type:
+            response['Content-Type'] = content_type
 
         return response
 
@@ -308,21 +589,22 @@ class PaletteFileViewSet(viewsets.ReadOnlyModelViewSet):
 class AnonymousPaletteDownloadView(GenericAPIView):
     """
     API endpoint for anonymous users to download palette files without saving to database.
-    Generates files in a temporary directory and returns them as a zip file.
+    Renders every file in memory and returns them as a zip file, or an error if
+    any format fails to render.
     """
     authentication_classes = [CustomJWTAuthentication]
     permission_classes = [AllowAny]
-    serializer_class = PalettePreviewRequestSerializer
+    serializer_class = PaletteDownloadRequestSerializer
     http_method_names = ['post']
 
     def post(self, request, *args, **kwargs):
         """
         Generate palette files and return them as a zip download.
         """
-        import zipfile
-        import io
-        from django.http import FileResponse
+        from django.http import StreamingHttpResponse
         from django.utils.text import slugify
+        from .bundles import stream_zip
+        from .generator import FormatRenderError
 
         # Validate request data
         request_serializer = self.serializer_class(data=request.data)
@@ -349,41 +631,46 @@ class AnonymousPaletteDownloadView(GenericAPIView):
             )
 
         try:
-            # Use context manager to ensure cleanup
-            with temporary_palette_directory() as temp_dir:
-                # Generate palette files in temporary directory
-                generator = PaletteGenerator(
-                    name=palette_name,
-                    primary=primary,
-                    secondary=secondary,
-                    tertiary=tertiary,
-                    base_dir=temp_dir
-                )
+            # Computes the palette up front so bad colors still get a 400
+            generator = PaletteGenerator(
+                name=palette_name,
+                primary=primary,
+                secondary=secondary,
+                tertiary=tertiary,
+                png_profile=request_serializer.validated_data.get('png_profile'),
+                formats=dict.fromkeys(request_serializer.validated_data['formats']),
+                generate=False
+            )
 
-                # Create zip file in memory
-                buffer = io.BytesIO()
-                with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zip_file:
-                    # Add each generated file to the zip
-                    for file_info in generator.get_generated_files():
-                        file_path = os.path.join(temp_dir, file_info['name'])
-                        if os.path.exists(file_path):
-                            with open(file_path, 'rb') as f:
-                                zip_file.writestr(file_info['name'], f.read())
-
-                # Prepare response
-                buffer.seek(0)
-                response = FileResponse(
-                    buffer,
-                    as_attachment=True,
-                    content_type='application/zip'
-                )
-                
-                # Create safe filename
-                safe_name = slugify(palette_name) or 'palette'
-                response['Content-Disposition'] = f'attachment; filename="{safe_name}-palette-files.zip"'
-                
-                return response
+            # Render every format before the response starts, so a failure
+            # is an error response rather than a truncated zip
+            contents, errors = generator.render_many()
+            if errors:
+                raise FormatRenderError(errors, contents)
+            entries = (
+                (generator.get_file_name(ext), [contents[ext]])
+                for ext in generator.formats
+            )
+            response = StreamingHttpResponse(
+                stream_zip(entries),
+                content_type='application/zip'
+            )
+
+            # Create safe filename
+            safe_name = slugify(palette_name) or 'palette'
+            response['Content-Disposition'] = f'attachment; filename="{safe_name}-palette-files.zip"'
 
+            return response
+
+        except FormatRenderError as e:
+            print(f"Error rendering anonymous palette files: {e}")
+            return Response(
+                {
+                    "error": f"Error generating palette files: {str(e)}",
+                    "failed_formats": sorted(e.errors)
+                },
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR
+            )
         except Exception as e:
             return Response(
                 {
@@ -0,0 +1,259 @@
+"""
+XLSX writers for the palette sheet.
+
+The workbook always has the same shape (one sheet, a header row of family
+names and one labeled, filled cell per shade). The openpyxl writer streams it
+through a write-only workbook; the direct writer fills its OOXML parts in
+from string templates and zips them without building an openpyxl workbook.
+Loaded back, both give the same values, fills, fonts, alignment and
+dimensions.
+"""
+import zipfile
+from xml.sax.saxutils import escape
+
+import openpyxl
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Alignment, Color, Font, PatternFill
+from openpyxl.utils import get_column_letter
+from openpyxl.writer.theme import theme_xml
+
+
+# Writers selectable with PALETTE_XLSX_ENGINE
+XLSX_ENGINES = ('openpyxl', 'direct')
+
+
+XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+MAIN_NS = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+REL_NS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+DOC_REL = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+CONTENT_TYPES = XML_HEADER + (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/'
+    'content-types">'
+    '<Default Extension="rels" ContentType="application/'
+    'vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '<Override PartName="/xl/sharedStrings.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+    '<Override PartName="/xl/theme/theme1.xml" ContentType="application/'
+    'vnd.openxmlformats-officedocument.theme+xml"/>'
+    '</Types>'
+)
+
+ROOT_RELS = XML_HEADER + (
+    f'<Relationships xmlns="{REL_NS}">'
+    f'<Relationship Id="rId1" Type="{DOC_REL}/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+WORKBOOK = XML_HEADER + (
+    f'<workbook xmlns="{MAIN_NS}" xmlns:r="{DOC_REL}">'
+    '<bookViews><workbookView activeTab="0"/></bookViews>'
+    '<sheets><sheet name="Sheet" sheetId="1" r:id="rId1"/></sheets>'
+    '<calcPr calcId="124519" fullCalcOnLoad="1"/>'
+    '</workbook>'
+)
+
+WORKBOOK_RELS = XML_HEADER + (
+    f'<Relationships xmlns="{REL_NS}">'
+    f'<Relationship Id="rId1" Type="{DOC_REL}/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{DOC_REL}/styles" Target="styles.xml"/>'
+    f'<Relationship Id="rId3" Type="{DOC_REL}/sharedStrings" '
+    'Target="sharedStrings.xml"/>'
+    f'<Relationship Id="rId4" Type="{DOC_REL}/theme" '
+    'Target="theme/theme1.xml"/>'
+    '</Relationships>'
+)
+
+STYLES = XML_HEADER + (
+    f'<styleSheet xmlns="{MAIN_NS}">'
+    '<fonts count="{font_count}">'
+    '<font><name val="Calibri"/><family val="2"/><color theme="1"/>'
+    '<sz val="11"/><scheme val="minor"/></font>'
+    '{fonts}</fonts>'
+    '<fills count="{fill_count}">'
+    '<fill><patternFill/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill>'
+    '{fills}</fills>'
+    '<borders count="1">'
+    '<border><left/><right/><top/><bottom/><diagonal/></border>'
+    '</borders>'
+    '<cellStyleXfs count="1">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>'
+    '</cellStyleXfs>'
+    '<cellXfs count="{xf_count}">'
+    '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '{xfs}</cellXfs>'
+    '<cellStyles count="1">'
+    '<cellStyle name="Normal" xfId="0" builtinId="0"/>'
+    '</cellStyles>'
+    '</styleSheet>'
+)
+FONT = '<font><color rgb="00{rgb}"/></font>'
+FILL = (
+    '<fill><patternFill patternType="solid">'
+    '<fgColor rgb="00{rgb}"/><bgColor rgb="00{rgb}"/>'
+    '</patternFill></fill>'
+)
+XF = (
+    '<xf numFmtId="0" fontId="{font}" fillId="{fill}" borderId="0" '
+    'xfId="0" applyFont="1" applyFill="1" applyAlignment="1">'
+    '<alignment horizontal="center" vertical="center" wrapText="1"/></xf>'
+)
+
+SHEET = XML_HEADER + (
+    f'<worksheet xmlns="{MAIN_NS}">'
+    '<sheetViews><sheetView workbookViewId="0"/></sheetViews>'
+    '<sheetFormatPr baseColWidth="8" defaultRowHeight="15"/>'
+    '<cols>{cols}</cols>'
+    '<sheetData>{rows}</sheetData>'
+    '</worksheet>'
+)
+COL = '<col min="{index}" max="{index}" width="30" customWidth="1"/>'
+HEADER_ROW = '<row r="1">{cells}</row>'
+SHADE_ROW = '<row r="{row}" ht="100" customHeight="1">{cells}</row>'
+HEADER_CELL = '<c r="{ref}" t="s"><v>{string}</v></c>'
+SHADE_CELL = '<c r="{ref}" s="{style}" t="s"><v>{string}</v></c>'
+
+SHARED_STRINGS = XML_HEADER + (
+    f'<sst xmlns="{MAIN_NS}" count="{{count}}" uniqueCount="{{count}}">'
+    '{strings}</sst>'
+)
+SHARED_STRING = '<si><t xml:space="preserve">{text}</t></si>'
+
+
+def shade_text(shade, swatch):
+    return (
+        f"Weight - {shade}\nHSB - {swatch.hsb}\nRGB - {swatch.rgb}\n"
+        f"HEX - {swatch.hex}\nCMYK - {swatch.cmyk}"
+    )
+
+
+def write_openpyxl_xlsx(fp, swatches, labels):
+    """
+    Write ``{family: {shade: Swatch}}`` to ``fp`` with a write-only openpyxl
+    workbook.
+    """
+    # Streamed row by row; every shade cell shares one alignment and the
+    # fills and fonts are created once per distinct color
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet()
+
+    for j in range(len(swatches)):
+        ws.column_dimensions[get_column_letter(j + 2)].width = 30
+    for i in range(len(labels)):
+        ws.row_dimensions[i + 2].height = 100
+
+    fills = {}
+    fonts = {}
+    alignment = Alignment(
+        horizontal='center', vertical='center', wrap_text=True
+    )
+
+    ws.append([None] + list(swatches))
+    for shade in labels:
+        row = [None]
+        for shades in swatches.values():
+            swatch = shades[shade]
+            cell = WriteOnlyCell(ws, value=shade_text(shade, swatch))
+            hex_rgb = swatch.hex[1:]
+            if hex_rgb not in fills:
+                fills[hex_rgb] = PatternFill(
+                    start_color=hex_rgb, end_color=hex_rgb, fill_type='solid'
+                )
+            cell.fill = fills[hex_rgb]
+            if swatch.contrast not in fonts:
+                font_rgb = '{:02X}{:02X}{:02X}'.format(*swatch.contrast)
+                fonts[swatch.contrast] = Font(color=Color(rgb=font_rgb))
+            cell.font = fonts[swatch.contrast]
+            cell.alignment = alignment
+            row.append(cell)
+        ws.append(row)
+
+    wb.save(fp)
+
+
+def write_xlsx(fp, swatches, labels, engine='openpyxl'):
+    """
+    Write ``{family: {shade: Swatch}}`` to ``fp`` (a path or binary file) as
+    a one-sheet workbook with a column per family and a row per shade label.
+    """
+    if engine not in XLSX_ENGINES:
+        raise ValueError(f"Unknown XLSX engine: {engine}")
+    if engine == 'direct':
+        write_direct_xlsx(fp, swatches, labels)
+    else:
+        write_openpyxl_xlsx(fp, swatches, labels)
+
+
+def write_direct_xlsx(fp, swatches, labels):
+    """
+    Write ``{family: {shade: Swatch}}`` to ``fp`` from the OOXML templates.
+    """
+    strings = []
+    fonts = {}
+    fills = {}
+    styles = {}
+
+    def shared(text):
+        strings.append(SHARED_STRING.format(text=escape(text)))
+        return len(strings) - 1
+
+    def style(swatch):
+        font_rgb = '{:02X}{:02X}{:02X}'.format(*swatch.contrast)
+        fill_rgb = swatch.hex[1:]
+        font = fonts.setdefault(font_rgb, len(fonts) + 1)
+        # Fills 0 and 1 are the reserved none and gray125 patterns
+        fill = fills.setdefault(fill_rgb, len(fills) + 2)
+        return styles.setdefault((font, fill), len(styles) + 1)
+
+    columns = [get_column_letter(j + 2) for j in range(len(swatches))]
+    rows = [HEADER_ROW.format(cells=''.join(
+        HEADER_CELL.format(ref=f'{column}1', string=shared(name))
+        for column, name in zip(columns, swatches)
+    ))]
+    for row, shade in enumerate(labels, start=2):
+        cells = []
+        for column, shades in zip(columns, swatches.values()):
+            swatch = shades[shade]
+            cells.append(SHADE_CELL.format(
+                ref=f'{column}{row}', style=style(swatch),
+                string=shared(shade_text(shade, swatch)),
+            ))
+        rows.append(SHADE_ROW.format(row=row, cells=''.join(cells)))
+
+    sheet = SHEET.format(
+        cols=''.join(COL.format(index=j + 2) for j in range(len(columns))),
+        rows=''.join(rows),
+    )
+    styles_xml = STYLES.format(
+        font_count=len(fonts) + 1,
+        fonts=''.join(FONT.format(rgb=rgb) for rgb in fonts),
+        fill_count=len(fills) + 2,
+        fills=''.join(FILL.format(rgb=rgb) for rgb in fills),
+        xf_count=len(styles) + 1,
+        xfs=''.join(
+            XF.format(font=font, fill=fill) for font, fill in styles
+        ),
+    )
+    shared_strings = SHARED_STRINGS.format(
+        count=len(strings), strings=''.join(strings)
+    )
+
+    with zipfile.ZipFile(fp, 'w', zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('[Content_Types].xml', CONTENT_TYPES)
+        archive.writestr('_rels/.rels', ROOT_RELS)
+        archive.writestr('xl/workbook.xml', WORKBOOK)
+        archive.writestr('xl/_rels/workbook.xml.rels', WORKBOOK_RELS)
+        archive.writestr('xl/styles.xml', styles_xml)
+        archive.writestr('xl/theme/theme1.xml', theme_xml)
+        archive.writestr('xl/sharedStrings.xml', shared_strings)
+        archive.writestr('xl/worksheets/sheet1.xml', sheet)
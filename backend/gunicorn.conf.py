@@ -0,0 +1,27 @@
+"""
+Gunicorn settings, read from the working directory on start.
+
+Workers are threaded so that the palette status streams, which each hold
+a thread while open, do not tie up whole worker processes.
+
+With PROMETHEUS_MULTIPROC_DIR set, every worker writes its metrics to that
+directory and /metrics adds them up. The master clears the directory on
+start so that the counts of a previous run are not added in, and drops the
+live gauges of each worker that exits.
+"""
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
+
+
+def on_starting(server):
+    from generator.metrics import reset_multiprocess_dir
+    reset_multiprocess_dir()
+
+
+def child_exit(server, worker):
+    from generator.metrics import mark_process_dead
+    mark_process_dead(worker.pid)
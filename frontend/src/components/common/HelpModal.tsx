@@ -177,6 +177,12 @@ export default function HelpModal({ open, onClose }: HelpModalProps) {
               secondary="Visual reference showing all colors with their values (HEX, RGB, HSB, CMYK)"
             />
           </ListItem>
+          <ListItem>
+            <ListItemText 
+              primary="SVG Image (.svg)"
+              secondary="Scalable vector version of the PNG reference sheet"
+            />
+          </ListItem>
           <ListItem>
             <ListItemText 
               primary="Excel Spreadsheet (.xlsx)"
@@ -201,6 +207,36 @@ export default function HelpModal({ open, onClose }: HelpModalProps) {
               secondary="Material color swatches for Flutter mobile apps"
             />
           </ListItem>
+          <ListItem>
+            <ListItemText 
+              primary="SCSS Variables (.scss)"
+              secondary="Sass variables plus a color map for each palette"
+            />
+          </ListItem>
+          <ListItem>
+            <ListItemText 
+              primary="Tailwind Config (.js)"
+              secondary="Theme colors to merge into your Tailwind CSS configuration"
+            />
+          </ListItem>
+          <ListItem>
+            <ListItemText 
+              primary="Design Tokens (.json)"
+              secondary="Color tokens in the Design Tokens Community Group format"
+            />
+          </ListItem>
+          <ListItem>
+            <ListItemText 
+              primary="Android Resources (.xml)"
+              secondary="Color resources for Android apps"
+            />
+          </ListItem>
+          <ListItem>
+            <ListItemText 
+              primary="Swift (.swift)"
+              secondary="SwiftUI color constants for iOS and macOS apps"
+            />
+          </ListItem>
         </List>
 
         <Divider sx={{ my: 2 }} />
@@ -8,7 +8,7 @@ import {
 import { Smartphone, LightMode, DarkMode, Palette as SwatchesIcon, TableChart as TableIcon } from '@mui/icons-material';
 import { Download, MoreVert, Delete, FolderZip, Search, ContentCopy } from '@mui/icons-material';
 import { Icon } from '@iconify/react';
-import { fetchUserPalettes, downloadPaletteFiles, downloadPaletteFile, deletePalette, fetchPalettePreview, type UserPalette, type BackendPalette } from '../../services/palette';
+import { fetchUserPalettes, fetchUserPalette, watchPaletteStatus, downloadPaletteFiles, downloadPaletteFile, deletePalette, fetchPalettePreview, type UserPalette, type BackendPalette } from '../../services/palette';
 import ConfirmationDialog from '../common/ConfirmationDialog';
 import DeviceFrame from '../preview/DeviceFrame';
 import PaletteVarsProvider from '../preview/PaletteVarsProvider';
@@ -120,6 +120,44 @@ export default function MyPalettesPage() {
     }
   };
 
+  // Follow palettes that are still being generated, and fetch each one again
+  // once it has finished so its files can be downloaded
+  const hasProcessing = palettes.some(palette => palette.status === 'processing');
+  useEffect(() => {
+    if (!hasProcessing) return;
+    const controller = new AbortController();
+
+    const refreshPalette = async (paletteId: number) => {
+      try {
+        const palette = await fetchUserPalette(paletteId);
+        setPalettes(current => current.map(p => (p.id === palette.id ? palette : p)));
+        setSelectedPalette(current => (current?.id === palette.id ? palette : current));
+      } catch (err) {
+        console.error('Error refreshing palette:', err);
+      }
+    };
+
+    const follow = async () => {
+      // The server ends the stream every few minutes; reconnect until done
+      while (!controller.signal.aborted) {
+        try {
+          await watchPaletteStatus(update => {
+            if (update.status === 'completed' || update.status === 'error') {
+              refreshPalette(update.id);
+            }
+          }, controller.signal);
+        } catch (err) {
+          if (controller.signal.aborted) return;
+          console.error('Palette status stream failed:', err);
+          await new Promise(resolve => setTimeout(resolve, 3000));
+        }
+      }
+    };
+    follow();
+
+    return () => controller.abort();
+  }, [hasProcessing]);
+
   const handlePaletteSelect = (palette: UserPalette) => {
     userSelectedPalette.current = true;
     setSelectedPalette(palette);
@@ -1,4 +1,4 @@
-import apiClient from "./auth";
+import apiClient, { ensureToken } from "./auth";
 import axios from "axios";
 
 export interface PaletteFile {
@@ -41,6 +41,14 @@ export interface BackendPalette {
   };
 }
 
+export interface PaletteStatus {
+  id: number;
+  status: UserPalette['status'] | 'deleted';
+  stage?: string | null;  // e.g. "queued" or "rendering png", while processing
+  attempts?: number;
+  error_message?: string | null;
+}
+
 export interface CreatePaletteData {
   name: string;
   primary: string;
@@ -103,6 +111,56 @@ export const fetchUserPalettes = async (): Promise<UserPalette[]> => {
   }
 };
 
+export const fetchUserPalette = async (paletteId: number): Promise<UserPalette> => {
+  try {
+    const { data } = await apiClient.get<UserPalette>(`/generator/palettes/${paletteId}/`);
+    return data;
+  } catch (error) {
+    console.error("Error fetching palette:", error);
+    throw error;
+  }
+};
+
+/**
+ * Follow the generation status of the user's palettes as the server pushes
+ * it, calling `onStatus` with each change. Uses fetch because EventSource
+ * can't send the Authorization header. Resolves when the server ends the
+ * stream (after a few minutes) and rejects when `signal` aborts it.
+ */
+export const watchPaletteStatus = async (
+  onStatus: (status: PaletteStatus) => void,
+  signal: AbortSignal
+): Promise<void> => {
+  const token = await ensureToken();
+  const response = await fetch(`${apiClient.defaults.baseURL}/generator/palettes/events/`, {
+    headers: {
+      Accept: "text/event-stream",
+      ...(token ? { Authorization: `Bearer ${token}` } : {}),
+    },
+    signal,
+  });
+  if (!response.ok || !response.body) {
+    throw new Error(`Palette status stream failed with status ${response.status}`);
+  }
+
+  const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+  let buffer = "";
+  for (;;) {
+    const { value, done } = await reader.read();
+    if (done) return;
+    // Events end with a blank line; keep any partial event for the next chunk
+    const events = (buffer + value).split("\n\n");
+    buffer = events.pop() ?? "";
+    for (const event of events) {
+      const lines = event.split("\n");
+      const data = lines.find(line => line.startsWith("data: "));
+      if (lines.includes("event: status") && data) {
+        onStatus(JSON.parse(data.slice("data: ".length)));
+      }
+    }
+  }
+};
+
 export const downloadPaletteFiles = async (paletteId: number): Promise<Blob> => {
   try {
     const response = await apiClient.get(`/generator/palettes/${paletteId}/download/`, {